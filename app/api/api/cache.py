@@ -0,0 +1,61 @@
+import hashlib
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from rest_framework.response import Response
+from shared.mapping.permissions import get_scan_report_access
+from shared.services.cache import get_scan_report_cache_version
+
+
+class ScanReportCacheMixin:
+    """
+    Mixin to cache list responses of a Scan Report's tables, fields or values.
+
+    Responses are cached under an explicit key built from the Scan Report, the
+    object being listed, the query parameters and the user's permissions on the
+    Scan Report, so users with the same permissions share entries. The key also
+    includes the Scan Report's cache version, which writes to its fields, values or
+    concepts bump to invalidate every entry at once.
+
+    Must be used with `ScanReportPermissionMixin`, which sets `self.scan_report`.
+    """
+
+    cache_timeout = 60 * 15
+
+    def get_cache_scope(self) -> str:
+        """
+        Returns the part of the cache key naming the object being listed, by
+        default the view and its URL arguments, e.g.
+        `"ScanReportValueListV2:field_pk=3:pk=1:table_pk=2"`.
+        """
+        return ":".join(
+            [type(self).__name__]
+            + [f"{name}={value}" for name, value in sorted(self.kwargs.items())]
+        )
+
+    def get_cache_key(self, request) -> str:
+        access = get_scan_report_access(self.scan_report, request.user, request)
+        permissions = "+".join(access.permissions()) if access else ""
+        params = urlencode(sorted(request.query_params.lists()), doseq=True)
+        version = get_scan_report_cache_version(self.scan_report.id)
+        digest = hashlib.md5(params.encode(), usedforsecurity=False).hexdigest()
+        return ":".join(
+            [
+                "scan_report",
+                str(self.scan_report.id),
+                f"v{version}",
+                self.get_cache_scope(),
+                permissions,
+                digest,
+            ]
+        )
+
+    def list(self, request, *args, **kwargs):
+        key = self.get_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = super().list(request, *args, **kwargs)
+        cache.set(key, response.data, self.cache_timeout)
+        return response
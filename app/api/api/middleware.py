@@ -0,0 +1,58 @@
+import hmac
+import os
+import uuid
+
+from django.core.exceptions import MiddlewareNotUsed
+from shared.services.profiling import (
+    profiling_configured,
+    save_profile,
+    start_profiler,
+)
+
+
+class ProfilingMiddleware:
+    """
+    Profiles requests, to diagnose slow endpoints where they are slow.
+
+    Requests are profiled as `start_profiler` decides, from `PROFILING_ENABLED`
+    and `PROFILING_SAMPLE_RATE`. A single request can also be profiled by sending
+    `PROFILING_TOKEN` in the `X-Profile` header. Profiles are named after the
+    request's `X-Request-ID` header, or a random ID, and the saved profile's name
+    is returned in the `X-Profile-Id` header.
+
+    Unless profiling is configured when the server starts, the middleware is
+    removed.
+    """
+
+    def __init__(self, get_response):
+        if not profiling_configured():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def _is_forced(self, request) -> bool:
+        token = os.environ.get("PROFILING_TOKEN")
+        header = request.headers.get("X-Profile")
+        # compare_digest only takes ASCII strings, and headers can be any text
+        return bool(token and header) and hmac.compare_digest(
+            header.encode(), token.encode()
+        )
+
+    def __call__(self, request):
+        profiler = start_profiler(force=self._is_forced(request))
+        if profiler is None:
+            return self.get_response(request)
+
+        request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+        response = None
+        try:
+            response = self.get_response(request)
+        finally:
+            name = save_profile(
+                profiler.stop(),
+                "api",
+                f"{request_id}-{request.method}-{request.path}",
+                profiler.extension,
+            )
+        if name:
+            response["X-Profile-Id"] = name
+        return response
@@ -22,8 +22,13 @@ class ScanReportPermissionMixin:
     def initial(self, request, *args, **kwargs):
         """
         Ensures that self.scan_report is set before get_queryset is called.
+
+        A Scan Report being deleted is not found, except to delete it again.
         """
-        self.scan_report = get_object_or_404(ScanReport, pk=self.kwargs["pk"])
+        scan_reports = ScanReport.objects.all()
+        if request.method != "DELETE":
+            scan_reports = scan_reports.filter(deleting=False)
+        self.scan_report = get_object_or_404(scan_reports, pk=self.kwargs["pk"])
         super().initial(request, *args, **kwargs)
 
     def get_permissions(self):
@@ -1,4 +1,8 @@
+from django.db import connections
 from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class CustomPagination(pagination.PageNumberPagination):
@@ -6,3 +10,90 @@ class CustomPagination(pagination.PageNumberPagination):
     page_size_query_param = "page_size"
     max_page_size = 50
     page_query_param = "p"
+
+
+def estimate_count(queryset) -> int:
+    """
+    Estimate the number of rows in a queryset from the query planner's statistics,
+    without running a `COUNT(*)`. Falls back to an exact count on databases other
+    than PostgreSQL.
+
+    Args:
+        queryset (QuerySet): The queryset to count.
+
+    Returns:
+        int: The estimated number of rows.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return queryset.count()
+
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class KeysetPagination(CustomPagination):
+    """
+    Page number pagination, with an opt-in keyset mode for deep pages into large
+    listings.
+
+    Passing `after=<id>` returns the page of rows with a primary key greater than
+    `<id>` (use `after=0` for the first page), which avoids the `OFFSET` scan of
+    page numbers. In this mode `count` is estimated from the query planner unless
+    `count=exact` is passed, or the estimate is small enough to count exactly.
+    """
+
+    cursor_query_param = "after"
+    count_query_param = "count"
+    exact_count_threshold = 10_000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.cursor_query_param in request.query_params
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        try:
+            after = int(request.query_params[self.cursor_query_param])
+        except ValueError:
+            raise NotFound("Invalid cursor.")
+
+        self.count, self.count_exact = self.get_count(queryset, request)
+        page = list(queryset.order_by("pk").filter(pk__gt=after)[: page_size + 1])
+        self.next_cursor = page[page_size - 1].pk if len(page) > page_size else None
+        return page[:page_size]
+
+    def get_count(self, queryset, request) -> tuple[int, bool]:
+        """
+        Returns the count of the queryset, and whether it is exact.
+        """
+        if request.query_params.get(self.count_query_param) != "exact":
+            estimate = estimate_count(queryset)
+            if estimate >= self.exact_count_threshold:
+                return estimate, False
+        return queryset.count(), True
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response(
+            {
+                "count": self.count,
+                "count_exact": self.count_exact,
+                "next": self.get_next_link(),
+                "previous": None,
+                "results": data,
+            }
+        )
@@ -0,0 +1,59 @@
+import json
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speed-up
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON renderer that encodes with `orjson` when it is installed.
+
+    Falls back to the standard DRF `JSONRenderer` if `orjson` is missing, or when the
+    client asks for indented output.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        return orjson.dumps(
+            data, default=JSONEncoder().default, option=orjson.OPT_NON_STR_KEYS
+        )
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Renders a list of records as newline delimited JSON, one record per line.
+
+    Views can stream a response with `render_line` instead, so large responses are
+    sent as they are built. Anything else, such as an error, is a single line.
+    """
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = None
+
+    def render_line(self, record) -> bytes:
+        if orjson is None:
+            return json.dumps(record, cls=JSONEncoder).encode() + b"\n"
+        return (
+            orjson.dumps(
+                record, default=JSONEncoder().default, option=orjson.OPT_NON_STR_KEYS
+            )
+            + b"\n"
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if isinstance(data, dict):
+            data = [data]
+        return b"".join(self.render_line(record) for record in data)
@@ -1,10 +1,63 @@
 from typing import Type
 
-from django.core.cache import cache
+from django.contrib.auth import get_user_model
 from django.db.models import Model
-from django.db.models.signals import post_delete, post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver
-from shared.mapping.models import Dataset, Project, ScanReport
+from shared.mapping.models import (
+    Dataset,
+    Project,
+    ScanReport,
+    ScanReportConcept,
+    ScanReportField,
+    ScanReportValue,
+)
+from shared.mapping.permissions import invalidate_scan_report_access
+from shared.services.access import refresh_scan_report_access, scan_reports_for
+from shared.services.cache import (
+    bump_scan_report_cache_version,
+    get_scan_report_id,
+)
+
+ACCESS_REFRESH_ATTR = "_access_scan_report_ids"
+
+
+@receiver(post_save, sender=ScanReport)
+@receiver(post_delete, sender=ScanReport)
+def invalidate_scan_report_cache(sender: Type[Model], instance, **kwargs):
+    """
+    Invalidates a Scan Report's cached responses when it is saved or deleted.
+
+    Args:
+        sender: The sender of the signal.
+        instance: The Scan Report.
+
+    Returns:
+        None
+    """
+    bump_scan_report_cache_version(instance.id)
+
+
+# Only saves are handled for fields and values: a delete receiver would stop Django
+# fast-deleting them when a Scan Report is deleted, and the Scan Report's own
+# delete already invalidates its responses.
+@receiver(post_save, sender=ScanReportField)
+@receiver(post_save, sender=ScanReportValue)
+@receiver(post_save, sender=ScanReportConcept)
+@receiver(post_delete, sender=ScanReportConcept)
+def invalidate_scan_report_content_cache(sender: Type[Model], instance, **kwargs):
+    """
+    Invalidates a Scan Report's cached responses when one of its fields, values or
+    concepts is written.
+
+    Args:
+        sender: The sender of the signal.
+        instance: The Scan Report Field, Value or Concept.
+
+    Returns:
+        None
+    """
+    bump_scan_report_cache_version(get_scan_report_id(instance))
 
 
 @receiver(post_save, sender=Project)
@@ -13,14 +66,93 @@ from shared.mapping.models import Dataset, Project, ScanReport
 @receiver(post_delete, sender=Dataset)
 @receiver(post_save, sender=ScanReport)
 @receiver(post_delete, sender=ScanReport)
-def clear_cache(sender: Type[Model], **kwargs):
+@receiver(m2m_changed, sender=Project.members.through)
+@receiver(m2m_changed, sender=Project.datasets.through)
+@receiver(m2m_changed, sender=Dataset.viewers.through)
+@receiver(m2m_changed, sender=Dataset.editors.through)
+@receiver(m2m_changed, sender=Dataset.admins.through)
+@receiver(m2m_changed, sender=ScanReport.viewers.through)
+@receiver(m2m_changed, sender=ScanReport.editors.through)
+def invalidate_permissions(sender: Type[Model], action: str = None, **kwargs):
     """
-    Clears the cache when a Project, Dataset, or Scan Report is saved or deleted.
+    Invalidates cached scan report permissions when memberships, visibility or
+    authorship change.
+
+    Args:
+        sender: The sender of the signal.
+        action: The kind of `m2m_changed` update, if any.
+
+    Returns:
+        None
+    """
+    if action is None or action.startswith("post_"):
+        invalidate_scan_report_access()
+
+
+@receiver(post_save, sender=ScanReport)
+def refresh_scan_report_access_on_save(sender: Type[Model], instance, **kwargs):
+    """
+    Rebuilds the access rows of a Scan Report when it is saved, as its visibility,
+    author or parent dataset may have changed.
+    """
+    refresh_scan_report_access([instance.id])
+
+
+@receiver(post_save, sender=Dataset)
+def refresh_dataset_access_on_save(sender: Type[Model], instance, **kwargs):
+    """
+    Rebuilds the access rows of a Dataset's Scan Reports when it is saved, as its
+    visibility may have changed.
+    """
+    refresh_scan_report_access(scan_reports_for(Dataset, [instance.id]))
+
+
+@receiver(pre_delete, sender=Project)
+@receiver(post_delete, sender=Project)
+def refresh_project_access_on_delete(sender: Type[Model], instance, signal, **kwargs):
+    """
+    Rebuilds the access rows of a Project's Scan Reports once it is deleted.
+    The Scan Reports are collected before the Project's memberships are removed.
+    """
+    if signal is pre_delete:
+        setattr(instance, ACCESS_REFRESH_ATTR, scan_reports_for(Project, [instance.id]))
+    else:
+        refresh_scan_report_access(getattr(instance, ACCESS_REFRESH_ATTR, []))
+
+
+@receiver(m2m_changed, sender=Project.members.through)
+@receiver(m2m_changed, sender=Project.datasets.through)
+@receiver(m2m_changed, sender=Dataset.viewers.through)
+@receiver(m2m_changed, sender=Dataset.editors.through)
+@receiver(m2m_changed, sender=Dataset.admins.through)
+@receiver(m2m_changed, sender=ScanReport.viewers.through)
+@receiver(m2m_changed, sender=ScanReport.editors.through)
+def refresh_access_on_membership_change(
+    sender: Type[Model], instance, action: str, model: Type[Model], pk_set, **kwargs
+):
+    """
+    Rebuilds the access rows of the Scan Reports affected by a membership change.
+
+    The affected Scan Reports are collected before the change, so clearing a
+    relationship still refreshes the Scan Reports it used to grant access to.
 
     Args:
         sender: The sender of the signal.
+        instance: The object whose relationship changed.
+        action: The kind of `m2m_changed` update.
+        model: The model of the objects added or removed.
+        pk_set: The IDs of the objects added or removed, `None` when cleared.
 
     Returns:
         None
     """
-    cache.clear()
+    User = get_user_model()
+    if action.startswith("pre_"):
+        if pk_set is not None and (isinstance(instance, User) or model is Dataset):
+            # e.g. `user.projects.add(...)` or `project.datasets.add(...)`
+            affected = scan_reports_for(model, pk_set)
+        else:
+            affected = scan_reports_for(type(instance), [instance.id])
+        setattr(instance, ACCESS_REFRESH_ATTR, affected)
+    else:
+        refresh_scan_report_access(instance.__dict__.pop(ACCESS_REFRESH_ATTR, []))
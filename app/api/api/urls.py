@@ -102,4 +102,14 @@ urlpatterns = [
         views.ConceptFilterViewSetV2.as_view(),
         name="v2conceptsfilter",
     ),
+    path(
+        r"v2/omop/concepts/search/",
+        views.ConceptSearchV2.as_view(),
+        name="v2conceptsearch",
+    ),
+    path(
+        r"v2/omop/concepts/lookup/",
+        views.ConceptLookupV2.as_view(),
+        name="v2conceptlookup",
+    ),
 ]
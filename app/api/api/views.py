@@ -7,10 +7,14 @@ from typing import Any
 from urllib.parse import urljoin
 
 import requests
+from api.cache import ScanReportCacheMixin
 from api.filters import ScanReportAccessFilter
 from api.mixins import ScanReportPermissionMixin
-from api.paginations import CustomPagination
+from api.paginations import CustomPagination, KeysetPagination
+from api.renderers import FastJSONRenderer, NDJSONRenderer
 from api.serializers import (
+    ConceptLookupSerializer,
+    ConceptSearchSerializer,
     ConceptSerializerV2,
     GetRulesAnalysis,
     ScanReportConceptSerializer,
@@ -31,13 +35,11 @@ from datasets.serializers import DataPartnerSerializer
 from django.contrib.auth.models import User
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ObjectDoesNotExist
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
-from django.views.decorators.vary import vary_on_cookie
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
+from rest_framework.exceptions import ParseError
 from rest_framework.filters import OrderingFilter
 from rest_framework.generics import GenericAPIView
 from rest_framework.mixins import (
@@ -49,10 +51,11 @@ from rest_framework.mixins import (
 )
 from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from shared.data.models import Concept
-from shared.files.service import delete_blob, modify_filename, upload_blob, get_blob
+from shared.files.service import modify_filename, stream_blob, upload_blob
 from shared.mapping.models import (
     DataDictionary,
     DataPartner,
@@ -63,9 +66,12 @@ from shared.mapping.models import (
     ScanReportField,
     ScanReportTable,
     ScanReportValue,
+    UploadStatus,
 )
 from shared.mapping.permissions import get_user_permissions_on_scan_report
 from shared.services.azurequeue import add_message
+from shared.services.concept_lookup import lookup_concepts
+from shared.services.concept_search import concept_facets, search_concepts
 from shared.services.rules import (
     _find_destination_table,
     _save_mapping_rules,
@@ -73,10 +79,11 @@ from shared.services.rules import (
 )
 from shared.services.rules_export import (
     get_mapping_rules_json,
-    get_mapping_rules_list,
+    get_mapping_rules_rows,
     make_dag,
 )
 from shared.jobs.models import Job, JobStage, StageStatus
+from django.db import transaction
 from django.db.models import Q
 
 
@@ -92,7 +99,7 @@ class ConceptFilterViewSetV2(GenericAPIView, ListModelMixin):
     queryset = Concept.objects.all().order_by("concept_id")
     serializer_class = ConceptSerializerV2
     filter_backends = [DjangoFilterBackend]
-    pagination_class = CustomPagination
+    pagination_class = KeysetPagination
     filterset_fields = {
         "concept_id": ["in", "exact"],
         "concept_code": ["in", "exact"],
@@ -103,6 +110,77 @@ class ConceptFilterViewSetV2(GenericAPIView, ListModelMixin):
         return self.list(request, *args, **kwargs)
 
 
+class ConceptSearchV2(GenericAPIView, ListModelMixin):
+    """
+    Full-text search of concepts by name and synonym, ranked by how well the
+    name matches.
+
+    Takes the text to search for as `q`, and optionally a comma separated list of
+    `domain_id` and `vocabulary_id` to filter by, `standard=true` to only return
+    standard concepts, and `synonyms=false` to only match names. The response
+    includes the number of results in each domain and vocabulary as `facets`.
+    """
+
+    serializer_class = ConceptSearchSerializer
+    pagination_class = CustomPagination
+
+    def get_search(self) -> dict:
+        params = self.request.query_params
+        text = params.get("q", "").strip()
+        if not text:
+            raise ParseError("A search term is required: ?q=<text>")
+        return {
+            "text": text,
+            "domains": [d for d in params.get("domain_id", "").split(",") if d],
+            "vocabularies": [
+                v for v in params.get("vocabulary_id", "").split(",") if v
+            ],
+            "standard_only": params.get("standard") == "true",
+            "synonyms": params.get("synonyms") != "false",
+        }
+
+    def get_queryset(self):
+        return search_concepts(**self.get_search())
+
+    def get(self, request, *args, **kwargs):
+        response = self.list(request, *args, **kwargs)
+        response.data["facets"] = concept_facets(**self.get_search())
+        return response
+
+
+class ConceptLookupV2(APIView):
+    """
+    Look up concepts in bulk, by ID and by vocabulary and code, with the standard
+    concepts each resolves to.
+
+    Takes a body of `concept_ids`, and `codes` as `[vocabulary_id, concept_code]`
+    pairs. Each result has `standard_concept_ids`: the concept itself if it is
+    standard, otherwise the standard concepts it "Maps to". Those not found are
+    returned with `"missing": true`.
+
+    Responds with `{"results": [...]}`, or streams one result per line when asked
+    for NDJSON with `Accept: application/x-ndjson` or `?format=ndjson`.
+    """
+
+    renderer_classes = [FastJSONRenderer, NDJSONRenderer, BrowsableAPIRenderer]
+
+    def post(self, request, *args, **kwargs):
+        serializer = ConceptLookupSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = lookup_concepts(
+            serializer.validated_data["concept_ids"],
+            serializer.validated_data["codes"],
+        )
+
+        renderer = request.accepted_renderer
+        if isinstance(renderer, NDJSONRenderer):
+            return StreamingHttpResponse(
+                (renderer.render_line(result) for result in results),
+                content_type=renderer.media_type,
+            )
+        return Response({"results": list(results)})
+
+
 class UserViewSet(GenericAPIView, ListModelMixin):
     queryset = User.objects.all()
     serializer_class = UserSerializer
@@ -138,7 +216,7 @@ class ScanReportIndexV2(GenericAPIView, ListModelMixin, CreateModelMixin):
     - Includes custom filtering, ordering, and pagination.
     """
 
-    queryset = ScanReport.objects.all()
+    queryset = ScanReport.objects.filter(deleting=False)
     parser_classes = [MultiPartParser, FormParser]
     filter_backends = [
         DjangoFilterBackend,
@@ -168,6 +246,18 @@ class ScanReportIndexV2(GenericAPIView, ListModelMixin, CreateModelMixin):
     def get_scan_report_file(self, request):
         return request.data.get("scan_report_file", None)
 
+    def is_async_upload(self) -> bool:
+        """
+        Whether the upload should be accepted before its consistency checks have
+        run, with `?async=true`. The checks then run in the upload worker.
+        """
+        return self.request.query_params.get("async") == "true"
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["defer_checks"] = self.is_async_upload()
+        return context
+
     def get_serializer_class(self):
         if self.request.method in ["GET"]:
             return ScanReportViewSerializerV2
@@ -190,7 +280,12 @@ class ScanReportIndexV2(GenericAPIView, ListModelMixin, CreateModelMixin):
         if not file_serializer.is_valid():
             return Response(file_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        self.perform_create(file_serializer, non_file_serializer)
+        scan_report = self.perform_create(file_serializer, non_file_serializer)
+        if self.is_async_upload():
+            return Response(
+                ScanReportViewSerializerV2(scan_report).data,
+                status=status.HTTP_202_ACCEPTED,
+            )
         headers = self.get_success_headers(file_serializer.data)
         return Response(
             file_serializer.data, status=status.HTTP_201_CREATED, headers=headers
@@ -220,8 +315,19 @@ class ScanReportIndexV2(GenericAPIView, ListModelMixin, CreateModelMixin):
         )
 
         scan_report.author = self.request.user
+        if self.is_async_upload():
+            # The checks are left to the upload worker, which reports them as a job
+            scan_report.upload_status = UploadStatus.objects.get(value="PENDING")
         scan_report.save()
 
+        if self.is_async_upload():
+            Job.objects.create(
+                scan_report=scan_report,
+                stage=JobStage.objects.get(value="UPLOAD_SCAN_REPORT"),
+                status=StageStatus.objects.get(value="IN_PROGRESS"),
+                details="The Scan Report is waiting to be checked.",
+            )
+
         # Add viewers to the scan report if specified
         if sr_viewers := valid_viewers:
             scan_report.viewers.add(*sr_viewers)
@@ -276,6 +382,7 @@ class ScanReportIndexV2(GenericAPIView, ListModelMixin, CreateModelMixin):
 
         # send to the upload queue
         add_message(os.environ.get("WORKERS_UPLOAD_NAME"), azure_dict)
+        return scan_report
 
 
 class ScanReportDetailV2(
@@ -285,7 +392,7 @@ class ScanReportDetailV2(
     UpdateModelMixin,
     DestroyModelMixin,
 ):
-    queryset = ScanReport.objects.all()
+    queryset = ScanReport.objects.filter(deleting=False)
     serializer_class = ScanReportViewSerializerV2
 
     def get_serializer_class(self):
@@ -304,19 +411,58 @@ class ScanReportDetailV2(
         return self.partial_update(request, *args, **kwargs)
 
     def delete(self, request, *args, **kwargs):
-        return self.destroy(request, *args, **kwargs)
+        """
+        Deletes the Scan Report in the background, as deleting the rows of a large
+        Scan Report takes a while. The progress is reported by a job.
+
+        The Scan Report is hidden as soon as it is queued. Deleting it again only
+        queues it again if the last attempt failed.
+        """
+        self.perform_destroy(self.scan_report)
+        return Response(status=status.HTTP_202_ACCEPTED)
 
     def perform_destroy(self, instance):
+        stage = JobStage.objects.get(value="DELETE_SCAN_REPORT")
+        with transaction.atomic():
+            # Locked, so concurrent requests queue the Scan Report once
+            instance = ScanReport.objects.select_for_update().get(pk=instance.pk)
+            if instance.deleting:
+                last_job = (
+                    Job.objects.filter(scan_report=instance, stage=stage)
+                    .select_related("status")
+                    .order_by("-created_at")
+                    .first()
+                )
+                if last_job is None or last_job.status.value != "FAILED":
+                    return
+
+            ScanReport.objects.filter(pk=instance.pk).update(deleting=True)
+            job = Job.objects.create(
+                scan_report=instance,
+                stage=stage,
+                status=StageStatus.objects.get(value="IN_PROGRESS"),
+                details="The Scan Report is waiting to be deleted.",
+            )
+            message = {
+                "scan_report_id": instance.id,
+                "scan_report_blob": instance.name,
+                "data_dictionary_blob": (
+                    instance.data_dictionary.name if instance.data_dictionary else None
+                ),
+            }
+            # Sent once committed, so the worker finds the job and the flag
+            transaction.on_commit(lambda: self._queue_delete(job, message))
+
+    def _queue_delete(self, job, message):
         try:
-            delete_blob(instance.name, "scan-reports")
+            add_message(settings.WORKERS_DELETE_NAME, message)
         except Exception as e:
-            raise Exception(f"Error deleting scan report: {e}")
-        if instance.data_dictionary:
-            try:
-                delete_blob(instance.data_dictionary.name, "data-dictionaries")
-            except Exception as e:
-                raise Exception(f"Error deleting data dictionary: {e}")
-        instance.delete()
+            # A failed job lets the Scan Report be deleted again
+            logging.error(f"Queueing the delete of a Scan Report failed: {e}")
+            Job.objects.filter(pk=job.pk).update(
+                status=StageStatus.objects.get(value="FAILED"),
+                details="The Scan Report could not be queued to be deleted.",
+            )
 
 
 class ScanReportTableIndexV2(ScanReportPermissionMixin, GenericAPIView, ListModelMixin):
@@ -445,7 +591,9 @@ class ScanReportTableDetailV2(
         return Response(serializer.data)
 
 
-class ScanReportFieldIndexV2(ScanReportPermissionMixin, GenericAPIView, ListModelMixin):
+class ScanReportFieldIndexV2(
+    ScanReportPermissionMixin, ScanReportCacheMixin, GenericAPIView, ListModelMixin
+):
     serializer_class = ScanReportFieldListSerializerV2
     filterset_fields = {
         "name": ["icontains"],
@@ -464,11 +612,6 @@ class ScanReportFieldIndexV2(ScanReportPermissionMixin, GenericAPIView, ListMode
             "id"
         )
 
-    @method_decorator(cache_page(60 * 15))
-    @method_decorator(vary_on_cookie)
-    def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
-
 
 class ScanReportFieldDetailV2(
     ScanReportPermissionMixin, GenericAPIView, RetrieveModelMixin, UpdateModelMixin
@@ -493,12 +636,14 @@ class ScanReportFieldDetailV2(
         return super().get_serializer_class()
 
 
-class ScanReportValueListV2(ScanReportPermissionMixin, GenericAPIView, ListModelMixin):
+class ScanReportValueListV2(
+    ScanReportPermissionMixin, ScanReportCacheMixin, GenericAPIView, ListModelMixin
+):
     filterset_fields = {
         "value": ["in", "icontains"],
     }
     filter_backends = [DjangoFilterBackend]
-    pagination_class = CustomPagination
+    pagination_class = KeysetPagination
     serializer_class = ScanReportValueViewSerializerV2
 
     def get(self, request, *args, **kwargs):
@@ -513,11 +658,6 @@ class ScanReportValueListV2(ScanReportPermissionMixin, GenericAPIView, ListModel
             .only("id", "value", "frequency", "value_description", "scan_report_field")
         )
 
-    @method_decorator(cache_page(60 * 15))
-    @method_decorator(vary_on_cookie)
-    def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
-
 
 class ScanReportConceptListV2(
     GenericAPIView, ListModelMixin, CreateModelMixin, DestroyModelMixin
@@ -528,7 +668,7 @@ class ScanReportConceptListV2(
 
     queryset = ScanReportConcept.objects.all().order_by("id")
     serializer_class = ScanReportConceptSerializer
-    pagination_class = CustomPagination
+    pagination_class = KeysetPagination
     filter_backends = [DjangoFilterBackend]
     filterset_fields = {
         "concept__concept_id": ["in", "exact"],
@@ -551,7 +691,9 @@ class ScanReportConceptListV2(
         # validate person_id and date event are set on table
         table_id = body.pop("table_id", None)
         try:
-            table = ScanReportTable.objects.get(pk=table_id)
+            table = ScanReportTable.objects.get(
+                pk=table_id, scan_report__deleting=False
+            )
         except ObjectDoesNotExist:
             return Response(
                 {"detail": "Table with the provided ID does not exist."},
@@ -700,6 +842,7 @@ class RulesListV2(ScanReportPermissionMixin, GenericAPIView, ListModelMixin):
     queryset = MappingRule.objects.all().order_by("id")
     pagination_class = CustomPagination
     filter_backends = [DjangoFilterBackend]
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
     http_method_names = ["get"]
 
     def get_queryset(self):
@@ -719,8 +862,8 @@ class RulesListV2(ScanReportPermissionMixin, GenericAPIView, ListModelMixin):
         filtering on ID of a model (ScanReport) that's not that being returned (MappingRule).
 
         Instead, this is in effect a ListSerializer for MappingRule but that only works for in
-        the scenario we have. This means that get_mapping_rules_list() must now handle pagination
-        directly.
+        the scenario we have. This means that get_mapping_rules_rows() must now handle pagination
+        directly, and builds the rules straight from database rows.
         """
         queryset = self.queryset
         _id = self.kwargs["pk"]
@@ -732,36 +875,10 @@ class RulesListV2(ScanReportPermissionMixin, GenericAPIView, ListModelMixin):
         # Get subset of mapping rules that fit onto the page to be displayed
         p = self.request.query_params.get("p", 1)
         page_size = self.request.query_params.get("page_size", 30)
-        rules = get_mapping_rules_list(
+        rules = get_mapping_rules_rows(
             queryset, page_number=int(p), page_size=int(page_size)
         )
 
-        # Process all rules
-        for rule in rules:
-            rule["destination_table"] = {
-                "id": int(str(rule["destination_table"])),
-                "name": rule["destination_table"].table,
-            }
-
-            rule["destination_field"] = {
-                "id": int(str(rule["destination_field"])),
-                "name": rule["destination_field"].field,
-            }
-
-            rule["domain"] = {
-                "name": rule["domain"],
-            }
-
-            rule["source_table"] = {
-                "id": int(str(rule["source_table"])),
-                "name": rule["source_table"].name,
-            }
-
-            rule["source_field"] = {
-                "id": int(str(rule["source_field"])),
-                "name": rule["source_field"].name,
-            }
-
         return Response(data={"count": count, "results": rules})
 
 
@@ -787,40 +904,15 @@ class SummaryRulesListV2(RulesListV2):
         filtered_queryset = queryset.filter(omop_field_id__in=ids_list)
         count = filtered_queryset.count()
         # Get the rules list based on the filtered queryset
-        rules = get_mapping_rules_list(
+        rules = get_mapping_rules_rows(
             filtered_queryset, page_number=int(p), page_size=int(page_size)
         )
-        # Process rules
-        for rule in rules:
-            rule["destination_table"] = {
-                "id": int(str(rule["destination_table"])),
-                "name": rule["destination_table"].table,
-            }
-
-            rule["destination_field"] = {
-                "id": int(str(rule["destination_field"])),
-                "name": rule["destination_field"].field,
-            }
-
-            rule["domain"] = {
-                "name": rule["domain"],
-            }
-
-            rule["source_table"] = {
-                "id": int(str(rule["source_table"])),
-                "name": rule["source_table"].name,
-            }
-
-            rule["source_field"] = {
-                "id": int(str(rule["source_field"])),
-                "name": rule["source_field"].name,
-            }
 
         return Response(data={"count": count, "results": rules})
 
 
 class AnalyseRulesV2(ScanReportPermissionMixin, GenericAPIView, RetrieveModelMixin):
-    queryset = ScanReport.objects.all()
+    queryset = ScanReport.objects.filter(deleting=False)
     serializer_class = GetRulesAnalysis
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ["id"]
@@ -829,17 +921,8 @@ class AnalyseRulesV2(ScanReportPermissionMixin, GenericAPIView, RetrieveModelMix
 class DownloadScanReportViewSet(viewsets.ViewSet):
     def list(self, request, pk):
         # TODO: This should not be a list view...
-        scan_report = ScanReport.objects.get(id=pk)
-        blob_name = scan_report.name
-        scan_report_blob = get_blob(blob_name, "scan-reports")
-
-        response = HttpResponse(
-            scan_report_blob,
-            content_type="application/octet-stream",
-        )
-        response["Content-Disposition"] = f'attachment; filename="{blob_name}"'
-
-        return response
+        scan_report = get_object_or_404(ScanReport, id=pk, deleting=False)
+        return stream_blob(request, scan_report.name, "scan-reports")
 
 
 class ScanReportPermissionView(APIView):
@@ -14,6 +14,7 @@ import os
 from datetime import timedelta
 
 from dotenv import load_dotenv
+from shared.settings import cache_settings
 
 load_dotenv()
 
@@ -82,6 +83,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Only used when PROFILING_* variables are set, see shared.services.profiling
+    "api.middleware.ProfilingMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -178,12 +181,15 @@ USE_TZ = True
 
 CORS_ORIGIN_ALLOW_ALL = True
 
-CACHES = {
-    "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-        "LOCATION": "unique-snowflake",
-    }
-}
+# Share the cache between workers by setting `CACHE_LOCATION` to a Redis URL
+# or a directory for a file-based cache, see `shared.settings.cache_settings`.
+CACHES = cache_settings()
+
+# How long, in seconds, a user's permissions on a scan report are cached for
+PERMISSIONS_CACHE_TIMEOUT = int(os.getenv("PERMISSIONS_CACHE_TIMEOUT", 30))
+
+# Size, in bytes, of the chunks blob downloads are streamed to clients in
+BLOB_DOWNLOAD_CHUNK_SIZE = int(os.getenv("BLOB_DOWNLOAD_CHUNK_SIZE", 4 * 1024 * 1024))
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
@@ -216,6 +222,7 @@ WORKERS_RULES_KEY = os.environ.get("WORKERS_RULES_KEY", "")
 WORKERS_RULES_EXPORT_NAME = os.environ.get(
     "WORKERS_RULES_EXPORT_NAME", "rules-exports-local"
 )
+WORKERS_DELETE_NAME = os.environ.get("WORKERS_DELETE_NAME", "deletereports-local")
 
 # Auth
 
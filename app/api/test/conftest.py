@@ -7,7 +7,7 @@ from django.core.management import call_command
 from django.db import connection
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
 from pytest_django import DjangoDbBlocker
-from shared.data.models import Concept
+from shared.data.models import Concept, ConceptRelationship, ConceptSynonym
 
 
 def run_sql(db: str, sql: str):
@@ -59,10 +59,12 @@ def django_db_setup(
     # Set the default to test for ease
     settings.DATABASES["default"]["NAME"] = db_name
 
-    # Create the omop.Concept table
+    # Create the omop.Concept, omop.ConceptSynonym and omop.ConceptRelationship tables
     with django_db_blocker.unblock():
         with connection.schema_editor() as schema_editor:
             schema_editor.create_model(Concept)
+            schema_editor.create_model(ConceptSynonym)
+            schema_editor.create_model(ConceptRelationship)
 
         # run the rest of the migrations
         call_command("migrate", "--noinput")
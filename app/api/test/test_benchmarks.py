@@ -0,0 +1,457 @@
+import os
+import random
+import time
+import tracemalloc
+from datetime import date
+from io import BytesIO
+
+import openpyxl
+import pytest
+from api.filters import ScanReportAccessFilter
+from api.serializers import ScanReportFilesSerializer
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import OperationalError, transaction
+from django.db.models.query_utils import Q
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIRequestFactory
+from shared.data.models import Concept
+from shared.mapping.models import (
+    DataPartner,
+    Dataset,
+    MappingRule,
+    OmopField,
+    OmopTable,
+    Project,
+    ScanReport,
+    ScanReportConcept,
+    ScanReportField,
+    ScanReportTable,
+    ScanReportValue,
+    VisibilityChoices,
+)
+from shared.services.access import refresh_scan_report_access
+from shared.services.bulk_insert import bulk_insert
+from shared.services.rules_export import get_mapping_rules_list, get_mapping_rules_rows
+
+# Benchmarks build large fixtures, so only run them when asked to.
+pytestmark = pytest.mark.skipif(
+    not os.getenv("RUN_BENCHMARKS"), reason="Set RUN_BENCHMARKS=1 to run benchmarks."
+)
+
+
+def report(name: str, count: int, seconds: float) -> None:
+    each = f", {seconds / count * 1000:,.1f}ms each" if count else ""
+    print(f"\n{name}: {count} in {seconds:.3f}s ({count / seconds:,.0f}/s{each})")
+
+
+class TestRulesListBenchmark(TestCase):
+    """
+    Compares building the rules list from model instances against building it from
+    database rows, on a 50k-rule scan report.
+    """
+
+    NUM_RULES = 50_000
+    RULES_PER_CONCEPT = 5
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        user = User.objects.create(username="samwise", password="kjsdhfkjshdf")
+        data_partner = DataPartner.objects.create(name="Benchmark Partner")
+        dataset = Dataset.objects.create(
+            name="Benchmark Dataset", visibility="PUBLIC", data_partner=data_partner
+        )
+        cls.scan_report = ScanReport.objects.create(
+            author=user,
+            name="Benchmark Scan Report",
+            dataset="Benchmark",
+            parent_dataset=dataset,
+        )
+        table = ScanReportTable.objects.create(scan_report=cls.scan_report, name="T")
+        field = ScanReportField.objects.create(
+            scan_report_table=table,
+            name="F",
+            description_column="",
+            type_column="VARCHAR",
+            max_length=10,
+            nrows=-1,
+            nrows_checked=10,
+            fraction_empty=0.0,
+            nunique_values=10,
+            fraction_unique=1.0,
+        )
+        concept = Concept.objects.create(
+            concept_id=4102774,
+            concept_name="Productive cough",
+            domain_id="Condition",
+            vocabulary_id="SNOMED",
+            concept_class_id="Clinical Finding",
+            standard_concept="S",
+            concept_code="28743005",
+            valid_start_date=date(1970, 1, 1),
+            valid_end_date=date(2099, 12, 31),
+        )
+        omop_table = OmopTable.objects.create(table="condition_occurrence")
+        omop_fields = [
+            OmopField.objects.create(table=omop_table, field=name)
+            for name in [
+                "person_id",
+                "condition_start_datetime",
+                "condition_source_concept_id",
+                "condition_concept_id",
+                "condition_source_value",
+            ]
+        ]
+
+        num_concepts = cls.NUM_RULES // cls.RULES_PER_CONCEPT
+        values = ScanReportValue.objects.bulk_create(
+            ScanReportValue(
+                scan_report_field=field,
+                scan_report_id=field.scan_report_id,
+                value=str(i),
+                frequency=1,
+            )
+            for i in range(num_concepts)
+        )
+        content_type = ContentType.objects.get_for_model(ScanReportValue)
+        sr_concepts = ScanReportConcept.objects.bulk_create(
+            ScanReportConcept(
+                concept=concept, content_type=content_type, object_id=value.id
+            )
+            for value in values
+        )
+        MappingRule.objects.bulk_create(
+            MappingRule(
+                scan_report=cls.scan_report,
+                omop_field=omop_field,
+                source_table=table,
+                source_field=field,
+                concept=sr_concept,
+            )
+            for sr_concept in sr_concepts
+            for omop_field in omop_fields
+        )
+
+    def test_rules_list_objects_per_second(self):
+        rules = MappingRule.objects.filter(scan_report=self.scan_report).order_by("id")
+
+        start = time.perf_counter()
+        model_rules = get_mapping_rules_list(rules)
+        for rule in model_rules:
+            for key in ["destination_table", "destination_field"]:
+                rule[key] = {"id": rule[key].id, "name": str(rule[key])}
+            for key in ["source_table", "source_field"]:
+                rule[key] = {"id": rule[key].id, "name": rule[key].name}
+        model_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        row_rules = get_mapping_rules_rows(rules)
+        row_seconds = time.perf_counter() - start
+
+        report("Model instances", len(model_rules), model_seconds)
+        report("Rows", len(row_rules), row_seconds)
+        self.assertEqual(len(model_rules), self.NUM_RULES)
+        self.assertEqual(len(row_rules), self.NUM_RULES)
+
+
+def legacy_access_conditions(user_id: int) -> Q:
+    """
+    The multi-join conditions `ScanReportAccessFilter` used before the access table.
+    """
+    return Q(
+        Q(parent_dataset__visibility=VisibilityChoices.PUBLIC)
+        & Q(visibility=VisibilityChoices.PUBLIC)
+        | Q(parent_dataset__visibility=VisibilityChoices.PUBLIC)
+        & (
+            Q(viewers=user_id)
+            | Q(editors=user_id)
+            | Q(author=user_id)
+            | Q(parent_dataset__editors=user_id)
+            | Q(parent_dataset__admins=user_id)
+        )
+        & Q(visibility=VisibilityChoices.RESTRICTED)
+        | Q(parent_dataset__visibility=VisibilityChoices.RESTRICTED)
+        & (
+            Q(viewers=user_id)
+            | Q(editors=user_id)
+            | Q(author=user_id)
+            | Q(parent_dataset__admins=user_id)
+            | Q(parent_dataset__editors=user_id)
+        )
+        & Q(visibility=VisibilityChoices.RESTRICTED)
+        | Q(parent_dataset__visibility=VisibilityChoices.RESTRICTED)
+        & (
+            Q(parent_dataset__editors=user_id)
+            | Q(parent_dataset__admins=user_id)
+            | Q(parent_dataset__viewers=user_id)
+        )
+        & Q(visibility=VisibilityChoices.PUBLIC)
+    ) & Q(parent_dataset__project__members=user_id)
+
+
+class TestScanReportAccessBenchmark(TestCase):
+    """
+    Compares listing scan reports with the multi-join access conditions against the
+    precomputed access table, with 10k scan reports and 1k users.
+    """
+
+    NUM_SCAN_REPORTS = 10_000
+    NUM_USERS = 1_000
+    NUM_DATASETS = 200
+    NUM_PROJECTS = 20
+    SAMPLE_USERS = 50
+    SAMPLE_LEGACY_USERS = 5
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(0)
+        User = get_user_model()
+        users = User.objects.bulk_create(
+            User(username=f"user{i}", password="mellon") for i in range(cls.NUM_USERS)
+        )
+        data_partner = DataPartner.objects.create(name="Benchmark Partner")
+        datasets = Dataset.objects.bulk_create(
+            Dataset(
+                name=f"Dataset {i}",
+                visibility=rng.choice(VisibilityChoices.values),
+                data_partner=data_partner,
+            )
+            for i in range(cls.NUM_DATASETS)
+        )
+        projects = Project.objects.bulk_create(
+            Project(name=f"Project {i}") for i in range(cls.NUM_PROJECTS)
+        )
+        Project.datasets.through.objects.bulk_create(
+            Project.datasets.through(
+                project_id=projects[i % cls.NUM_PROJECTS].id, dataset_id=dataset.id
+            )
+            for i, dataset in enumerate(datasets)
+        )
+        Project.members.through.objects.bulk_create(
+            Project.members.through(project_id=project.id, user_id=user.id)
+            for user in users
+            for project in rng.sample(projects, 3)
+        )
+        for through in [Dataset.viewers, Dataset.editors, Dataset.admins]:
+            through.through.objects.bulk_create(
+                through.through(dataset_id=dataset.id, user_id=user.id)
+                for dataset in datasets
+                for user in rng.sample(users, 5)
+            )
+
+        scan_reports = ScanReport.objects.bulk_create(
+            ScanReport(
+                dataset=f"Scan Report {i}",
+                visibility=rng.choice(VisibilityChoices.values),
+                parent_dataset=rng.choice(datasets),
+                author=rng.choice(users),
+            )
+            for i in range(cls.NUM_SCAN_REPORTS)
+        )
+        for through in [ScanReport.viewers, ScanReport.editors]:
+            through.through.objects.bulk_create(
+                through.through(scanreport_id=scan_report.id, user_id=user.id)
+                for scan_report in scan_reports
+                for user in rng.sample(users, 3)
+            )
+
+        start = time.perf_counter()
+        refresh_scan_report_access()
+        report(
+            "Access table rebuild",
+            cls.NUM_SCAN_REPORTS,
+            time.perf_counter() - start,
+        )
+        cls.users = rng.sample(users, cls.SAMPLE_USERS)
+
+    def list_page(self, queryset) -> list[int]:
+        """Mimic a paginated scan report list: count, then the first page."""
+        queryset.count()
+        return list(
+            queryset.order_by("-created_at", "id").values_list("id", flat=True)
+        )[:10]
+
+    def test_list_latency(self):
+        factory = APIRequestFactory()
+
+        # The multi-join conditions can exceed the database statement timeout at
+        # this size, so only time a few users and count the timeouts.
+        legacy_pages, timeouts = {}, 0
+        start = time.perf_counter()
+        for user in self.users[: self.SAMPLE_LEGACY_USERS]:
+            try:
+                with transaction.atomic():
+                    legacy_pages[user.id] = self.list_page(
+                        ScanReport.objects.filter(
+                            legacy_access_conditions(user.id)
+                        ).distinct()
+                    )
+            except OperationalError:
+                timeouts += 1
+        legacy_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        pages = {}
+        for user in self.users:
+            request = factory.get("/")
+            request.user = user
+            pages[user.id] = self.list_page(
+                ScanReportAccessFilter().filter_queryset(
+                    request, ScanReport.objects.all(), None
+                )
+            )
+        seconds = time.perf_counter() - start
+
+        report("Multi-join filter list requests", len(legacy_pages), legacy_seconds)
+        print(f"Multi-join filter timeouts: {timeouts}")
+        report("Access table list requests", len(pages), seconds)
+        for user_id, page in legacy_pages.items():
+            self.assertEqual(page, pages[user_id])
+
+
+class TestScanReportValidationBenchmark(SimpleTestCase):
+    """
+    Compares loading a large scan report in full, as the checks used to, against
+    the read-only checks, by time and peak memory.
+    """
+
+    NUM_TABLES = 10
+    NUM_FIELDS = 20
+    NUM_VALUES = 2_000
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Not write-only, so the sheets carry their dimensions as Excel's do
+        wb = openpyxl.Workbook()
+        fo_ws = wb.active
+        fo_ws.title = "Field Overview"
+        fo_ws.append(
+            [
+                "Table",
+                "Field",
+                "Description",
+                "Type",
+                "Max length",
+                "N rows",
+                "N rows checked",
+                "Fraction empty",
+                "N unique values",
+                "Fraction unique",
+            ]
+        )
+        fields = [f"field_{i}" for i in range(cls.NUM_FIELDS)]
+        for t in range(cls.NUM_TABLES):
+            for field in fields:
+                fo_ws.append([f"table_{t}", field, "", "INT", 10, 1, 1, 0, 1, 1])
+            fo_ws.append([""])
+        for t in range(cls.NUM_TABLES):
+            ws = wb.create_sheet(f"table_{t}")
+            ws.append([col for field in fields for col in [field, "Frequency"]])
+            for v in range(cls.NUM_VALUES):
+                ws.append([col for _ in fields for col in [f"value_{v}", v]])
+        file = BytesIO()
+        wb.save(file)
+        cls.content = file.getvalue()
+
+    def measure(self, name: str, func) -> None:
+        tracemalloc.start()
+        start = time.perf_counter()
+        func()
+        seconds = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        report(name, 1, seconds)
+        print(f"{name}: peak memory {peak / 1024 / 1024:,.1f} MB")
+
+    def test_validation(self):
+        print(f"\nScan report: {len(self.content) / 1024 / 1024:,.1f} MB")
+        self.measure(
+            "Full workbook load",
+            lambda: openpyxl.load_workbook(BytesIO(self.content), data_only=True),
+        )
+        serializer = ScanReportFilesSerializer()
+        self.measure(
+            "Read-only checks",
+            lambda: serializer.validate_scan_report_file(
+                SimpleUploadedFile("scan_report.xlsx", self.content)
+            ),
+        )
+        print(serializer.check_timings)
+
+
+class TestBulkInsertBenchmark(TestCase):
+    """
+    Compares inserting the values of a large scan report table with `bulk_create`
+    against `COPY`.
+    """
+
+    NUM_FIELDS = 20
+    NUM_VALUES = 200_000
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        user = User.objects.create(username="samwise", password="kjsdhfkjshdf")
+        data_partner = DataPartner.objects.create(name="Benchmark Partner")
+        dataset = Dataset.objects.create(
+            name="Benchmark Dataset", visibility="PUBLIC", data_partner=data_partner
+        )
+        scan_report = ScanReport.objects.create(
+            author=user,
+            name="Benchmark Scan Report",
+            dataset="Benchmark",
+            parent_dataset=dataset,
+        )
+        cls.table = ScanReportTable.objects.create(scan_report=scan_report, name="T")
+
+    def build(self):
+        fields = [
+            ScanReportField(
+                scan_report_table=self.table,
+                scan_report_id=self.table.scan_report_id,
+                name=f"field_{i}",
+                description_column="",
+                type_column="VARCHAR",
+                max_length=10,
+                nrows=-1,
+                nrows_checked=10,
+                fraction_empty=0.0,
+                nunique_values=10,
+                fraction_unique=1.0,
+            )
+            for i in range(self.NUM_FIELDS)
+        ]
+        return fields, lambda fields: [
+            ScanReportValue(
+                scan_report_field=fields[i % self.NUM_FIELDS],
+                scan_report_id=self.table.scan_report_id,
+                value=f"value_{i}",
+                frequency=i,
+                value_description="A value" if i % 2 else None,
+            )
+            for i in range(self.NUM_VALUES)
+        ]
+
+    def measure(self, name: str, insert) -> None:
+        fields, build_values = self.build()
+        start = time.perf_counter()
+        with transaction.atomic():
+            fields = insert(ScanReportField, fields)
+            insert(ScanReportValue, build_values(fields))
+        report(name, self.NUM_VALUES, time.perf_counter() - start)
+        self.assertEqual(
+            ScanReportValue.objects.filter(
+                scan_report_field__scan_report_table=self.table
+            ).count(),
+            self.NUM_VALUES,
+        )
+        ScanReportField.objects.filter(scan_report_table=self.table).delete()
+
+    def test_bulk_insert(self):
+        self.measure(
+            "bulk_create rows", lambda model, objs: model.objects.bulk_create(objs)
+        )
+        self.measure("COPY rows", bulk_insert)
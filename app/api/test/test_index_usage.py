@@ -0,0 +1,103 @@
+from datetime import date
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+from shared.data.models import Concept
+from shared.mapping.models import (
+    DataPartner,
+    Dataset,
+    ScanReport,
+    ScanReportConcept,
+    ScanReportField,
+    ScanReportTable,
+)
+
+
+class TestIndexUsage(TestCase):
+    def test_lists_indexes_of_table(self):
+        out = StringIO()
+        call_command("index_usage", table=["mapping_scanreportconcept"], stdout=out)
+        output = out.getvalue()
+        self.assertIn("mapping_sca_content_8a11cc_idx", output)
+        self.assertIn("unique_scan_report_concept", output)
+        self.assertNotIn("mapping_scanreportfield", output)
+
+    def test_unused_skips_unique_indexes(self):
+        out = StringIO()
+        call_command(
+            "index_usage",
+            table=["mapping_scanreportconcept"],
+            unused=True,
+            stdout=out,
+        )
+        self.assertNotIn("unique_scan_report_concept", out.getvalue())
+
+    def test_bloat_needs_pgstattuple(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pgstattuple'")
+            if cursor.fetchone() is not None:
+                self.skipTest("pgstattuple is installed")
+        with self.assertRaisesMessage(CommandError, "pgstattuple"):
+            call_command("index_usage", bloat=True, stdout=StringIO())
+
+
+class TestScanReportConceptUnique(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        user = User.objects.create(username="frodo", password="mellon")
+        data_partner = DataPartner.objects.create(name="The Shire")
+        dataset = Dataset.objects.create(
+            name="Hobbiton", visibility="PUBLIC", data_partner=data_partner
+        )
+        scan_report = ScanReport.objects.create(
+            author=user, name="Red Book", dataset="Red Book", parent_dataset=dataset
+        )
+        table = ScanReportTable.objects.create(scan_report=scan_report, name="Hobbits")
+        self.field = ScanReportField.objects.create(
+            scan_report_table=table,
+            name="cough",
+            description_column="",
+            type_column="VARCHAR",
+            max_length=10,
+            nrows=-1,
+            nrows_checked=-1,
+            fraction_empty=-1,
+            nunique_values=-1,
+            fraction_unique=-1,
+        )
+        self.concept = Concept.objects.create(
+            concept_id=254761,
+            concept_name="Cough",
+            domain_id="Condition",
+            vocabulary_id="SNOMED",
+            concept_class_id="Clinical Finding",
+            standard_concept="S",
+            concept_code="49727002",
+            valid_start_date=date(1970, 1, 1),
+            valid_end_date=date(2099, 12, 31),
+        )
+        self.content_type = ContentType.objects.get_for_model(ScanReportField)
+
+    def _concept(self):
+        return ScanReportConcept(
+            concept=self.concept,
+            content_type=self.content_type,
+            object_id=self.field.id,
+            creation_type="M",
+        )
+
+    def test_concept_is_unique_per_object(self):
+        self._concept().save()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self._concept().save()
+
+    def test_bulk_create_ignores_existing_concepts(self):
+        self._concept().save()
+        ScanReportConcept.objects.bulk_create(
+            [self._concept(), self._concept()], ignore_conflicts=True
+        )
+        self.assertEqual(ScanReportConcept.objects.count(), 1)
@@ -0,0 +1,71 @@
+import os
+from unittest.mock import MagicMock, patch
+
+from api.middleware import ProfilingMiddleware
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+
+
+class TestProfilingMiddleware(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.get_response = MagicMock(return_value=HttpResponse("OK"))
+
+    @patch.dict(os.environ, {}, clear=True)
+    def test_not_used_unless_configured(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            ProfilingMiddleware(self.get_response)
+
+    @patch("api.middleware.save_profile", return_value="api/profile.prof")
+    def test_profiles_with_token(self, mock_save_profile):
+        with patch.dict(os.environ, {"PROFILING_TOKEN": "secret"}, clear=True):
+            middleware = ProfilingMiddleware(self.get_response)
+
+            response = middleware(self.factory.get("/api/scanreports/"))
+            self.assertNotIn("X-Profile-Id", response)
+            response = middleware(
+                self.factory.get("/api/scanreports/", HTTP_X_PROFILE="wrong")
+            )
+            self.assertNotIn("X-Profile-Id", response)
+            response = middleware(
+                self.factory.get("/api/scanreports/", HTTP_X_PROFILE="sécret")
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn("X-Profile-Id", response)
+            mock_save_profile.assert_not_called()
+
+            response = middleware(
+                self.factory.get(
+                    "/api/scanreports/",
+                    HTTP_X_PROFILE="secret",
+                    HTTP_X_REQUEST_ID="abc",
+                )
+            )
+
+        self.assertEqual(response["X-Profile-Id"], "api/profile.prof")
+        profile, source, identifier, extension = mock_save_profile.call_args.args
+        self.assertEqual(source, "api")
+        self.assertEqual(identifier, "abc-GET-/api/scanreports/")
+        self.assertEqual(extension, ".prof")
+        self.assertTrue(profile)
+
+    @patch("api.middleware.save_profile", return_value=None)
+    def test_profiles_when_enabled(self, mock_save_profile):
+        env = {"PROFILING_ENABLED": "true", "PROFILING_MODE": "sampling"}
+        with patch.dict(os.environ, env, clear=True):
+            middleware = ProfilingMiddleware(self.get_response)
+            response = middleware(self.factory.post("/api/scanreports/"))
+
+        self.assertEqual(response.content, b"OK")
+        self.assertNotIn("X-Profile-Id", response)
+        self.assertEqual(mock_save_profile.call_args.args[3], ".folded")
+
+    @patch("api.middleware.save_profile", return_value="api/profile.prof")
+    def test_saves_profile_of_failed_request(self, mock_save_profile):
+        self.get_response.side_effect = ValueError
+        with patch.dict(os.environ, {"PROFILING_ENABLED": "true"}, clear=True):
+            middleware = ProfilingMiddleware(self.get_response)
+            with self.assertRaises(ValueError):
+                middleware(self.factory.get("/api/scanreports/"))
+        mock_save_profile.assert_called_once()
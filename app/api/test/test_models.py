@@ -0,0 +1,121 @@
+from importlib import import_module
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from shared.mapping.models import (
+    DataPartner,
+    Dataset,
+    ScanReport,
+    ScanReportField,
+    ScanReportTable,
+    ScanReportValue,
+)
+
+backfill = import_module("shared.mapping.migrations.0011_backfill_scan_report")
+not_null = import_module("shared.mapping.migrations.0012_scan_report_not_null")
+
+
+class TestScanReportDenormalised(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        user = User.objects.create(username="frodo", password="mellon")
+        data_partner = DataPartner.objects.create(name="The Shire")
+        dataset = Dataset.objects.create(
+            name="Hobbiton", visibility="PUBLIC", data_partner=data_partner
+        )
+        self.scan_report = ScanReport.objects.create(
+            author=user, name="Red Book", dataset="Red Book", parent_dataset=dataset
+        )
+        self.table = ScanReportTable.objects.create(
+            scan_report=self.scan_report, name="Hobbits"
+        )
+
+    def _field(self, **kwargs):
+        return ScanReportField(
+            scan_report_table=self.table,
+            name="height",
+            description_column="",
+            type_column="INT",
+            max_length=10,
+            nrows=-1,
+            nrows_checked=-1,
+            fraction_empty=-1,
+            nunique_values=-1,
+            fraction_unique=-1,
+            **kwargs,
+        )
+
+    def test_save_sets_scan_report(self):
+        field = self._field()
+        field.save()
+        value = ScanReportValue.objects.create(
+            scan_report_field=field, value="short", frequency=1
+        )
+
+        self.assertEqual(field.scan_report_id, self.scan_report.id)
+        self.assertEqual(value.scan_report_id, self.scan_report.id)
+        self.assertEqual(
+            ScanReportValue.objects.filter(scan_report=self.scan_report).count(), 1
+        )
+
+    def test_save_takes_scan_report_from_loaded_parent(self):
+        field = self._field()
+        field.save()
+
+        with self.assertNumQueries(1):
+            ScanReportValue.objects.create(
+                scan_report_field=field, value="short", frequency=1
+            )
+        # Without the field loaded, the scan report already set is kept
+        value = ScanReportValue.objects.get()
+        with self.assertNumQueries(1):
+            value.save()
+        self.assertEqual(value.scan_report_id, self.scan_report.id)
+
+    def _without_scan_reports(self):
+        # Rows inserted in bulk before the column existed have no scan report
+        with connection.cursor() as cursor:
+            for table in ["mapping_scanreportfield", "mapping_scanreportvalue"]:
+                cursor.execute(
+                    f"ALTER TABLE {table} ALTER COLUMN scan_report_id DROP NOT NULL"
+                )
+        field = self._field()
+        field.save()
+        ScanReportValue.objects.bulk_create(
+            ScanReportValue(
+                scan_report_field=field,
+                scan_report_id=self.scan_report.id,
+                value=str(i),
+                frequency=i,
+            )
+            for i in range(3)
+        )
+        ScanReportField.objects.update(scan_report=None)
+        ScanReportValue.objects.update(scan_report=None)
+        return field
+
+    def _assert_backfilled(self, field):
+        field.refresh_from_db()
+        self.assertEqual(field.scan_report_id, self.scan_report.id)
+        self.assertEqual(
+            set(ScanReportValue.objects.values_list("scan_report_id", flat=True)),
+            {self.scan_report.id},
+        )
+
+    def test_backfill(self):
+        field = self._without_scan_reports()
+
+        with connection.schema_editor() as schema_editor:
+            backfill.backfill_scan_report(apps, schema_editor)
+
+        self._assert_backfilled(field)
+
+    def test_backfill_remaining(self):
+        field = self._without_scan_reports()
+
+        with connection.schema_editor() as schema_editor:
+            not_null.backfill_remaining(apps, schema_editor)
+
+        self._assert_backfilled(field)
@@ -12,6 +12,9 @@ from shared.mapping.models import (
     Dataset,
     Project,
     ScanReport,
+    ScanReportField,
+    ScanReportTable,
+    ScanReportValue,
     VisibilityChoices,
 )
 from shared.mapping.permissions import (
@@ -19,9 +22,11 @@ from shared.mapping.permissions import (
     CanEdit,
     CanView,
     CanViewProject,
+    can_edit,
     has_editorship,
     has_viewership,
     is_admin,
+    is_scan_report_author,
 )
 
 
@@ -755,3 +760,83 @@ class TestCanAdmin(TestCase):
                 self.request, self.view, self.scan_report
             )
         )
+
+
+class TestScanReportAccessCache(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.author = User.objects.create(username="frodo", password="baggins")
+        self.viewer = User.objects.create(username="pippin", password="took")
+
+        self.project = Project.objects.create(name="The Return of the King")
+        self.project.members.add(self.author, self.viewer)
+        self.data_partner = DataPartner.objects.create(name="Hobbits")
+        self.dataset = Dataset.objects.create(
+            name="The Shire",
+            visibility=VisibilityChoices.PUBLIC,
+            data_partner=self.data_partner,
+        )
+        self.project.datasets.add(self.dataset)
+
+        self.scan_report = ScanReport.objects.create(
+            dataset="Bag End",
+            visibility=VisibilityChoices.RESTRICTED,
+            parent_dataset=self.dataset,
+            author=self.author,
+        )
+        self.scan_report.viewers.add(self.viewer)
+        self.table = ScanReportTable.objects.create(
+            scan_report=self.scan_report, name="Pantry"
+        )
+        self.field = ScanReportField.objects.create(
+            scan_report_table=self.table,
+            name="Mushrooms",
+            description_column="",
+            type_column="VARCHAR",
+            max_length=10,
+            nrows=-1,
+            nrows_checked=10,
+            fraction_empty=0.0,
+            nunique_values=10,
+            fraction_unique=1.0,
+        )
+        self.value = ScanReportValue.objects.create(
+            scan_report_field=self.field, value="Farmer Maggot", frequency=1
+        )
+
+        self.request = APIRequestFactory().get("/bag/end")
+
+    def test_checks_share_one_query(self):
+        self.request.user = self.author
+        with self.assertNumQueries(1):
+            self.assertTrue(has_viewership(self.scan_report, self.request))
+            self.assertFalse(has_editorship(self.scan_report, self.request))
+            self.assertTrue(is_admin(self.scan_report, self.request))
+            self.assertTrue(is_scan_report_author(self.scan_report, self.request))
+            self.assertTrue(has_viewership(self.table, self.request))
+
+    def test_cached_across_requests(self):
+        self.assertTrue(can_edit(self.scan_report, self.author))
+        with self.assertNumQueries(0):
+            self.assertTrue(can_edit(self.scan_report, self.author))
+
+    def test_related_objects(self):
+        self.request.user = self.viewer
+        self.assertTrue(has_viewership(self.table, self.request))
+        self.assertTrue(has_viewership(self.field, self.request))
+        self.assertTrue(has_viewership(self.value, self.request))
+        self.assertFalse(is_admin(self.value, self.request))
+        self.assertFalse(is_scan_report_author(self.value, self.request))
+
+    def test_membership_change_invalidates(self):
+        self.request.user = self.viewer
+        self.assertTrue(has_viewership(self.scan_report, self.request))
+
+        self.scan_report.viewers.remove(self.viewer)
+        self.assertFalse(has_viewership(self.scan_report, self.request))
+
+        self.dataset.editors.add(self.viewer)
+        self.assertTrue(has_editorship(self.scan_report, self.request))
+
+        self.project.members.remove(self.viewer)
+        self.assertFalse(has_editorship(self.scan_report, self.request))
@@ -0,0 +1,134 @@
+import base64
+import json
+import os
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from shared.mapping.models import (
+    DataDictionary,
+    DataPartner,
+    Dataset,
+    ScanReport,
+    UploadStatus,
+)
+from shared.services.azurequeue import SQLiteQueueTransport
+
+
+class TestRequeueUploads(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create(username="frodo", password="mellon")
+        data_partner = DataPartner.objects.create(name="The Shire")
+        dataset = Dataset.objects.create(
+            name="Hobbiton", visibility="PUBLIC", data_partner=data_partner
+        )
+        self.scan_reports = {
+            status: ScanReport.objects.create(
+                author=user,
+                name=f"{status.lower()}.xlsx",
+                dataset=status,
+                parent_dataset=dataset,
+                upload_status=UploadStatus.objects.get(value=status),
+            )
+            for status in ["FAILED", "IN_PROGRESS", "COMPLETE"]
+        }
+        self.scan_reports["FAILED"].data_dictionary = DataDictionary.objects.create(
+            name="dictionary.csv"
+        )
+        self.scan_reports["FAILED"].save()
+
+    def _requeue(self, **options):
+        out = StringIO()
+        env = {"LOCAL_QUEUE_PATH": ":memory:", "WORKERS_UPLOAD_NAME": "uploads-test"}
+        with patch.dict(os.environ, env):
+            call_command("requeue_uploads", stdout=out, **options)
+        messages = SQLiteQueueTransport.get(":memory:").receive("uploads-test", 100)
+        return out.getvalue(), [json.loads(m.get_body()) for m in messages]
+
+    def test_requeues_by_status(self):
+        out, messages = self._requeue(status=["FAILED", "IN_PROGRESS"])
+
+        self.assertIn("Requeued 2 upload(s)", out)
+        failed, in_progress = (
+            self.scan_reports["FAILED"],
+            self.scan_reports["IN_PROGRESS"],
+        )
+        self.assertEqual(
+            messages,
+            [
+                {
+                    "scan_report_id": failed.id,
+                    "scan_report_blob": "failed.xlsx",
+                    "data_dictionary_blob": "dictionary.csv",
+                },
+                {
+                    "scan_report_id": in_progress.id,
+                    "scan_report_blob": "in_progress.xlsx",
+                    "data_dictionary_blob": "None",
+                },
+            ],
+        )
+        # Both are checked again by the worker
+        self.assertEqual(
+            set(
+                ScanReport.objects.filter(upload_status__value="PENDING").values_list(
+                    "id", flat=True
+                )
+            ),
+            {failed.id, in_progress.id},
+        )
+
+    def test_requeues_by_id(self):
+        failed, complete = self.scan_reports["FAILED"], self.scan_reports["COMPLETE"]
+        out, messages = self._requeue(report_id=[failed.id, complete.id])
+        self.assertEqual([m["scan_report_id"] for m in messages], [failed.id])
+        self.assertIn(f"Skipped {complete.id}", out)
+
+        _, messages = self._requeue(report_id=[complete.id], force=True)
+        self.assertEqual([m["scan_report_id"] for m in messages], [complete.id])
+
+    def test_restores_status_if_not_sent(self):
+        failed, in_progress = (
+            self.scan_reports["FAILED"],
+            self.scan_reports["IN_PROGRESS"],
+        )
+        send = SQLiteQueueTransport.send
+
+        def flaky_send(transport, queue_name, message):
+            if json.loads(base64.b64decode(message))["scan_report_id"] == failed.id:
+                raise ConnectionError("Connection reset")
+            send(transport, queue_name, message)
+
+        with patch.object(SQLiteQueueTransport, "send", flaky_send):
+            with self.assertRaisesMessage(CommandError, f"not requeue {failed.id}"):
+                self._requeue(status=["FAILED", "IN_PROGRESS"])
+
+        messages = SQLiteQueueTransport.get(":memory:").receive("uploads-test", 100)
+        self.assertEqual(
+            [json.loads(m.get_body())["scan_report_id"] for m in messages],
+            [in_progress.id],
+        )
+        self.assertEqual(
+            dict(
+                ScanReport.objects.filter(
+                    id__in=[failed.id, in_progress.id]
+                ).values_list("id", "upload_status__value")
+            ),
+            {failed.id: "FAILED", in_progress.id: "PENDING"},
+        )
+
+    def test_skips_scan_reports_being_deleted(self):
+        ScanReport.objects.filter(id=self.scan_reports["FAILED"].id).update(
+            deleting=True
+        )
+        _, messages = self._requeue(status=["FAILED", "IN_PROGRESS"])
+        self.assertEqual(
+            [m["scan_report_id"] for m in messages],
+            [self.scan_reports["IN_PROGRESS"].id],
+        )
+
+    def test_requires_a_selection(self):
+        with self.assertRaises(CommandError):
+            self._requeue()
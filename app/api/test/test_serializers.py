@@ -1,7 +1,12 @@
-from api.serializers import ScanReportEditSerializer
+from io import BytesIO
+
+import openpyxl
+from api.serializers import ScanReportEditSerializer, ScanReportFilesSerializer
 from datasets.serializers import DatasetEditSerializer
 from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
+from rest_framework.exceptions import ParseError
 from rest_framework.serializers import ValidationError
 from rest_framework.test import APIRequestFactory
 from shared.mapping.models import (
@@ -370,3 +375,75 @@ class TestDatasetEditSerializer(TestCase):
         # check admin can alter admins
         request.user = self.admin_user
         self.assertEqual(serializer.validate_admins(new_admin), new_admin)
+
+
+class TestScanReportFilesSerializer(TestCase):
+    headers = [
+        "Table",
+        "Field",
+        "Description",
+        "Type",
+        "Max length",
+        "N rows",
+        "N rows checked",
+        "Fraction empty",
+        "N unique values",
+        "Fraction unique",
+    ]
+
+    def make_scan_report(self, field_overview, sheets) -> SimpleUploadedFile:
+        wb = openpyxl.Workbook()
+        fo_ws = wb.active
+        fo_ws.title = "Field Overview"
+        fo_ws.append(self.headers)
+        for row in field_overview:
+            fo_ws.append(row or [None])
+        for name, fields in sheets.items():
+            ws = wb.create_sheet(name)
+            ws.append([col for field in fields for col in [field, "Frequency"]])
+            ws.append([col for field in fields for col in ["a", 1]])
+        file = BytesIO()
+        wb.save(file)
+        return SimpleUploadedFile("scan_report.xlsx", file.getvalue())
+
+    def validate(self, field_overview, sheets):
+        serializer = ScanReportFilesSerializer()
+        file = self.make_scan_report(field_overview, sheets)
+        result = serializer.validate_scan_report_file(file)
+        self.assertEqual(file.tell(), 0)
+        return serializer, result
+
+    def test_valid(self):
+        serializer, _ = self.validate(
+            [["Mordor", "orcs"], ["Mordor", "trolls"], [], ["Shire", "hobbits"], []],
+            {"Mordor": ["orcs", "trolls"], "Shire": ["hobbits"]},
+        )
+        self.assertEqual(
+            list(serializer.check_timings),
+            ["headers", "field_overview", "sheet_names", "table_fields"],
+        )
+
+    def test_headers(self):
+        with self.assertRaises(ParseError):
+            self.validate([["Name"]], {})
+
+    def test_table_separation(self):
+        with self.assertRaisesMessage(ParseError, "not correctly separated"):
+            self.validate(
+                [["Mordor", "orcs"], ["Shire", "hobbits"], []],
+                {"Mordor": ["orcs"], "Shire": ["hobbits"]},
+            )
+
+    def test_sheet_names(self):
+        with self.assertRaisesMessage(ParseError, "{'Rohan'} are sheets"):
+            self.validate(
+                [["Mordor", "orcs"], []], {"Mordor": ["orcs"], "Rohan": ["horses"]}
+            )
+
+    def test_table_fields(self):
+        with self.assertRaisesMessage(ParseError, "more than one field"):
+            self.validate(
+                [["Mordor", "orcs"], ["Mordor", "orcs"], []], {"Mordor": ["orcs"]}
+            )
+        with self.assertRaisesMessage(ParseError, "{'trolls'} exist in the"):
+            self.validate([["Mordor", "orcs"], []], {"Mordor": ["orcs", "trolls"]})
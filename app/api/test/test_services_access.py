@@ -0,0 +1,151 @@
+from importlib import import_module
+
+from api.filters import ScanReportAccessFilter
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory
+from shared.mapping.models import (
+    DataPartner,
+    Dataset,
+    Project,
+    ScanReport,
+    ScanReportAccess,
+    ScanReportPermission,
+    ScanReportTable,
+    VisibilityChoices,
+)
+from shared.mapping.permissions import (
+    get_user_permissions_on_scan_report,
+    has_viewership,
+)
+from shared.services.access import refresh_scan_report_access
+
+
+class TestScanReportAccess(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.users = [
+            User.objects.create(username=name, password="mellon")
+            for name in ["aragorn", "legolas", "gimli", "boromir", "faramir"]
+        ]
+        self.aragorn, self.legolas, self.gimli, self.boromir, self.faramir = self.users
+
+        self.project = Project.objects.create(name="The Fellowship")
+        self.project.members.add(self.aragorn, self.legolas, self.gimli, self.boromir)
+        self.data_partner = DataPartner.objects.create(name="Gondor")
+
+        self.public_dataset = Dataset.objects.create(
+            name="Minas Tirith",
+            visibility=VisibilityChoices.PUBLIC,
+            data_partner=self.data_partner,
+        )
+        self.restricted_dataset = Dataset.objects.create(
+            name="Osgiliath",
+            visibility=VisibilityChoices.RESTRICTED,
+            data_partner=self.data_partner,
+        )
+        self.restricted_dataset.viewers.add(self.legolas)
+        self.restricted_dataset.admins.add(self.gimli)
+        self.project.datasets.add(self.public_dataset, self.restricted_dataset)
+
+        self.scan_reports = []
+        for dataset in [self.public_dataset, self.restricted_dataset]:
+            for visibility in VisibilityChoices.values:
+                self.scan_reports.append(
+                    ScanReport.objects.create(
+                        dataset=f"{dataset.name} {visibility}",
+                        visibility=visibility,
+                        parent_dataset=dataset,
+                        author=self.boromir,
+                    )
+                )
+        self.scan_reports[1].viewers.add(self.aragorn)
+        self.scan_reports[3].editors.add(self.legolas, self.faramir)
+
+        self.factory = APIRequestFactory()
+
+    def assertMatchesPermissions(self):
+        """
+        Assert the access rows and filter agree with the permission checks for
+        every user and scan report.
+        """
+        for user in self.users:
+            request = self.factory.get("/")
+            request.user = user
+            filtered = set(
+                ScanReportAccessFilter()
+                .filter_queryset(request, ScanReport.objects.all(), None)
+                .values_list("id", flat=True)
+            )
+            for scan_report in self.scan_reports:
+                request = self.factory.get("/")
+                request.user = user
+                self.assertEqual(
+                    scan_report.id in filtered, has_viewership(scan_report, request)
+                )
+                self.assertCountEqual(
+                    ScanReportAccess.objects.filter(
+                        user=user, scan_report=scan_report
+                    ).values_list("role", flat=True),
+                    get_user_permissions_on_scan_report(request, scan_report.id),
+                )
+
+    def test_matches_permissions(self):
+        self.assertMatchesPermissions()
+
+    def test_rebuild_matches_signals(self):
+        rows = set(ScanReportAccess.objects.values_list("user", "scan_report", "role"))
+        refresh_scan_report_access()
+        self.assertEqual(
+            rows,
+            set(ScanReportAccess.objects.values_list("user", "scan_report", "role")),
+        )
+
+    def test_migration_backfill_matches_service(self):
+        migration = import_module("shared.mapping.migrations.0006_scanreportaccess")
+        rows = set(ScanReportAccess.objects.values_list("user", "scan_report", "role"))
+        ScanReportAccess.objects.all().delete()
+        migration.build_access_forwards(apps, None)
+        self.assertEqual(
+            rows,
+            set(ScanReportAccess.objects.values_list("user", "scan_report", "role")),
+        )
+
+    def test_membership_changes(self):
+        self.scan_reports[1].viewers.remove(self.aragorn)
+        self.restricted_dataset.viewers.clear()
+        self.gimli.dataset_admins.remove(self.restricted_dataset)
+        self.faramir.projects.add(self.project)
+        self.project.datasets.remove(self.public_dataset)
+        self.assertMatchesPermissions()
+
+        self.restricted_dataset.visibility = VisibilityChoices.PUBLIC
+        self.restricted_dataset.save()
+        self.scan_reports[3].author = self.aragorn
+        self.scan_reports[3].save()
+        self.assertMatchesPermissions()
+
+        self.project.delete()
+        self.assertFalse(
+            ScanReportAccess.objects.filter(role=ScanReportPermission.CAN_VIEW).exists()
+        )
+
+    def test_filters_related_objects(self):
+        table = ScanReportTable.objects.create(
+            scan_report=self.scan_reports[1], name="Rohan"
+        )
+        request = self.factory.get("/")
+        request.user = self.aragorn
+        self.assertQuerySetEqual(
+            ScanReportAccessFilter().filter_queryset(
+                request, ScanReportTable.objects.all(), None
+            ),
+            [table],
+        )
+        request.user = self.faramir
+        self.assertFalse(
+            ScanReportAccessFilter()
+            .filter_queryset(request, ScanReportTable.objects.all(), None)
+            .exists()
+        )
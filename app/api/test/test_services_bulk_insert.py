@@ -0,0 +1,137 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from shared.mapping.models import (
+    DataPartner,
+    Dataset,
+    ScanReport,
+    ScanReportField,
+    ScanReportTable,
+    ScanReportValue,
+)
+from shared.services.bulk_insert import bulk_insert
+
+
+class TestBulkInsert(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        user = User.objects.create(username="frodo", password="mellon")
+        data_partner = DataPartner.objects.create(name="The Shire")
+        dataset = Dataset.objects.create(
+            name="Hobbiton", visibility="PUBLIC", data_partner=data_partner
+        )
+        scan_report = ScanReport.objects.create(
+            author=user, name="Red Book", dataset="Red Book", parent_dataset=dataset
+        )
+        self.table = ScanReportTable.objects.create(
+            scan_report=scan_report, name="Hobbits"
+        )
+
+    def _fields(self, names):
+        return [
+            ScanReportField(
+                scan_report_table=self.table,
+                scan_report_id=self.table.scan_report_id,
+                name=name,
+                description_column="",
+                type_column="VARCHAR",
+                max_length=10,
+                nrows=-1,
+                nrows_checked=10,
+                fraction_empty=0.25,
+                nunique_values=10,
+                fraction_unique=1.0,
+            )
+            for name in names
+        ]
+
+    def _insert_fields_and_values(self):
+        fields = bulk_insert(ScanReportField, self._fields(["name", "age"]))
+        values = bulk_insert(
+            ScanReportValue,
+            [
+                ScanReportValue(
+                    scan_report_field=fields[0],
+                    scan_report_id=fields[0].scan_report_id,
+                    value="Baggins\tof\nBag End \\ \\N",
+                    frequency=2,
+                    value_description=None,
+                ),
+                ScanReportValue(
+                    scan_report_field=fields[0],
+                    scan_report_id=fields[0].scan_report_id,
+                    value="",
+                    frequency=0,
+                    value_description="Ünknown",
+                ),
+                ScanReportValue(
+                    scan_report_field=fields[1],
+                    scan_report_id=fields[1].scan_report_id,
+                    value="111",
+                    frequency=1,
+                ),
+            ],
+        )
+        return fields, values
+
+    def _assert_inserted(self, fields, values):
+        self.assertTrue(all(field.pk for field in fields))
+        self.assertEqual(
+            list(
+                ScanReportValue.objects.order_by("id").values_list(
+                    "id",
+                    "scan_report_field_id",
+                    "value",
+                    "frequency",
+                    "value_description",
+                    "conceptID",
+                )
+            ),
+            [
+                (
+                    values[0].pk,
+                    fields[0].pk,
+                    "Baggins\tof\nBag End \\ \\N",
+                    2,
+                    None,
+                    -1,
+                ),
+                (values[1].pk, fields[0].pk, "", 0, "Ünknown", -1),
+                (values[2].pk, fields[1].pk, "111", 1, None, -1),
+            ],
+        )
+        field = ScanReportField.objects.get(pk=fields[0].pk)
+        self.assertEqual(str(field.fraction_empty), "0.25")
+        self.assertTrue(field.pass_from_source)
+        self.assertIsNotNone(field.created_at)
+
+    def test_copy(self):
+        self.assertEqual(connection.vendor, "postgresql")
+        fields, values = self._insert_fields_and_values()
+        self._assert_inserted(fields, values)
+
+        # The sequence was advanced past the reserved keys
+        field = self._fields(["extra"])[0]
+        field.save()
+        self.assertGreater(field.pk, max(f.pk for f in fields))
+
+    def test_copy_in_batches(self):
+        fields = bulk_insert(
+            ScanReportField, self._fields([str(i) for i in range(5)]), batch_size=2
+        )
+
+        self.assertEqual(
+            list(ScanReportField.objects.order_by("id").values_list("id", "name")),
+            [(field.pk, field.name) for field in fields],
+        )
+
+    def test_bulk_create_fallback(self):
+        with patch.object(connection, "vendor", "sqlite"):
+            fields, values = self._insert_fields_and_values()
+
+        self._assert_inserted(fields, values)
+
+    def test_empty(self):
+        self.assertEqual(bulk_insert(ScanReportValue, []), [])
@@ -0,0 +1,138 @@
+import json
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+from shared.data.models import Concept, ConceptRelationship
+from shared.services.concept_lookup import find_standard_concepts, lookup_concepts
+
+
+def _concept(concept_id, name, vocabulary="SNOMED", code=None, standard="S"):
+    return Concept.objects.create(
+        concept_id=concept_id,
+        concept_name=name,
+        domain_id="Condition",
+        vocabulary_id=vocabulary,
+        concept_class_id="Clinical Finding",
+        standard_concept=standard,
+        concept_code=code or str(concept_id),
+        valid_start_date=date(1970, 1, 1),
+        valid_end_date=date(2099, 12, 31),
+    )
+
+
+def _maps_to(source, target):
+    ConceptRelationship.objects.create(
+        concept_id_1=source,
+        concept_id_2=target,
+        relationship_id="Maps to",
+        valid_start_date=date(1970, 1, 1),
+        valid_end_date=date(2099, 12, 31),
+    )
+
+
+class TestConceptLookup(TestCase):
+    def setUp(self):
+        _concept(254761, "Cough", code="49727002")
+        _concept(45534422, "Cough", vocabulary="ICD10CM", code="R05", standard=None)
+        _concept(44829331, "Cough", vocabulary="ICD9CM", code="786.2", standard=None)
+        _concept(35207061, "Dyspnea", vocabulary="ICD10CM", code="R06.0", standard=None)
+        _concept(4011630, "Cough medicine", standard=None)
+        _maps_to(45534422, 254761)
+        # Maps to a concept that is not standard
+        _maps_to(44829331, 4011630)
+        # Maps to itself
+        _maps_to(254761, 254761)
+
+    def test_find_standard_concepts(self):
+        self.assertEqual(
+            find_standard_concepts([45534422, 44829331, 254761, 1]),
+            {45534422: [254761]},
+        )
+        self.assertEqual(find_standard_concepts([]), {})
+
+    def test_looks_up_ids_and_codes_in_batches(self):
+        # Per batch: the concepts, then "Maps to" for those that are not standard
+        with self.assertNumQueries(8):
+            results = list(
+                lookup_concepts(
+                    [45534422, 254761, 1, 254761],
+                    [("ICD9CM", "786.2"), ("ICD10CM", "R06.0"), ("ICD10CM", "R99")],
+                    batch_size=2,
+                )
+            )
+
+        self.assertEqual(
+            [
+                (r.get("concept_id"), r.get("standard_concept_ids"), r.get("missing"))
+                for r in results
+            ],
+            [
+                (45534422, [254761], None),
+                (254761, [254761], None),
+                (1, None, True),
+                (44829331, [], None),
+                (35207061, [], None),
+                (None, None, True),
+            ],
+        )
+        self.assertEqual(results[0]["vocabulary_id"], "ICD10CM")
+        self.assertEqual(results[0]["concept_code"], "R05")
+        self.assertEqual(
+            results[-1],
+            {"vocabulary_id": "ICD10CM", "concept_code": "R99", "missing": True},
+        )
+
+
+class TestConceptLookupView(TestCase):
+    def setUp(self):
+        _concept(254761, "Cough", code="49727002")
+        _concept(45534422, "Cough", vocabulary="ICD10CM", code="R05", standard=None)
+        _maps_to(45534422, 254761)
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create(username="frodo", password="mellon")
+        )
+        self.body = {"concept_ids": [254761, 1], "codes": [["ICD10CM", "R05"]]}
+
+    def test_json(self):
+        response = self.client.post(
+            "/api/v2/omop/concepts/lookup/", self.body, format="json"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual([r["concept_id"] for r in results], [254761, 1, 45534422])
+        self.assertEqual(results[1]["missing"], True)
+        self.assertEqual(results[2]["standard_concept_ids"], [254761])
+
+    def test_ndjson(self):
+        response = self.client.post(
+            "/api/v2/omop/concepts/lookup/",
+            self.body,
+            format="json",
+            HTTP_ACCEPT="application/x-ndjson",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(
+            [json.loads(line).get("concept_id") for line in lines],
+            [254761, 1, 45534422],
+        )
+
+    def test_invalid(self):
+        url = "/api/v2/omop/concepts/lookup/"
+        self.assertEqual(self.client.post(url, {}, format="json").status_code, 400)
+        self.assertEqual(
+            self.client.post(url, {"codes": [["ICD10CM"]]}, format="json").status_code,
+            400,
+        )
+        response = self.client.post(
+            url, {"concept_ids": list(range(10001))}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("At most 10000", str(response.json()))
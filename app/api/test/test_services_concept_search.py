@@ -0,0 +1,143 @@
+from datetime import date
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+from shared.data.models import Concept, ConceptSynonym
+from shared.services.concept_search import (
+    concept_facets,
+    search_concepts,
+    search_query,
+)
+
+
+def _concept(concept_id, name, domain="Condition", vocabulary="SNOMED", standard="S"):
+    return Concept.objects.create(
+        concept_id=concept_id,
+        concept_name=name,
+        domain_id=domain,
+        vocabulary_id=vocabulary,
+        concept_class_id="Clinical Finding",
+        standard_concept=standard,
+        concept_code=str(concept_id),
+        valid_start_date=date(1970, 1, 1),
+        valid_end_date=date(2099, 12, 31),
+    )
+
+
+class TestConceptSearch(TestCase):
+    def setUp(self):
+        _concept(254761, "Cough")
+        _concept(4102774, "Productive cough")
+        _concept(4060224, "Productive cough -clear sputum")
+        _concept(45534422, "Cough", vocabulary="ICD10CM", standard=None)
+        _concept(4011630, "Cough medicine", domain="Drug", vocabulary="RxNorm")
+        _concept(312437, "Dyspnea")
+        ConceptSynonym.objects.create(
+            concept_id=312437,
+            concept_synonym_name="Shortness of breath",
+            language_concept_id=4180186,
+        )
+
+    def _ids(self, text, **kwargs):
+        return [c.concept_id for c in search_concepts(text, **kwargs)]
+
+    def test_search_query(self):
+        self.assertIsNone(search_query("  -- "))
+        self.assertIsNotNone(search_query("o'brien"))
+
+    def test_ranks_shorter_names_first(self):
+        self.assertEqual(
+            self._ids("cough"),
+            [254761, 45534422, 4011630, 4102774, 4060224],
+        )
+
+    def test_matches_every_word_and_last_as_prefix(self):
+        self.assertEqual(self._ids("productive cou"), [4102774, 4060224])
+        self.assertEqual(self._ids("sputum productive"), [4060224])
+        self.assertEqual(self._ids("productive wheeze"), [])
+
+    def test_filters(self):
+        self.assertEqual(self._ids("cough", domains=["Drug"]), [4011630])
+        self.assertEqual(self._ids("cough", vocabularies=["ICD10CM"]), [45534422])
+        self.assertNotIn(45534422, self._ids("cough", standard_only=True))
+
+    def test_synonyms(self):
+        self.assertEqual(self._ids("shortness of breath"), [312437])
+        self.assertEqual(self._ids("shortness of breath", synonyms=False), [])
+
+    def test_facets_ignore_their_own_filter(self):
+        facets = concept_facets("cough", domains=["Condition"])
+        self.assertEqual(
+            facets["domain_id"],
+            [
+                {"value": "Condition", "count": 4},
+                {"value": "Drug", "count": 1},
+            ],
+        )
+        self.assertEqual(
+            facets["vocabulary_id"],
+            [
+                {"value": "SNOMED", "count": 3},
+                {"value": "ICD10CM", "count": 1},
+            ],
+        )
+
+    def test_view(self):
+        client = APIClient()
+        client.force_authenticate(
+            get_user_model().objects.create(username="frodo", password="mellon")
+        )
+
+        response = client.get(
+            "/api/v2/omop/concepts/search/", {"q": "cough", "standard": "true"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 4)
+        self.assertEqual(response.data["results"][0]["concept_name"], "Cough")
+        self.assertEqual(response.data["results"][0]["standard_concept"], "S")
+        self.assertEqual(
+            response.data["facets"]["vocabulary_id"],
+            [{"value": "SNOMED", "count": 3}, {"value": "RxNorm", "count": 1}],
+        )
+
+        response = client.get("/api/v2/omop/concepts/search/")
+        self.assertEqual(response.status_code, 400)
+
+
+class TestConceptSearchIndex(TransactionTestCase):
+    # Indexes are built concurrently, outside of a transaction. Keep the seeded
+    # rows the flush after this test would remove.
+    serialized_rollback = True
+
+    def _plan(self, text, synonyms=False):
+        sql, params = search_concepts(text, synonyms=synonyms).query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute("SET enable_seqscan = off")
+            cursor.execute(f"EXPLAIN {sql}", params)
+            plan = "\n".join(row for (row,) in cursor.fetchall())
+            cursor.execute("RESET enable_seqscan")
+        return plan
+
+    def test_creates_indexes_used_by_search(self):
+        out = StringIO()
+        call_command("concept_search_index", stdout=out)
+        try:
+            self.assertIn("Created concept_name_search_idx", out.getvalue())
+            self.assertIn("Created concept_synonym_name_search_idx", out.getvalue())
+            self.assertIn("concept_name_search_idx", self._plan("cough"))
+            # Matching by synonyms as well still only reads the indexes
+            plan = self._plan("cough", synonyms=True)
+            self.assertIn("concept_name_search_idx", plan)
+            self.assertIn("concept_synonym_name_search_idx", plan)
+
+            out = StringIO()
+            call_command("concept_search_index", stdout=out)
+            self.assertIn("concept_name_search_idx already exists", out.getvalue())
+        finally:
+            call_command("concept_search_index", drop=True, stdout=StringIO())
+        self.assertNotIn("concept_name_search_idx", self._plan("cough"))
@@ -0,0 +1,262 @@
+from datetime import date
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from shared.data.models import Concept
+from shared.jobs.models import Job, JobStage, StageStatus
+from shared.mapping.models import (
+    DataPartner,
+    Dataset,
+    MappingRule,
+    OmopField,
+    OmopTable,
+    Project,
+    ScanReport,
+    ScanReportConcept,
+    ScanReportField,
+    ScanReportTable,
+    ScanReportValue,
+)
+from shared.services.deletion import delete_scan_report
+
+
+class TestDeleteScanReport(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create(username="frodo", password="mellon")
+        data_partner = DataPartner.objects.create(name="The Shire")
+        self.dataset = Dataset.objects.create(
+            name="Hobbiton", visibility="PUBLIC", data_partner=data_partner
+        )
+        self.scan_report = self._scan_report("Red Book")
+        self.other = self._scan_report("Lost Tales")
+        self.concept = Concept.objects.create(
+            concept_id=8532,
+            concept_name="FEMALE",
+            domain_id="Gender",
+            vocabulary_id="Gender",
+            concept_class_id="Gender",
+            standard_concept="S",
+            concept_code="F",
+            valid_start_date=date(1970, 1, 1),
+            valid_end_date=date(2099, 12, 31),
+        )
+        omop_table = OmopTable.objects.create(table="person")
+        self.omop_field = OmopField.objects.create(
+            table=omop_table, field="gender_concept_id"
+        )
+        self.delete_stage = JobStage.objects.get(value="DELETE_SCAN_REPORT")
+        for scan_report in (self.scan_report, self.other):
+            self._populate(scan_report)
+
+    def _scan_report(self, name):
+        return ScanReport.objects.create(
+            author=self.user, name=name, dataset=name, parent_dataset=self.dataset
+        )
+
+    def _populate(self, scan_report):
+        table = ScanReportTable.objects.create(scan_report=scan_report, name="Hobbits")
+        field = ScanReportField.objects.create(
+            scan_report_table=table,
+            name="sex",
+            description_column="",
+            type_column="VARCHAR",
+            max_length=10,
+            nrows=-1,
+            nrows_checked=-1,
+            fraction_empty=-1,
+            nunique_values=-1,
+            fraction_unique=-1,
+        )
+        table.person_id = field
+        table.save()
+        values = [
+            ScanReportValue.objects.create(
+                scan_report_field=field, value=str(i), frequency=i
+            )
+            for i in range(5)
+        ]
+        for obj in (field, values[0]):
+            concept = ScanReportConcept.objects.create(
+                concept=self.concept,
+                content_type=ContentType.objects.get_for_model(obj),
+                object_id=obj.id,
+                creation_type="M",
+            )
+            MappingRule.objects.create(
+                scan_report=scan_report,
+                omop_field=self.omop_field,
+                source_table=table,
+                source_field=field,
+                concept=concept,
+            )
+        Job.objects.create(
+            scan_report=scan_report,
+            scan_report_table=table,
+            stage=JobStage.objects.get(value="BUILD_CONCEPTS_FROM_DICT"),
+        )
+
+    def test_deletes_scan_report_in_batches(self):
+        job = Job.objects.create(scan_report=self.scan_report, stage=self.delete_stage)
+        progress = []
+
+        counts = delete_scan_report(
+            self.scan_report.id,
+            batch_size=2,
+            on_progress=lambda name, total: progress.append((name, total)),
+        )
+
+        self.assertEqual(
+            counts,
+            {
+                "rules": 2,
+                "value concepts": 1,
+                "field concepts": 1,
+                "values": 5,
+                "table jobs": 1,
+                "fields": 1,
+                "tables": 1,
+                "scan reports": 1,
+            },
+        )
+        self.assertEqual(
+            [total for name, total in progress if name == "values"], [2, 4, 5]
+        )
+        self.assertFalse(ScanReport.objects.filter(id=self.scan_report.id).exists())
+        self.assertFalse(
+            ScanReportTable.objects.filter(scan_report=self.scan_report.id)
+        )
+        # The deletion job outlives the scan report
+        job.refresh_from_db()
+        self.assertIsNone(job.scan_report)
+
+        # The other scan report is untouched
+        self.assertEqual(
+            ScanReportValue.objects.filter(scan_report=self.other).count(), 5
+        )
+        self.assertEqual(MappingRule.objects.filter(scan_report=self.other).count(), 2)
+        self.assertEqual(ScanReportConcept.objects.count(), 2)
+
+    def test_deleting_again_does_nothing(self):
+        delete_scan_report(self.scan_report.id)
+        counts = delete_scan_report(self.scan_report.id)
+        self.assertFalse(any(counts.values()))
+
+
+class TestScanReportDeleteView(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create(username="frodo", password="mellon")
+        Token.objects.create(user=self.user)
+        data_partner = DataPartner.objects.create(name="The Shire")
+        dataset = Dataset.objects.create(
+            name="Hobbiton", visibility="PUBLIC", data_partner=data_partner
+        )
+        self.scan_report = ScanReport.objects.create(
+            author=self.user,
+            name="red-book.xlsx",
+            dataset="Red Book",
+            parent_dataset=dataset,
+        )
+        project = Project.objects.create(name="The Fellowship of the Ring")
+        project.members.add(self.user)
+        project.datasets.add(dataset)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    @patch("api.views.add_message")
+    def test_delete_is_queued(self, mock_add_message):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.delete(f"/api/v2/scanreports/{self.scan_report.id}/")
+
+        self.assertEqual(response.status_code, 202)
+        # Only sent once the job and the flag are committed
+        mock_add_message.assert_not_called()
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+        self.assertTrue(ScanReport.objects.filter(id=self.scan_report.id).exists())
+        queue, message = mock_add_message.call_args.args
+        self.assertEqual(queue, "deletereports-local")
+        self.assertEqual(
+            message,
+            {
+                "scan_report_id": self.scan_report.id,
+                "scan_report_blob": "red-book.xlsx",
+                "data_dictionary_blob": None,
+            },
+        )
+        job = Job.objects.get(scan_report=self.scan_report)
+        self.assertEqual(job.stage.value, "DELETE_SCAN_REPORT")
+        self.assertEqual(job.status, StageStatus.objects.get(value="IN_PROGRESS"))
+        self.assertTrue(ScanReport.objects.get(id=self.scan_report.id).deleting)
+
+    @patch("api.views.add_message")
+    def test_deleting_is_hidden(self, mock_add_message):
+        url = f"/api/v2/scanreports/{self.scan_report.id}/"
+        self.client.delete(url)
+
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(
+            self.client.patch(url, {"dataset": "Renamed"}).status_code, 404
+        )
+        self.assertEqual(self.client.get(f"{url}tables/").status_code, 404)
+        response = self.client.get("/api/v2/scanreports/")
+        self.assertEqual(response.data["count"], 0)
+
+    @patch("api.views.add_message")
+    def test_delete_again_is_queued_once(self, mock_add_message):
+        url = f"/api/v2/scanreports/{self.scan_report.id}/"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.delete(url).status_code, 202)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.delete(url).status_code, 202)
+
+        self.assertEqual(mock_add_message.call_count, 1)
+        self.assertEqual(Job.objects.filter(scan_report=self.scan_report).count(), 1)
+
+        # After a failed attempt, deleting again queues it again
+        Job.objects.update(status=StageStatus.objects.get(value="FAILED"))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.delete(url).status_code, 202)
+        self.assertEqual(mock_add_message.call_count, 2)
+
+    @patch("api.views.add_message")
+    def test_failed_if_not_queued(self, mock_add_message):
+        url = f"/api/v2/scanreports/{self.scan_report.id}/"
+        mock_add_message.side_effect = RuntimeError("Queue is down")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.delete(url).status_code, 202)
+
+        job = Job.objects.get(scan_report=self.scan_report)
+        self.assertEqual(job.status, StageStatus.objects.get(value="FAILED"))
+        self.assertTrue(ScanReport.objects.get(id=self.scan_report.id).deleting)
+
+        # So deleting again queues it again
+        mock_add_message.side_effect = None
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.delete(url).status_code, 202)
+        self.assertEqual(mock_add_message.call_count, 2)
+        self.assertEqual(
+            Job.objects.filter(
+                scan_report=self.scan_report, status__value="IN_PROGRESS"
+            ).count(),
+            1,
+        )
+
+    @patch("shared.files.views.add_message")
+    @patch("api.views.add_message")
+    def test_no_jobs_while_deleting(self, mock_add_message, mock_files_add_message):
+        self.client.delete(f"/api/v2/scanreports/{self.scan_report.id}/")
+
+        response = self.client.post(
+            f"/api/v2/scanreports/{self.scan_report.id}/rules/downloads/",
+            {"scan_report_id": self.scan_report.id, "file_type": "text/csv"},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 404)
+        mock_files_add_message.assert_not_called()
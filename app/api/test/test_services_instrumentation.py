@@ -0,0 +1,41 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from shared.mapping.models import DataPartner, Dataset, ScanReport, ScanReportTable
+from shared.services.instrumentation import measure_stage, record_stages
+from shared.services.rules import refresh_mapping_rules
+
+
+class TestMeasureStage(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        user = User.objects.create(username="frodo", password="mellon")
+        data_partner = DataPartner.objects.create(name="The Shire")
+        dataset = Dataset.objects.create(
+            name="Hobbiton", visibility="PUBLIC", data_partner=data_partner
+        )
+        scan_report = ScanReport.objects.create(
+            author=user, name="Red Book", dataset="Red Book", parent_dataset=dataset
+        )
+        self.table = ScanReportTable.objects.create(
+            scan_report=scan_report, name="Hobbits"
+        )
+
+    def test_counts_queries(self):
+        with measure_stage("count") as stage:
+            ScanReportTable.objects.count()
+            list(ScanReportTable.objects.all())
+
+        self.assertEqual(stage.queries, 2)
+        self.assertGreater(stage.query_seconds, 0)
+        self.assertGreaterEqual(stage.seconds, stage.query_seconds)
+
+    def test_refresh_mapping_rules_stages(self):
+        with record_stages() as stages:
+            refresh_mapping_rules(self.table.pk, None, None)
+
+        self.assertEqual(
+            [stage.name for stage in stages], ["find_concepts", "save_mapping_rules"]
+        )
+        self.assertEqual(stages[0].rows, {"concepts": 0})
+        self.assertGreater(stages[0].queries, 0)
+        self.assertEqual(stages[1].queries, 0)
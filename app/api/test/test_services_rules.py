@@ -19,6 +19,10 @@ from shared.mapping.models import (
     ScanReportTable,
     ScanReportValue,
 )
+from shared.services.rules_export import (
+    get_mapping_rules_list,
+    get_mapping_rules_rows,
+)
 
 
 class TestMisalignedMappings(TestCase):
@@ -265,3 +269,150 @@ class TestMisalignedMappings(TestCase):
             source_field=self.scan_report_field_desc,
             concept=self.scan_report_concept_cough_desc,
         )
+
+
+class TestMappingRulesRows(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create(username="frodo", password="ghjsdfkjhsdf")
+        self.data_partner = DataPartner.objects.create(name="Shire Partner")
+        self.dataset = Dataset.objects.create(
+            name="Shire Dataset", visibility="PUBLIC", data_partner=self.data_partner
+        )
+        self.scan_report = ScanReport.objects.create(
+            author=self.user,
+            name="Shire Scan Report",
+            dataset="Shire",
+            parent_dataset=self.dataset,
+        )
+        self.table = ScanReportTable.objects.create(
+            scan_report=self.scan_report, name="Hobbits"
+        )
+        self.field_sex = ScanReportField.objects.create(
+            scan_report_table=self.table,
+            name="Sex",
+            description_column="",
+            type_column="VARCHAR",
+            max_length=1,
+            nrows=-1,
+            nrows_checked=10,
+            fraction_empty=0.0,
+            nunique_values=2,
+            fraction_unique=0.2,
+        )
+        self.field_cough = ScanReportField.objects.create(
+            scan_report_table=self.table,
+            name="Cough",
+            description_column="",
+            type_column="INT",
+            max_length=1,
+            nrows=-1,
+            nrows_checked=10,
+            fraction_empty=0.0,
+            nunique_values=2,
+            fraction_unique=0.2,
+        )
+        self.value_female = ScanReportValue.objects.create(
+            value="F",
+            frequency=5,
+            value_description="",
+            scan_report_field=self.field_sex,
+        )
+        self.concept_female = Concept.objects.create(
+            concept_id=8532,
+            concept_name="FEMALE",
+            domain_id="Gender",
+            vocabulary_id="Gender",
+            concept_class_id="Gender",
+            standard_concept="S",
+            concept_code="F",
+            valid_start_date=date(1970, 1, 1),
+            valid_end_date=date(2099, 12, 31),
+        )
+        self.concept_cough = Concept.objects.create(
+            concept_id=254761,
+            concept_name="Cough",
+            domain_id="Condition",
+            vocabulary_id="SNOMED",
+            concept_class_id="Clinical Finding",
+            standard_concept="S",
+            concept_code="49727002",
+            valid_start_date=date(1970, 1, 1),
+            valid_end_date=date(2099, 12, 31),
+        )
+        self.omop_table = OmopTable.objects.create(table="person")
+        self.omop_concept_field = OmopField.objects.create(
+            table=self.omop_table, field="gender_concept_id"
+        )
+        self.omop_source_field = OmopField.objects.create(
+            table=self.omop_table, field="gender_source_value"
+        )
+        value_concept = ScanReportConcept.objects.create(
+            concept=self.concept_female,
+            content_type=ContentType.objects.get_for_model(ScanReportValue),
+            object_id=self.value_female.id,
+            creation_type="V",
+        )
+        field_concept = ScanReportConcept.objects.create(
+            concept=self.concept_cough,
+            content_type=ContentType.objects.get_for_model(ScanReportField),
+            object_id=self.field_cough.id,
+            creation_type="M",
+        )
+        for concept, field in [
+            (value_concept, self.field_sex),
+            (field_concept, self.field_cough),
+        ]:
+            for omop_field in [self.omop_concept_field, self.omop_source_field]:
+                MappingRule.objects.create(
+                    scan_report=self.scan_report,
+                    omop_field=omop_field,
+                    source_table=self.table,
+                    source_field=field,
+                    concept=concept,
+                )
+        self.rules = MappingRule.objects.filter(scan_report=self.scan_report).order_by(
+            "id"
+        )
+
+    def _legacy_representation(self, rules):
+        # The shape RulesListV2 used to build from `get_mapping_rules_list`.
+        for rule in rules:
+            rule["destination_table"] = {
+                "id": rule["destination_table"].id,
+                "name": rule["destination_table"].table,
+            }
+            rule["destination_field"] = {
+                "id": rule["destination_field"].id,
+                "name": rule["destination_field"].field,
+            }
+            rule["domain"] = {"name": rule["domain"]}
+            rule["source_table"] = {
+                "id": rule["source_table"].id,
+                "name": rule["source_table"].name,
+            }
+            rule["source_field"] = {
+                "id": rule["source_field"].id,
+                "name": rule["source_field"].name,
+            }
+        return rules
+
+    def test_rows_match_model_path(self):
+        expected = self._legacy_representation(get_mapping_rules_list(self.rules))
+
+        result = get_mapping_rules_rows(self.rules)
+
+        self.assertEqual(result, expected)
+        self.assertEqual(result[0]["term_mapping"], {"F": 8532})
+        self.assertEqual(result[2]["term_mapping"], 254761)
+        self.assertIsNone(result[3]["term_mapping"])
+
+    def test_rows_match_model_path_paginated(self):
+        expected = self._legacy_representation(
+            get_mapping_rules_list(self.rules, page_number=2, page_size=3)
+        )
+
+        result = get_mapping_rules_rows(self.rules, page_number=2, page_size=3)
+
+        self.assertEqual(len(result), 1)
+        self.assertEqual(result, expected)
@@ -1,14 +1,20 @@
 import os
-from datetime import date
+from datetime import date, datetime, timezone
+from io import BytesIO
 from unittest import mock
 
+import openpyxl
 import pytest
+from api.paginations import KeysetPagination, estimate_count
 from datasets.views import DatasetIndex
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase, TransactionTestCase
 from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+from shared.jobs.models import Job
 from shared.mapping.models import (
     Concept,
     DataPartner,
@@ -818,3 +824,345 @@ class TestScanReportActiveConceptFilterViewSet(TestCase):
         az_response_ids = [item["id"] for item in az_response.data]
         self.assertTrue(self.scanreportconcept2.id in az_response_ids)
         self.assertTrue(self.scanreportconcept4.id in az_response_ids)
+
+
+class TestScanReportValueListCache(TestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.viewer = User.objects.create(username="bilbo", password="baggins")
+        self.outsider = User.objects.create(username="gollum", password="precious")
+        self.project = Project.objects.create(name="The Hobbit")
+        self.project.members.add(self.viewer, self.outsider)
+        self.data_partner = DataPartner.objects.create(name="Dwarves")
+        self.dataset = Dataset.objects.create(
+            name="Erebor",
+            visibility=VisibilityChoices.PUBLIC,
+            data_partner=self.data_partner,
+        )
+        self.project.datasets.add(self.dataset)
+        self.scan_report = ScanReport.objects.create(
+            dataset="The Lonely Mountain",
+            visibility=VisibilityChoices.RESTRICTED,
+            parent_dataset=self.dataset,
+        )
+        self.scan_report.viewers.add(self.viewer)
+        self.table = ScanReportTable.objects.create(
+            scan_report=self.scan_report, name="Treasury"
+        )
+        self.field = ScanReportField.objects.create(
+            scan_report_table=self.table,
+            name="Gems",
+            description_column="",
+            type_column="VARCHAR",
+            max_length=10,
+            nrows=-1,
+            nrows_checked=10,
+            fraction_empty=0.0,
+            nunique_values=10,
+            fraction_unique=1.0,
+        )
+        ScanReportValue.objects.create(
+            scan_report_field=self.field, value="Arkenstone", frequency=1
+        )
+        self.url = (
+            f"/api/v2/scanreports/{self.scan_report.id}/tables/{self.table.id}"
+            f"/fields/{self.field.id}/values/"
+        )
+        self.client = APIClient()
+
+    def get_count(self, **params) -> int:
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data["count"]
+
+    def test_cached_until_written(self):
+        self.client.force_authenticate(self.viewer)
+        self.assertEqual(self.get_count(), 1)
+
+        # Bulk creates send no signals, so the cached response is served
+        ScanReportValue.objects.bulk_create(
+            [
+                ScanReportValue(
+                    scan_report_field=self.field,
+                    scan_report_id=self.field.scan_report_id,
+                    value="Mithril",
+                    frequency=1,
+                )
+            ]
+        )
+        self.assertEqual(self.get_count(), 1)
+        self.assertEqual(self.get_count(value__icontains="i"), 1)
+
+        # Saving a value invalidates every cached response for the scan report
+        ScanReportValue.objects.create(
+            scan_report_field=self.field, value="Gold", frequency=1
+        )
+        self.assertEqual(self.get_count(), 3)
+
+    def test_cached_per_field(self):
+        other = ScanReportField.objects.create(
+            scan_report_table=self.table,
+            name="Coins",
+            description_column="",
+            type_column="VARCHAR",
+            max_length=10,
+            nrows=-1,
+            nrows_checked=10,
+            fraction_empty=0.0,
+            nunique_values=10,
+            fraction_unique=1.0,
+        )
+        self.client.force_authenticate(self.viewer)
+        self.assertEqual(self.get_count(), 1)
+
+        # Nothing is written in between, so only the key tells the fields apart
+        self.url = self.url.replace(f"/fields/{self.field.id}/", f"/fields/{other.id}/")
+        self.assertEqual(self.get_count(), 0)
+
+    def test_permissions_checked_before_cache(self):
+        self.client.force_authenticate(self.viewer)
+        self.assertEqual(self.get_count(), 1)
+
+        self.client.force_authenticate(self.outsider)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 403)
+
+
+class TestKeysetPagination(TestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.user = User.objects.create(username="thorin", password="oakenshield")
+        self.project = Project.objects.create(name="The Hobbit")
+        self.project.members.add(self.user)
+        self.data_partner = DataPartner.objects.create(name="Dwarves")
+        self.dataset = Dataset.objects.create(
+            name="Erebor",
+            visibility=VisibilityChoices.PUBLIC,
+            data_partner=self.data_partner,
+        )
+        self.project.datasets.add(self.dataset)
+        self.scan_report = ScanReport.objects.create(
+            dataset="The Lonely Mountain",
+            visibility=VisibilityChoices.PUBLIC,
+            parent_dataset=self.dataset,
+        )
+        self.table = ScanReportTable.objects.create(
+            scan_report=self.scan_report, name="Treasury"
+        )
+        self.field = ScanReportField.objects.create(
+            scan_report_table=self.table,
+            name="Coins",
+            description_column="",
+            type_column="INT",
+            max_length=10,
+            nrows=-1,
+            nrows_checked=10,
+            fraction_empty=0.0,
+            nunique_values=25,
+            fraction_unique=1.0,
+        )
+        self.values = ScanReportValue.objects.bulk_create(
+            ScanReportValue(
+                scan_report_field=self.field,
+                scan_report_id=self.field.scan_report_id,
+                value=str(i),
+                frequency=1,
+            )
+            for i in range(25)
+        )
+        self.url = (
+            f"/api/v2/scanreports/{self.scan_report.id}/tables/{self.table.id}"
+            f"/fields/{self.field.id}/values/"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_keyset_pages_match_page_numbers(self):
+        page_ids = []
+        for page in range(1, 4):
+            response = self.client.get(self.url, {"p": page})
+            page_ids.extend(value["id"] for value in response.data["results"])
+
+        keyset_ids = []
+        response = self.client.get(self.url, {"after": 0})
+        while True:
+            self.assertEqual(response.data["count"], 25)
+            self.assertTrue(response.data["count_exact"])
+            keyset_ids.extend(value["id"] for value in response.data["results"])
+            if not response.data["next"]:
+                break
+            response = self.client.get(response.data["next"])
+
+        self.assertEqual(keyset_ids, page_ids)
+        self.assertEqual(keyset_ids, [value.id for value in self.values])
+
+    def test_page_numbers_unchanged(self):
+        response = self.client.get(self.url, {"p": 3})
+        self.assertEqual(len(response.data["results"]), 5)
+        self.assertNotIn("count_exact", response.data)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {"after": "abc"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_estimated_count(self):
+        queryset = ScanReportValue.objects.filter(scan_report_field=self.field)
+        self.assertGreaterEqual(estimate_count(queryset), 0)
+
+        with mock.patch.object(KeysetPagination, "exact_count_threshold", 0):
+            response = self.client.get(self.url, {"after": 0})
+        self.assertFalse(response.data["count_exact"])
+        self.assertEqual(response.data["count"], estimate_count(queryset))
+
+        with mock.patch.object(KeysetPagination, "exact_count_threshold", 0):
+            response = self.client.get(self.url, {"after": 0, "count": "exact"})
+        self.assertTrue(response.data["count_exact"])
+        self.assertEqual(response.data["count"], 25)
+
+
+@mock.patch("api.views.add_message")
+@mock.patch("api.views.upload_blob")
+class TestScanReportAsyncUpload(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create(username="bilbo", password="baggins")
+        self.data_partner = DataPartner.objects.create(name="The Shire")
+        self.dataset = Dataset.objects.create(
+            name="Bag End",
+            visibility=VisibilityChoices.PUBLIC,
+            data_partner=self.data_partner,
+        )
+        self.dataset.admins.add(self.user)
+        self.project = Project.objects.create(name="The Unexpected Party")
+        self.project.members.add(self.user)
+        self.project.datasets.add(self.dataset)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post(self, query: str = ""):
+        # The table sheet is missing, so the scan report fails its checks
+        wb = openpyxl.Workbook()
+        wb.active.title = "Field Overview"
+        wb.active.append(
+            [
+                "Table",
+                "Field",
+                "Description",
+                "Type",
+                "Max length",
+                "N rows",
+                "N rows checked",
+                "Fraction empty",
+                "N unique values",
+                "Fraction unique",
+            ]
+        )
+        wb.active.append(["Pantry", "cakes"])
+        wb.active.append([None])
+        file = BytesIO()
+        wb.save(file)
+        return self.client.post(
+            f"/api/v2/scanreports/{query}",
+            {
+                "dataset": "Second Breakfast",
+                "parent_dataset": self.dataset.id,
+                "visibility": VisibilityChoices.PUBLIC,
+                "scan_report_file": SimpleUploadedFile(
+                    "scan_report.xlsx", file.getvalue()
+                ),
+            },
+            format="multipart",
+        )
+
+    def test_sync_upload_checks(self, mock_upload_blob, mock_add_message):
+        response = self.post()
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ScanReport.objects.exists())
+        mock_add_message.assert_not_called()
+
+    def test_async_upload_defers_checks(self, mock_upload_blob, mock_add_message):
+        response = self.post("?async=true")
+        self.assertEqual(response.status_code, 202)
+
+        scan_report = ScanReport.objects.get(id=response.data["id"])
+        self.assertEqual(scan_report.upload_status.value, "PENDING")
+        self.assertEqual(response.data["upload_status"]["value"], "PENDING")
+        job = Job.objects.get(scan_report=scan_report)
+        self.assertEqual(job.stage.value, "UPLOAD_SCAN_REPORT")
+        self.assertEqual(job.status.value, "IN_PROGRESS")
+        mock_upload_blob.assert_called_once()
+        mock_add_message.assert_called_once()
+
+
+class TestDownloadScanReport(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create(username="smaug", password="goldgoldgold")
+        self.scan_report = ScanReport.objects.create(
+            dataset="Treasure", name="treasure.xlsx"
+        )
+        self.url = f"/api/v2/scanreports/{self.scan_report.id}/download/"
+        self.content = bytes(range(256)) * 4
+        self.etag = '"0x8DCAFE"'
+
+        self.blob_client = mock.MagicMock()
+        self.blob_client.get_blob_properties.return_value = mock.MagicMock(
+            size=len(self.content),
+            etag=self.etag,
+            last_modified=datetime(2024, 10, 1, tzinfo=timezone.utc),
+        )
+
+        def download_blob(offset, length, **kwargs):
+            data = self.content[offset : offset + length]
+            downloader = mock.MagicMock()
+            downloader.chunks.return_value = iter([data[:100], data[100:]])
+            return downloader
+
+        self.blob_client.download_blob.side_effect = download_blob
+        patcher = mock.patch("shared.files.service.get_container_client")
+        self.addCleanup(patcher.stop)
+        patcher.start().return_value.get_blob_client.return_value = self.blob_client
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_full_download(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), self.content)
+        self.assertEqual(response["Content-Length"], str(len(self.content)))
+        self.assertEqual(response["ETag"], self.etag)
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertIn('filename="treasure.xlsx"', response["Content-Disposition"])
+
+    def test_range_download(self):
+        response = self.client.get(self.url, HTTP_RANGE="bytes=1000-")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), self.content[1000:])
+        self.assertEqual(response["Content-Range"], "bytes 1000-1023/1024")
+        self.assertEqual(response["Content-Length"], "24")
+
+        response = self.client.get(self.url, HTTP_RANGE="bytes=-10")
+        self.assertEqual(b"".join(response.streaming_content), self.content[-10:])
+
+        response = self.client.get(self.url, HTTP_RANGE="bytes=10-19")
+        self.assertEqual(b"".join(response.streaming_content), self.content[10:20])
+
+    def test_unsatisfiable_range(self):
+        response = self.client.get(self.url, HTTP_RANGE="bytes=2000-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */1024")
+
+    def test_stale_range(self):
+        response = self.client.get(
+            self.url, HTTP_RANGE="bytes=1000-", HTTP_IF_RANGE='"0x8DOLD"'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), self.content)
+
+    def test_not_modified(self):
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=self.etag)
+        self.assertEqual(response.status_code, 304)
+        self.blob_client.download_blob.assert_not_called()
@@ -37,7 +37,7 @@ const DeleteDialog = ({
     if (response) {
       toast.error(`Failed to delete the Scan Report: ${response.errorMessage}`);
     } else {
-      toast.success("Scan Report successfully deleted");
+      toast.success("Scan Report is being deleted");
     }
     setOpen(false);
     if (redirect) router.push("/scanreports/");
@@ -20,6 +20,11 @@ export const JobStage = [
     value: "DOWNLOAD_RULES",
     display_name: "Generate mapping rules file",
   },
+  {
+    id: 6,
+    value: "DELETE_SCAN_REPORT",
+    display_name: "Delete Scan Report",
+  },
 ];
 
 export const StageStatus = [
@@ -17,6 +17,12 @@ export const UploadStatusOptions = [
     value: "IN_PROGRESS",
     color: "text-orange-500 dark:text-orange-500",
   },
+  {
+    label: "Upload Pending",
+    icon: "Loader2",
+    value: "PENDING",
+    color: "text-blue-500 dark:text-blue-500",
+  },
 ];
 
 export const MappingStatusOptions = [
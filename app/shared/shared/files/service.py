@@ -1,19 +1,26 @@
 import csv
 import os
+import re
 from io import StringIO
-from typing import IO, AnyStr, Iterable, Union
+from typing import IO, AnyStr, Iterable, Optional, Tuple, Union
 
-from azure.storage.blob import BlobServiceClient, ContentSettings
-from django.http.response import HttpResponse
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceNotFoundError
+from django.conf import settings
+from django.http import Http404, HttpRequest
+from django.http.response import (
+    HttpResponse,
+    HttpResponseNotModified,
+    StreamingHttpResponse,
+)
+from django.utils.http import http_date, parse_etags
+from shared.services.storage import UploadMetrics, get_container_client, upload_stream
 
 
 def download_data_dictionary_blob(blob_name, container="data-dictionaries"):
-    blob_service_client = BlobServiceClient.from_connection_string(
-        os.environ.get("STORAGE_CONN_STRING")
-    )
     # Access data as StorageStreamerDownloader class
     # Decode and split the stream using csv.DictReader()
-    container_client = blob_service_client.get_container_client(container)
+    container_client = get_container_client(container)
     blob_dict_client = container_client.get_blob_client(blob_name)
     streamdownloader = blob_dict_client.download_blob()
     data_dictionary = csv.DictReader(
@@ -61,16 +68,131 @@ def get_blob(blob_name: str, container: str) -> bytes:
     Returns:
         bytes: The content of the blob.
     """
-    blob_service_client = BlobServiceClient.from_connection_string(
-        os.environ.get("STORAGE_CONN_STRING")
-    )
-    container_client = blob_service_client.get_container_client(container)
+    container_client = get_container_client(container)
     blob_client = container_client.get_blob_client(blob_name)
 
     download_stream = blob_client.download_blob()
     return download_stream.readall()
 
 
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parses a single `bytes=` range from a Range header.
+
+    Args:
+        header (str): The Range header.
+        size (int): The size of the blob in bytes.
+
+    Returns:
+        Optional[Tuple[int, int]]: The first and last byte of the range, or `None`
+            if the header should be ignored, as it is malformed or asks for
+            several ranges.
+
+    Raises:
+        ValueError: If the range cannot be satisfied.
+    """
+    match = re.fullmatch(r"\s*bytes=(\d*)-(\d*)\s*", header)
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if not first:
+        # A suffix range, e.g. the last 500 bytes
+        if int(last) == 0 or size == 0:
+            raise ValueError(header)
+        return max(size - int(last), 0), size - 1
+    if last and int(last) < int(first):
+        return None
+    if int(first) >= size:
+        raise ValueError(header)
+    return int(first), min(int(last), size - 1) if last else size - 1
+
+
+def stream_blob(
+    request: HttpRequest,
+    blob_name: str,
+    container: str,
+    filename: Optional[str] = None,
+    content_type: str = "application/octet-stream",
+) -> HttpResponse:
+    """
+    Streams a blob from the specified container to the client, rather than
+    reading it into memory.
+
+    The blob is proxied in chunks of `BLOB_DOWNLOAD_CHUNK_SIZE` bytes. Single
+    byte ranges are supported so downloads can be resumed, and the ETag and
+    Last-Modified headers of the blob are passed on so responses can be cached.
+
+    Args:
+        request (HttpRequest): The request for the blob.
+        blob_name (str): The name of the blob to retrieve.
+        container (str): The name of the container where the blob is stored.
+        filename (Optional[str]): The filename to download the blob as. Defaults
+            to the blob name.
+        content_type (str): The MIME type of the response.
+
+    Returns:
+        HttpResponse: A streaming response of the blob, or of the requested range.
+
+    Raises:
+        Http404: If the blob does not exist.
+    """
+    chunk_size = getattr(settings, "BLOB_DOWNLOAD_CHUNK_SIZE", 4 * 1024 * 1024)
+    blob_client = get_container_client(
+        container, chunk_size=chunk_size
+    ).get_blob_client(blob_name)
+    try:
+        properties = blob_client.get_blob_properties()
+    except ResourceNotFoundError:
+        raise Http404(f"{blob_name} does not exist.")
+
+    size = properties.size
+    etag = properties.etag
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(properties.last_modified.timestamp()),
+        "Accept-Ranges": "bytes",
+    }
+    if etag in parse_etags(request.headers.get("If-None-Match", "")):
+        response = HttpResponseNotModified()
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+    status = 200
+    offset, length = 0, size
+    range_header = request.headers.get("Range")
+    # Serve the whole blob if it has changed since the client's partial download
+    if range_header and request.headers.get("If-Range", etag) == etag:
+        try:
+            byte_range = _parse_range(range_header, size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+        if byte_range:
+            status = 206
+            offset, length = byte_range[0], byte_range[1] - byte_range[0] + 1
+            headers["Content-Range"] = f"bytes {byte_range[0]}-{byte_range[1]}/{size}"
+
+    # Fail rather than mix the old and new blob, if it changes mid-download
+    downloader = blob_client.download_blob(
+        offset=offset,
+        length=length,
+        etag=etag,
+        match_condition=MatchConditions.IfNotModified,
+    )
+    response = StreamingHttpResponse(
+        downloader.chunks() if length else iter([]),
+        status=status,
+        content_type=content_type,
+    )
+    for header, value in headers.items():
+        response[header] = value
+    response["Content-Length"] = str(length)
+    response["Content-Disposition"] = f'attachment; filename="{filename or blob_name}"'
+    return response
+
+
 def delete_blob(blob_name: str, container: str) -> bool:
     """
     Deletes a blob from the specified container.
@@ -82,10 +204,7 @@ def delete_blob(blob_name: str, container: str) -> bool:
     Returns:
         bool: True if the blob was successfully deleted.
     """
-    blob_service_client = BlobServiceClient.from_connection_string(
-        os.environ.get("STORAGE_CONN_STRING")
-    )
-    container_client = blob_service_client.get_container_client(container)
+    container_client = get_container_client(container)
     blob_dict_client = container_client.get_blob_client(blob_name)
     # Delete the blob
     blob_dict_client.delete_blob()
@@ -113,10 +232,11 @@ def upload_blob(
     container: str,
     file: Union[bytes, str, Iterable[AnyStr], IO[AnyStr]],
     content_type: str,
-):
+) -> UploadMetrics:
     """
     This function takes a file and uploads it to a specified container in Azure Blob Storage.
-    The file is stored with the provided blob name and content type.
+    The file is stored with the provided blob name and content type, and is uploaded
+    in blocks staged concurrently.
 
     Args:
         blob_name (str): The name that will be assigned to the uploaded file in Azure Blob Storage.
@@ -125,19 +245,9 @@ def upload_blob(
         content_type (str): The MIME type of the file to be uploaded.
 
     Returns:
-        None
+        UploadMetrics: The size, duration and MD5 of the upload.
     """
-    blob_service_client = BlobServiceClient.from_connection_string(
-        os.getenv("STORAGE_CONN_STRING")
-    )
-
-    blob_client = blob_service_client.get_blob_client(
-        container=container, blob=blob_name
-    )
-    blob_client.upload_blob(
-        file.open(),
-        content_settings=ContentSettings(content_type=content_type),
-    )
+    return upload_stream(blob_name, container, file.open(), content_type)
 
 
 def upload_blob_read(
@@ -145,12 +255,13 @@ def upload_blob_read(
     container: str,
     file: Union[bytes, str, Iterable[AnyStr], IO[AnyStr]],
     content_type: str,
-):
+) -> UploadMetrics:
     """
     This function takes a file and uploads it to a specified container in Azure Blob Storage.
     The file is stored with the provided blob name and content type.
 
-    TODO: This should be combined with `upload_blob`, but they work slightly differently.
+    Unlike `upload_blob`, the file is read from its current position rather than
+    reopened.
 
     Args:
         blob_name (str): The name that will be assigned to the uploaded file in Azure Blob Storage.
@@ -159,16 +270,6 @@ def upload_blob_read(
         content_type (str): The MIME type of the file to be uploaded.
 
     Returns:
-        None
+        UploadMetrics: The size, duration and MD5 of the upload.
     """
-    blob_service_client = BlobServiceClient.from_connection_string(
-        os.getenv("STORAGE_CONN_STRING")
-    )
-
-    blob_client = blob_service_client.get_blob_client(
-        container=container, blob=blob_name
-    )
-    blob_client.upload_blob(
-        file.read(),
-        content_settings=ContentSettings(content_type=content_type),
-    )
+    return upload_stream(blob_name, container, file, content_type)
@@ -14,7 +14,7 @@ from shared.services.azurequeue import add_message
 
 from .models import FileDownload
 from .serializers import FileDownloadSerializer
-from .service import get_blob
+from .service import stream_blob
 from shared.jobs.models import Job, JobStage, StageStatus
 
 
@@ -27,18 +27,16 @@ class FileDownloadView(GenericAPIView, ListModelMixin, RetrieveModelMixin):
 
     def get_queryset(self):
         scan_report_id = self.kwargs["scanreport_pk"]
-        scan_report = get_object_or_404(ScanReport, pk=scan_report_id)
+        scan_report = get_object_or_404(ScanReport, pk=scan_report_id, deleting=False)
 
         return FileDownload.objects.filter(scan_report=scan_report)
 
     def get(self, request, *args, **kwargs):
         if "pk" in kwargs:
             entity = get_object_or_404(FileDownload, pk=kwargs["pk"])
-            file = get_blob(entity.file_url, "rules-exports")
-
-            response = HttpResponse(file, content_type="application/octet-stream")
-            response["Content-Disposition"] = f'attachment; filename="{entity.name}"'
-            return response
+            return stream_blob(
+                request, entity.file_url, "rules-exports", filename=entity.name
+            )
 
         return self.list(request, *args, **kwargs)
 
@@ -56,6 +54,12 @@ class FileDownloadView(GenericAPIView, ListModelMixin, RetrieveModelMixin):
                     {"error": "scan_report_id and file_type are required."}, status=400
                 )
 
+            scan_report = ScanReport.objects.filter(
+                id=scan_report_id, deleting=False
+            ).first()
+            if scan_report is None:
+                return JsonResponse({"error": "Scan report not found."}, status=404)
+
             msg = {
                 "scan_report_id": scan_report_id,
                 "user_id": request.user.id,
@@ -65,7 +69,7 @@ class FileDownloadView(GenericAPIView, ListModelMixin, RetrieveModelMixin):
             add_message(settings.WORKERS_RULES_EXPORT_NAME, msg)
             # Create job record for downloading file
             Job.objects.create(
-                scan_report=ScanReport.objects.get(id=scan_report_id),
+                scan_report=scan_report,
                 stage=JobStage.objects.get(value="DOWNLOAD_RULES"),
                 status=StageStatus.objects.get(value="IN_PROGRESS"),
                 details=f'A Mapping Rules {"JSON" if file_type=="application/json" else "CSV"} is being generated.',
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.15 on 2026-10-19 01:20
+
+from django.core.management.color import no_style
+from django.db import migrations
+
+
+def add_delete_stage(apps, schema_editor):
+    JobStage = apps.get_model("jobs", "JobStage")
+    # The first stages were inserted with their IDs, so the sequence is moved past
+    # them before the new stage takes the next ID
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), [JobStage]):
+            cursor.execute(sql)
+    JobStage.objects.get_or_create(
+        value="DELETE_SCAN_REPORT",
+        defaults={"display_name": "Delete Scan Report"},
+    )
+
+
+def remove_delete_stage(apps, schema_editor):
+    JobStage = apps.get_model("jobs", "JobStage")
+    JobStage.objects.filter(value="DELETE_SCAN_REPORT").delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jobs", "0002_remove_job_scan_report_id_and_more"),
+    ]
+
+    operations = [
+        migrations.RunPython(add_delete_stage, remove_delete_stage),
+    ]
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from shared.services.concept_search import CONCEPT_SEARCH_INDEXES
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the full-text indexes used to search concepts by name and synonym. "
+        "The OMOP vocabularies are not managed by migrations, so run this once "
+        "they are loaded. Indexes are built concurrently, so the vocabularies can "
+        "be read while they are built, and existing indexes are left alone."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--drop",
+            action="store_true",
+            help="Drop the indexes instead, e.g. before reloading the vocabularies.",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Concept search is only available on PostgreSQL.")
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT indexname FROM pg_indexes WHERE schemaname = 'omop'")
+            existing = {name for (name,) in cursor.fetchall()}
+            cursor.execute(
+                "SELECT table_name FROM information_schema.tables "
+                "WHERE table_schema = 'omop'"
+            )
+            tables = {name for (name,) in cursor.fetchall()}
+
+        # Concurrent index builds cannot run in a transaction
+        with connection.schema_editor(atomic=False) as schema_editor:
+            for model, index in CONCEPT_SEARCH_INDEXES:
+                table = model._meta.db_table.split('"."')[-1]
+                if options["drop"]:
+                    if index.name in existing:
+                        # The index is in the omop schema, which is not on the
+                        # search path, so it is named in full
+                        schema_editor.execute(
+                            "DROP INDEX CONCURRENTLY "
+                            f"omop.{schema_editor.quote_name(index.name)}"
+                        )
+                        self.stdout.write(f"Dropped {index.name}")
+                elif table not in tables:
+                    self.stderr.write(f"Skipped {index.name}: omop.{table} is missing")
+                elif index.name in existing:
+                    self.stdout.write(f"{index.name} already exists")
+                else:
+                    schema_editor.add_index(model, index, concurrently=True)
+                    self.stdout.write(self.style.SUCCESS(f"Created {index.name}"))
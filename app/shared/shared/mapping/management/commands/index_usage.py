@@ -0,0 +1,95 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+USAGE_SQL = """
+SELECT
+    s.relname,
+    s.indexrelname,
+    s.idx_scan,
+    s.idx_tup_read,
+    s.idx_tup_fetch,
+    pg_relation_size(s.indexrelid),
+    i.indisunique,
+    am.amname
+FROM pg_stat_user_indexes s
+JOIN pg_index i ON i.indexrelid = s.indexrelid
+JOIN pg_class c ON c.oid = s.indexrelid
+JOIN pg_am am ON am.oid = c.relam
+WHERE s.schemaname = current_schema()
+    AND (%(tables)s::text[] IS NULL OR s.relname = ANY(%(tables)s::text[]))
+ORDER BY s.relname, s.indexrelname
+"""
+
+# Needs the pgstattuple extension. Reads the whole index, so it is only run if asked.
+BLOAT_SQL = """
+SELECT avg_leaf_density, leaf_fragmentation
+FROM pgstatindex(quote_ident(current_schema()) || '.' || quote_ident(%s))
+"""
+
+ROW = "{:<32} {:<48} {:>10} {:>12} {:>14} {:>10}"
+BLOAT_COLUMNS = " {:>12} {:>13}"
+
+
+class Command(BaseCommand):
+    help = (
+        "Report how often each index has been scanned since the statistics were "
+        "last reset, and its size, from pg_stat_user_indexes. With --bloat, also "
+        "report the leaf density and fragmentation of each B-tree index, which "
+        "needs the pgstattuple extension."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--table",
+            nargs="*",
+            help="Only report the indexes of these tables, e.g. "
+            "mapping_scanreportconcept.",
+        )
+        parser.add_argument(
+            "--unused",
+            action="store_true",
+            help="Only report indexes that have never been scanned.",
+        )
+        parser.add_argument("--bloat", action="store_true")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Index usage is only available on PostgreSQL.")
+
+        with connection.cursor() as cursor:
+            cursor.execute(USAGE_SQL, {"tables": options.get("table") or None})
+            rows = cursor.fetchall()
+
+            if options["bloat"]:
+                cursor.execute(
+                    "SELECT 1 FROM pg_extension WHERE extname = 'pgstattuple'"
+                )
+                if cursor.fetchone() is None:
+                    raise CommandError(
+                        "--bloat needs the pgstattuple extension: "
+                        "CREATE EXTENSION pgstattuple;"
+                    )
+
+            header = ROW.format(
+                "table", "index", "scans", "tuples read", "tuples fetched", "size"
+            )
+            if options["bloat"]:
+                header += BLOAT_COLUMNS.format("leaf density", "fragmentation")
+            self.stdout.write(header)
+
+            for table, index, scans, read, fetched, size, unique, method in rows:
+                if options["unused"] and (scans or unique):
+                    # Unique indexes are used by their constraint, even if not scanned
+                    continue
+                line = ROW.format(
+                    table, index, scans, read, fetched, f"{size // 1024}kB"
+                )
+                if options["bloat"] and method == "btree":
+                    cursor.execute(BLOAT_SQL, [index])
+                    density, fragmentation = cursor.fetchone()
+                    line += BLOAT_COLUMNS.format(
+                        f"{density:.1f}%", f"{fragmentation:.1f}%"
+                    )
+                elif options["bloat"]:
+                    line += BLOAT_COLUMNS.format("-", "-")
+                self.stdout.write(line)
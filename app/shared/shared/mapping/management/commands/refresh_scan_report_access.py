@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from shared.services.access import refresh_scan_report_access
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the precomputed scan report access rows used to filter listings. "
+        "Rebuilds every scan report unless --report-id is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--report-id", type=int, nargs="*")
+
+    def handle(self, *args, **options):
+        report_ids = options.get("report_id")
+        print(
+            f"Refreshing access for {len(report_ids) if report_ids else 'all'} scan report(s)..."
+        )
+        refresh_scan_report_access(report_ids or None)
+        print("Done.")
@@ -0,0 +1,106 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from shared.mapping.models import ScanReport, UploadStatus
+from shared.services.azurequeue import QueuePublisher
+
+# Uploads that are not finished and that no worker is known to be working on
+REQUEUABLE_STATUSES = ["PENDING", "FAILED"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Queue the uploads of scan reports again, e.g. after an outage of the "
+        "workers. Each upload is checked again before it resumes from the tables "
+        "that were not uploaded."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--report-id",
+            type=int,
+            nargs="*",
+            help=(
+                "Requeue these scan reports, if their upload is "
+                f"{' or '.join(REQUEUABLE_STATUSES)}, or has a status given by "
+                "--status."
+            ),
+        )
+        parser.add_argument(
+            "--status",
+            nargs="*",
+            choices=["PENDING", "IN_PROGRESS", "FAILED"],
+            help="Requeue every scan report whose upload has one of these statuses.",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Requeue the scan reports given by --report-id whatever their status.",
+        )
+
+    def handle(self, *args, **options):
+        report_ids = options.get("report_id")
+        statuses = options.get("status")
+        if not report_ids and not statuses:
+            raise CommandError("Give --report-id or --status.")
+        queue_name = os.environ.get("WORKERS_UPLOAD_NAME")
+        if not queue_name:
+            raise CommandError("WORKERS_UPLOAD_NAME is not set.")
+
+        # Scan reports being deleted are left to be deleted
+        scan_reports = ScanReport.objects.filter(deleting=False).select_related(
+            "data_dictionary"
+        )
+        if report_ids:
+            scan_reports = scan_reports.filter(id__in=report_ids)
+            if not statuses and not options.get("force"):
+                statuses = REQUEUABLE_STATUSES
+        if statuses:
+            scan_reports = scan_reports.filter(upload_status__value__in=statuses)
+        scan_reports = list(scan_reports.order_by("id"))
+        if report_ids:
+            skipped = set(report_ids) - {scan_report.id for scan_report in scan_reports}
+            if skipped:
+                self.stdout.write(
+                    f"Skipped {', '.join(map(str, sorted(skipped)))}: not found, "
+                    "being deleted, or with an upload that is complete or in "
+                    "progress. Use --force to requeue them anyway."
+                )
+
+        # The worker runs the checks of PENDING uploads, so nothing is uploaded
+        # without them, whatever its status was. So the status is set before the
+        # messages are sent, and put back for those that are not.
+        pending = UploadStatus.objects.get(value="PENDING")
+        ScanReport.objects.filter(id__in=[sr.id for sr in scan_reports]).update(
+            upload_status=pending
+        )
+        published = []
+        publisher = QueuePublisher(queue_name)
+        try:
+            with publisher:
+                for scan_report in scan_reports:
+                    published.append(scan_report.id)
+                    publisher.publish(
+                        {
+                            "scan_report_id": scan_report.id,
+                            "scan_report_blob": scan_report.name,
+                            "data_dictionary_blob": (
+                                scan_report.data_dictionary.name
+                                if scan_report.data_dictionary
+                                else "None"
+                            ),
+                        }
+                    )
+        except Exception as e:
+            unsent = {message["scan_report_id"] for message in publisher.unsent}
+            unsent |= {sr.id for sr in scan_reports} - set(published)
+            for scan_report in scan_reports:
+                if scan_report.id in unsent:
+                    ScanReport.objects.filter(
+                        id=scan_report.id, upload_status=pending
+                    ).update(upload_status=scan_report.upload_status_id)
+            raise CommandError(
+                f"Requeued {publisher.sent} upload(s) to {queue_name}, but could "
+                f"not requeue {', '.join(map(str, sorted(unsent)))}: {e}"
+            ) from e
+        self.stdout.write(f"Requeued {publisher.sent} upload(s) to {queue_name}.")
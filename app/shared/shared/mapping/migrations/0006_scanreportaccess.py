@@ -0,0 +1,194 @@
+# Generated by Django 4.2.15 on 2026-10-18 23:47
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def _group(pairs):
+    grouped = defaultdict(set)
+    for key, value in pairs:
+        grouped[key].add(value)
+    return grouped
+
+
+def _permissions(roles, visibility, dataset_visibility):
+    # A frozen copy of ScanReportRoleSet.permissions(), as it was when this
+    # migration was written
+    member = "member" in roles
+    if not member:
+        can_view = False
+    elif visibility == "RESTRICTED":
+        can_view = bool(
+            roles & {"viewer", "editor", "author", "dataset_editor", "dataset_admin"}
+        )
+    elif dataset_visibility == "RESTRICTED":
+        can_view = bool(roles & {"dataset_viewer", "dataset_editor", "dataset_admin"})
+    else:
+        can_view = dataset_visibility == "PUBLIC"
+    granted = {
+        "CanView": can_view,
+        "CanEdit": member and bool(roles & {"editor", "dataset_editor"}),
+        "CanAdmin": member and bool(roles & {"author", "dataset_admin"}),
+        "IsAuthor": "author" in roles,
+    }
+    return [permission for permission, flag in granted.items() if flag]
+
+
+def _access_rows(apps, scan_report_ids):
+    ScanReport = apps.get_model("mapping", "ScanReport")
+    Dataset = apps.get_model("mapping", "Dataset")
+    Project = apps.get_model("mapping", "Project")
+
+    def through_pairs(through, key, ids):
+        return through.objects.filter(**{f"{key}__in": ids}).values_list(key, "user_id")
+
+    scan_reports = list(
+        ScanReport.objects.filter(id__in=scan_report_ids).values_list(
+            "id",
+            "author_id",
+            "visibility",
+            "parent_dataset_id",
+            "parent_dataset__visibility",
+        )
+    )
+    dataset_ids = {row[3] for row in scan_reports if row[3] is not None}
+    projects_by_dataset = _group(
+        Project.datasets.through.objects.filter(dataset_id__in=dataset_ids).values_list(
+            "dataset_id", "project_id"
+        )
+    )
+    members_by_project = _group(
+        through_pairs(
+            Project.members.through,
+            "project_id",
+            set().union(*projects_by_dataset.values()),
+        )
+    )
+    dataset_roles = {
+        role: _group(
+            through_pairs(getattr(Dataset, field).through, "dataset_id", dataset_ids)
+        )
+        for role, field in (
+            ("dataset_viewer", "viewers"),
+            ("dataset_editor", "editors"),
+            ("dataset_admin", "admins"),
+        )
+    }
+    scan_report_roles = {
+        role: _group(
+            through_pairs(
+                getattr(ScanReport, field).through, "scanreport_id", scan_report_ids
+            )
+        )
+        for role, field in (("viewer", "viewers"), ("editor", "editors"))
+    }
+
+    rows = []
+    for id, author_id, visibility, dataset_id, dataset_visibility in scan_reports:
+        members = set().union(
+            *(members_by_project[p] for p in projects_by_dataset[dataset_id])
+        )
+        holders = {role: users[id] for role, users in scan_report_roles.items()}
+        holders.update(
+            {role: users[dataset_id] for role, users in dataset_roles.items()}
+        )
+        holders["author"] = {author_id} if author_id is not None else set()
+        holders["member"] = members
+        for user_id in set().union(*holders.values()):
+            roles = {role for role, users in holders.items() if user_id in users}
+            rows.extend(
+                (user_id, id, permission)
+                for permission in _permissions(roles, visibility, dataset_visibility)
+            )
+    return rows
+
+
+def build_access_forwards(apps, schema_editor):
+    ScanReport = apps.get_model("mapping", "ScanReport")
+    ScanReportAccess = apps.get_model("mapping", "ScanReportAccess")
+
+    ids = list(ScanReport.objects.order_by("id").values_list("id", flat=True))
+    for start in range(0, len(ids), BATCH_SIZE):
+        ScanReportAccess.objects.bulk_create(
+            (
+                ScanReportAccess(user_id=user_id, scan_report_id=id, role=role)
+                for user_id, id, role in _access_rows(
+                    apps, ids[start : start + BATCH_SIZE]
+                )
+            ),
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("mapping", "0005_auto_20241015_0900"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScanReportAccess",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "role",
+                    models.CharField(
+                        choices=[
+                            ("CanView", "Can view"),
+                            ("CanEdit", "Can edit"),
+                            ("CanAdmin", "Can admin"),
+                            ("IsAuthor", "Is author"),
+                        ],
+                        max_length=16,
+                    ),
+                ),
+                (
+                    "scan_report",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="access",
+                        to="mapping.scanreport",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="scan_report_access",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["scan_report", "user"],
+                        name="mapping_sca_scan_re_29b3ff_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="scanreportaccess",
+            constraint=models.UniqueConstraint(
+                fields=("user", "role", "scan_report"), name="unique_scan_report_access"
+            ),
+        ),
+        migrations.RunPython(build_access_forwards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.15 on 2026-10-19 00:30
+
+from django.db import migrations
+
+
+def create_pending_status(apps, schema_editor):
+    UploadStatus = apps.get_model("mapping", "UploadStatus")
+    UploadStatus.objects.get_or_create(
+        id=4, value="PENDING", defaults={"display_name": "Upload Pending"}
+    )
+
+
+def remove_pending_status(apps, schema_editor):
+    UploadStatus = apps.get_model("mapping", "UploadStatus")
+    UploadStatus.objects.filter(value="PENDING").delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mapping", "0006_scanreportaccess"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_pending_status, remove_pending_status),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.15 on 2026-10-19 00:57
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def remove_duplicate_concepts(apps, schema_editor):
+    """
+    Keep the first of each concept added to an object more than once, so the
+    uniqueness constraint can be added. The mapping rules of the duplicates are
+    deleted with them, as the first concept has the same rules.
+    """
+    ScanReportConcept = apps.get_model("mapping", "ScanReportConcept")
+    duplicates = (
+        ScanReportConcept.objects.values("concept", "object_id", "content_type")
+        .annotate(keep=Min("id"), count=Count("id"))
+        .filter(count__gt=1)
+    )
+    for duplicate in duplicates.iterator():
+        ScanReportConcept.objects.filter(
+            concept=duplicate["concept"],
+            object_id=duplicate["object_id"],
+            content_type=duplicate["content_type"],
+        ).exclude(id=duplicate["keep"]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mapping", "0007_uploadstatus_pending"),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_concepts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.15 on 2026-10-19 00:57
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build the indexes without locking the table against writes
+    atomic = False
+
+    dependencies = [
+        ("mapping", "0008_remove_duplicate_scanreportconcepts"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="scanreportconcept",
+            index=models.Index(
+                fields=["content_type", "object_id"],
+                name="mapping_sca_content_8a11cc_idx",
+            ),
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    sql=(
+                        "CREATE UNIQUE INDEX CONCURRENTLY unique_scan_report_concept "
+                        "ON mapping_scanreportconcept "
+                        "(concept_id, object_id, content_type_id);"
+                    ),
+                    reverse_sql=(
+                        "DROP INDEX CONCURRENTLY IF EXISTS unique_scan_report_concept;"
+                    ),
+                ),
+                migrations.RunSQL(
+                    sql=(
+                        "ALTER TABLE mapping_scanreportconcept "
+                        "ADD CONSTRAINT unique_scan_report_concept "
+                        "UNIQUE USING INDEX unique_scan_report_concept;"
+                    ),
+                    reverse_sql=(
+                        "ALTER TABLE mapping_scanreportconcept "
+                        "DROP CONSTRAINT unique_scan_report_concept;"
+                    ),
+                ),
+            ],
+            state_operations=[
+                migrations.AddConstraint(
+                    model_name="scanreportconcept",
+                    constraint=models.UniqueConstraint(
+                        fields=("concept", "object_id", "content_type"),
+                        name="unique_scan_report_concept",
+                    ),
+                ),
+            ],
+        ),
+    ]
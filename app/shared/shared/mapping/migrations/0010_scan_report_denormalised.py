@@ -0,0 +1,82 @@
+# Generated by Django 4.2.15 on 2026-10-19 01:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def _add_scan_report(table, suffix):
+    """
+    Add the nullable `scan_report` foreign key to a table a step at a time, so
+    no step holds a lock that blocks writes for longer than a moment. The
+    names are those Django would give the constraint and index.
+    """
+    constraint = f"{table[:20]}_scan_report_id_{suffix}_fk_mapping_s"
+    index = f"{table}_scan_report_id_{suffix}"
+    return [
+        migrations.RunSQL(
+            sql=f'ALTER TABLE "{table}" ADD COLUMN "scan_report_id" integer NULL;',
+            reverse_sql=f'ALTER TABLE "{table}" DROP COLUMN "scan_report_id";',
+        ),
+        # Checked separately, as checking it here would block writes while the
+        # table is scanned
+        migrations.RunSQL(
+            sql=(
+                f'ALTER TABLE "{table}" ADD CONSTRAINT "{constraint}" '
+                'FOREIGN KEY ("scan_report_id") REFERENCES "mapping_scanreport" ("id") '
+                "DEFERRABLE INITIALLY DEFERRED NOT VALID;"
+            ),
+            reverse_sql=f'ALTER TABLE "{table}" DROP CONSTRAINT "{constraint}";',
+        ),
+        migrations.RunSQL(
+            sql=f'ALTER TABLE "{table}" VALIDATE CONSTRAINT "{constraint}";',
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            sql=(
+                f'CREATE INDEX CONCURRENTLY "{index}" ON "{table}" ("scan_report_id");'
+            ),
+            reverse_sql=f'DROP INDEX CONCURRENTLY IF EXISTS "{index}";',
+        ),
+    ]
+
+
+class Migration(migrations.Migration):
+    # Build the indexes without locking the tables against writes
+    atomic = False
+
+    dependencies = [
+        ("mapping", "0009_scanreportconcept_indexes"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                *_add_scan_report("mapping_scanreportfield", "823dee19"),
+                *_add_scan_report("mapping_scanreportvalue", "50db8a08"),
+            ],
+            state_operations=[
+                migrations.AddField(
+                    model_name="scanreportfield",
+                    name="scan_report",
+                    field=models.ForeignKey(
+                        blank=True,
+                        editable=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="mapping.scanreport",
+                    ),
+                ),
+                migrations.AddField(
+                    model_name="scanreportvalue",
+                    name="scan_report",
+                    field=models.ForeignKey(
+                        blank=True,
+                        editable=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="mapping.scanreport",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.15 on 2026-10-19 01:04
+
+from django.db import migrations, transaction
+from django.db.models import Max, OuterRef, Subquery
+
+BATCH_SIZE = 50000
+
+
+def _backfill(model, parent, parent_lookup, using):
+    """
+    Copy the scan report of each row's parent onto it, a range of IDs at a time,
+    so each batch is its own short transaction on a large table.
+    """
+    last_id = model.objects.using(using).aggregate(last=Max("id"))["last"] or 0
+    scan_report = parent.objects.filter(id=OuterRef(parent_lookup)).values(
+        "scan_report_id"
+    )[:1]
+    for start in range(0, last_id + 1, BATCH_SIZE):
+        with transaction.atomic(using=using):
+            model.objects.using(using).filter(
+                id__gte=start, id__lt=start + BATCH_SIZE, scan_report__isnull=True
+            ).update(scan_report_id=Subquery(scan_report))
+
+
+def backfill_scan_report(apps, schema_editor):
+    ScanReportTable = apps.get_model("mapping", "ScanReportTable")
+    ScanReportField = apps.get_model("mapping", "ScanReportField")
+    ScanReportValue = apps.get_model("mapping", "ScanReportValue")
+    using = schema_editor.connection.alias
+    # Fields first, as values take the scan report from their field
+    _backfill(ScanReportField, ScanReportTable, "scan_report_table_id", using)
+    _backfill(ScanReportValue, ScanReportField, "scan_report_field_id", using)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("mapping", "0010_scan_report_denormalised"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_scan_report, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 4.2.15 on 2026-10-19 09:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_remaining(apps, schema_editor):
+    """
+    Copy the scan report onto any rows saved without one since the backfill, so
+    the column can be made NOT NULL.
+    """
+    ScanReportTable = apps.get_model("mapping", "ScanReportTable")
+    ScanReportField = apps.get_model("mapping", "ScanReportField")
+    ScanReportValue = apps.get_model("mapping", "ScanReportValue")
+    using = schema_editor.connection.alias
+    # Fields first, as values take the scan report from their field
+    for model, parent, parent_lookup in [
+        (ScanReportField, ScanReportTable, "scan_report_table_id"),
+        (ScanReportValue, ScanReportField, "scan_report_field_id"),
+    ]:
+        model.objects.using(using).filter(scan_report__isnull=True).update(
+            scan_report_id=Subquery(
+                parent.objects.filter(id=OuterRef(parent_lookup)).values(
+                    "scan_report_id"
+                )[:1]
+            )
+        )
+
+
+def _set_not_null(table):
+    """
+    Make `scan_report_id` NOT NULL without blocking writes while the table is
+    scanned: a CHECK constraint is validated first, which Postgres then uses to
+    skip the scan when setting NOT NULL.
+    """
+    check = f"{table}_scan_report_id_not_null"
+    return [
+        migrations.RunSQL(
+            sql=(
+                f'ALTER TABLE "{table}" ADD CONSTRAINT "{check}"'
+                ' CHECK ("scan_report_id" IS NOT NULL) NOT VALID;'
+            ),
+            reverse_sql=f'ALTER TABLE "{table}" DROP CONSTRAINT IF EXISTS "{check}";',
+        ),
+        migrations.RunSQL(
+            sql=f'ALTER TABLE "{table}" VALIDATE CONSTRAINT "{check}";',
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            sql=f'ALTER TABLE "{table}" ALTER COLUMN "scan_report_id" SET NOT NULL;',
+            reverse_sql=(
+                f'ALTER TABLE "{table}" ALTER COLUMN "scan_report_id" DROP NOT NULL;'
+            ),
+        ),
+        migrations.RunSQL(
+            sql=f'ALTER TABLE "{table}" DROP CONSTRAINT "{check}";',
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("mapping", "0011_backfill_scan_report"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_remaining, migrations.RunPython.noop),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                *_set_not_null("mapping_scanreportfield"),
+                *_set_not_null("mapping_scanreportvalue"),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name="scanreportfield",
+                    name="scan_report",
+                    field=models.ForeignKey(
+                        editable=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="mapping.scanreport",
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="scanreportvalue",
+                    name="scan_report",
+                    field=models.ForeignKey(
+                        editable=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="mapping.scanreport",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.15 on 2026-10-19 10:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mapping", "0012_scan_report_not_null"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scanreport",
+            name="deleting",
+            field=models.BooleanField(default=False, editable=False),
+        ),
+    ]
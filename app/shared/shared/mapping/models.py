@@ -24,6 +24,23 @@ class VisibilityChoices(models.TextChoices):
     RESTRICTED = "RESTRICTED", "Restricted"
 
 
+class ScanReportRole(models.TextChoices):
+    PROJECT_MEMBER = "PROJECT_MEMBER", "Project member"
+    AUTHOR = "AUTHOR", "Author"
+    VIEWER = "VIEWER", "Viewer"
+    EDITOR = "EDITOR", "Editor"
+    DATASET_VIEWER = "DATASET_VIEWER", "Dataset viewer"
+    DATASET_EDITOR = "DATASET_EDITOR", "Dataset editor"
+    DATASET_ADMIN = "DATASET_ADMIN", "Dataset admin"
+
+
+class ScanReportPermission(models.TextChoices):
+    CAN_VIEW = "CanView", "Can view"
+    CAN_EDIT = "CanEdit", "Can edit"
+    CAN_ADMIN = "CanAdmin", "Can admin"
+    IS_AUTHOR = "IsAuthor", "Is author"
+
+
 class BaseModel(models.Model):
     """
     Abstract base model that provides common fields for all models.
@@ -153,6 +170,15 @@ class ScanReportConcept(BaseModel):
 
     class Meta:
         app_label = "mapping"
+        # Concepts are looked up by the object they are attached to, and an object
+        # can only have each concept once.
+        indexes = [models.Index(fields=["content_type", "object_id"])]
+        constraints = [
+            UniqueConstraint(
+                fields=["concept", "object_id", "content_type"],
+                name="unique_scan_report_concept",
+            )
+        ]
 
     def __str__(self):
         return str(self.id)
@@ -172,6 +198,9 @@ class ScanReport(BaseModel):
     name = models.CharField(max_length=256)  # TODO: rename to `file_name`
     dataset = models.CharField(max_length=128)  # TODO: rename to `name`
     hidden = models.BooleanField(default=False)
+    # Set when the scan report is queued to be deleted, after which it is no
+    # longer listed, shown or changed
+    deleting = models.BooleanField(default=False, editable=False)
     file = models.FileField()  # TODO: Delete.
     upload_status = models.ForeignKey(
         "UploadStatus",
@@ -228,6 +257,38 @@ class ScanReport(BaseModel):
         return str(self.id)
 
 
+class ScanReportAccess(models.Model):
+    """
+    Precomputed permissions a user has on a scan report, one row per permission.
+
+    Maintained by `shared.services.access` whenever memberships, visibility or
+    authorship change, so listings can filter with a single semi-join.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="scan_report_access",
+    )
+    scan_report = models.ForeignKey(
+        ScanReport, on_delete=models.CASCADE, related_name="access"
+    )
+    role = models.CharField(max_length=16, choices=ScanReportPermission.choices)
+
+    class Meta:
+        app_label = "mapping"
+        constraints = [
+            UniqueConstraint(
+                fields=["user", "role", "scan_report"],
+                name="unique_scan_report_access",
+            )
+        ]
+        indexes = [models.Index(fields=["scan_report", "user"])]
+
+    def __str__(self):
+        return f"{self.user_id} {self.role} {self.scan_report_id}"
+
+
 class ScanReportTable(BaseModel):
     """
     Model for a Scan Report Table
@@ -270,6 +331,10 @@ class ScanReportField(BaseModel):
     """
 
     scan_report_table = models.ForeignKey(ScanReportTable, on_delete=models.CASCADE)
+    # Denormalised from the table, so queries by scan report need no joins
+    scan_report = models.ForeignKey(
+        ScanReport, on_delete=models.CASCADE, editable=False
+    )
     name = models.CharField(max_length=512)
     description_column = models.CharField(max_length=512)
     type_column = models.CharField(max_length=32)
@@ -299,6 +364,14 @@ class ScanReportField(BaseModel):
     def __str__(self):
         return str(self.id)
 
+    def save(self, *args, **kwargs):
+        # Taken from the table when it is loaded, so saving needs no extra query
+        if self.scan_report_id is None or ScanReportField.scan_report_table.is_cached(
+            self
+        ):
+            self.scan_report_id = self.scan_report_table.scan_report_id
+        super().save(*args, **kwargs)
+
 
 class ScanReportAssertion(BaseModel):
     """
@@ -352,6 +425,10 @@ class ScanReportValue(BaseModel):
     """
 
     scan_report_field = models.ForeignKey(ScanReportField, on_delete=models.CASCADE)
+    # Denormalised from the field, so queries by scan report need no joins
+    scan_report = models.ForeignKey(
+        ScanReport, on_delete=models.CASCADE, editable=False
+    )
     value = models.CharField(max_length=128)
     frequency = models.IntegerField()
     conceptID = models.IntegerField(default=-1)  # TODO rename it to concept_id
@@ -364,6 +441,14 @@ class ScanReportValue(BaseModel):
     def __str__(self):
         return str(self.id)
 
+    def save(self, *args, **kwargs):
+        # Taken from the field when it is loaded, so saving needs no extra query
+        if self.scan_report_id is None or ScanReportValue.scan_report_field.is_cached(
+            self
+        ):
+            self.scan_report_id = self.scan_report_field.scan_report_id
+        super().save(*args, **kwargs)
+
 
 class DataDictionary(BaseModel):
     """
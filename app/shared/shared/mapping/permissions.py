@@ -1,30 +1,261 @@
 import os
-from typing import Any
+from dataclasses import dataclass
+from typing import Any, Optional
 
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
 from django.db.models.query_utils import Q
 from rest_framework import permissions
 from rest_framework.request import Request
 from shared.mapping.models import (
     Dataset,
+    Project,
     ScanReport,
     ScanReportField,
+    ScanReportPermission,
+    ScanReportRole,
     ScanReportTable,
     ScanReportValue,
     VisibilityChoices,
 )
 
-# Get scan report for the table|field|value
-SCAN_REPORT_QUERIES = {
-    ScanReportTable: lambda x: ScanReport.objects.get(id=x.scan_report.id),
-    ScanReportField: lambda x: ScanReport.objects.get(
-        id=x.scan_report_table.scan_report.id
-    ),
-    ScanReportValue: lambda x: ScanReport.objects.get(
-        id=x.scan_report_field.scan_report_table.scan_report.id
-    ),
+# Get the scan report ID for the table|field|value
+SCAN_REPORT_ID_QUERIES = {
+    ScanReport: lambda x: x.id,
+    ScanReportTable: lambda x: x.scan_report_id,
+    ScanReportField: lambda x: x.scan_report_id,
+    ScanReportValue: lambda x: x.scan_report_id,
 }
 
+ACCESS_CACHE_VERSION_KEY = "permissions:scan_report_access:version"
+ACCESS_CACHE_TIMEOUT = getattr(settings, "PERMISSIONS_CACHE_TIMEOUT", 30)
+REQUEST_ACCESS_ATTR = "_scan_report_access"
+
+
+@dataclass(frozen=True)
+class ScanReportRoleSet:
+    """
+    A user's roles on a scan report, along with the visibilities needed to decide
+    what those roles allow.
+    """
+
+    roles: frozenset
+    visibility: str
+    dataset_visibility: Optional[str]
+
+    @classmethod
+    def from_flags(
+        cls,
+        flags: dict[str, bool],
+        visibility: str,
+        dataset_visibility: Optional[str],
+    ) -> "ScanReportRoleSet":
+        return cls(
+            roles=frozenset(role for role, flag in flags.items() if flag),
+            visibility=visibility,
+            dataset_visibility=dataset_visibility,
+        )
+
+    def has_any(self, *roles: str) -> bool:
+        return not self.roles.isdisjoint(roles)
+
+    @property
+    def is_member(self) -> bool:
+        return ScanReportRole.PROJECT_MEMBER in self.roles
+
+    @property
+    def is_author(self) -> bool:
+        return ScanReportRole.AUTHOR in self.roles
+
+    @property
+    def can_view(self) -> bool:
+        if not self.is_member:
+            return False
+        if self.visibility == VisibilityChoices.RESTRICTED:
+            return self.has_any(
+                ScanReportRole.VIEWER,
+                ScanReportRole.EDITOR,
+                ScanReportRole.AUTHOR,
+                ScanReportRole.DATASET_EDITOR,
+                ScanReportRole.DATASET_ADMIN,
+            )
+        if self.dataset_visibility == VisibilityChoices.RESTRICTED:
+            return self.has_any(
+                ScanReportRole.DATASET_VIEWER,
+                ScanReportRole.DATASET_EDITOR,
+                ScanReportRole.DATASET_ADMIN,
+            )
+        return self.dataset_visibility == VisibilityChoices.PUBLIC
+
+    @property
+    def is_editor(self) -> bool:
+        return self.is_member and self.has_any(
+            ScanReportRole.EDITOR, ScanReportRole.DATASET_EDITOR
+        )
+
+    @property
+    def can_edit(self) -> bool:
+        return self.is_member and self.has_any(
+            ScanReportRole.EDITOR,
+            ScanReportRole.AUTHOR,
+            ScanReportRole.DATASET_EDITOR,
+            ScanReportRole.DATASET_ADMIN,
+        )
+
+    @property
+    def is_admin(self) -> bool:
+        return self.is_member and self.has_any(
+            ScanReportRole.AUTHOR, ScanReportRole.DATASET_ADMIN
+        )
+
+    def permissions(self) -> list[str]:
+        """The permissions these roles grant, named as in `ScanReportPermission`."""
+        granted = {
+            ScanReportPermission.CAN_VIEW: self.can_view,
+            ScanReportPermission.CAN_EDIT: self.is_editor,
+            ScanReportPermission.CAN_ADMIN: self.is_admin,
+            ScanReportPermission.IS_AUTHOR: self.is_author,
+        }
+        return [permission for permission, flag in granted.items() if flag]
+
+
+def _query_scan_report_roles(
+    scan_report_id: int, user_id: Optional[int]
+) -> Optional[ScanReportRoleSet]:
+    """Fetch all of a user's role flags on a scan report in a single query.
+
+    Args:
+        scan_report_id (int): The ID of the scan report.
+        user_id (Optional[int]): The ID of the user.
+
+    Returns:
+        Optional[ScanReportRoleSet]: The user's access, or `None` if the scan report
+        does not exist.
+    """
+    dataset = OuterRef("parent_dataset_id")
+    row = (
+        ScanReport.objects.filter(id=scan_report_id)
+        .annotate(
+            is_project_member=Exists(
+                Project.objects.filter(datasets=dataset, members=user_id)
+            ),
+            is_viewer=Exists(
+                ScanReport.viewers.through.objects.filter(
+                    scanreport_id=OuterRef("pk"), user_id=user_id
+                )
+            ),
+            is_editor=Exists(
+                ScanReport.editors.through.objects.filter(
+                    scanreport_id=OuterRef("pk"), user_id=user_id
+                )
+            ),
+            is_dataset_viewer=Exists(
+                Dataset.viewers.through.objects.filter(
+                    dataset_id=dataset, user_id=user_id
+                )
+            ),
+            is_dataset_editor=Exists(
+                Dataset.editors.through.objects.filter(
+                    dataset_id=dataset, user_id=user_id
+                )
+            ),
+            is_dataset_admin=Exists(
+                Dataset.admins.through.objects.filter(
+                    dataset_id=dataset, user_id=user_id
+                )
+            ),
+        )
+        .values(
+            "author_id",
+            "visibility",
+            "parent_dataset__visibility",
+            "is_project_member",
+            "is_viewer",
+            "is_editor",
+            "is_dataset_viewer",
+            "is_dataset_editor",
+            "is_dataset_admin",
+        )
+        .first()
+    )
+    if row is None:
+        return None
+
+    return ScanReportRoleSet.from_flags(
+        {
+            ScanReportRole.PROJECT_MEMBER: row["is_project_member"],
+            ScanReportRole.AUTHOR: user_id is not None and row["author_id"] == user_id,
+            ScanReportRole.VIEWER: row["is_viewer"],
+            ScanReportRole.EDITOR: row["is_editor"],
+            ScanReportRole.DATASET_VIEWER: row["is_dataset_viewer"],
+            ScanReportRole.DATASET_EDITOR: row["is_dataset_editor"],
+            ScanReportRole.DATASET_ADMIN: row["is_dataset_admin"],
+        },
+        visibility=row["visibility"],
+        dataset_visibility=row["parent_dataset__visibility"],
+    )
+
+
+def invalidate_scan_report_access() -> None:
+    """
+    Invalidate every cached scan report access decision by bumping the cache
+    version, so membership or visibility changes take effect immediately.
+    """
+    try:
+        cache.incr(ACCESS_CACHE_VERSION_KEY)
+    except ValueError:
+        cache.add(ACCESS_CACHE_VERSION_KEY, 1, timeout=None)
+
+
+def get_scan_report_access(
+    obj: Any, user: User, request: Optional[Request] = None
+) -> Optional[ScanReportRoleSet]:
+    """Resolve a user's access to the scan report `obj` is, or belongs to.
+
+    The answer is computed with one query, then reused for the rest of the request
+    and cached per user for `PERMISSIONS_CACHE_TIMEOUT` seconds.
+
+    Args:
+        obj (Any): A ScanReport, or a scan report table|field|value.
+        user (User): The user to resolve access for.
+        request (Optional[Request]): The request to memoise the answer on.
+
+    Returns:
+        Optional[ScanReportRoleSet]: The user's access, or `None` if `obj` is not a
+        scan report or related object.
+    """
+    get_scan_report_id = SCAN_REPORT_ID_QUERIES.get(type(obj))
+    if get_scan_report_id is None:
+        return None
+    try:
+        scan_report_id = get_scan_report_id(obj)
+    except (ScanReportTable.DoesNotExist, ScanReportField.DoesNotExist):
+        return None
+
+    version = cache.get(ACCESS_CACHE_VERSION_KEY, 0)
+    key = f"permissions:scan_report_access:{version}:{scan_report_id}:{user.id}"
+
+    per_request = None
+    if request is not None:
+        per_request = getattr(request, REQUEST_ACCESS_ATTR, None)
+        if per_request is None:
+            per_request = {}
+            setattr(request, REQUEST_ACCESS_ATTR, per_request)
+        if key in per_request:
+            return per_request[key]
+
+    access = cache.get(key)
+    if access is None:
+        access = _query_scan_report_roles(scan_report_id, user.id)
+        if access is not None and user.id is not None:
+            cache.set(key, access, timeout=ACCESS_CACHE_TIMEOUT)
+
+    if per_request is not None:
+        per_request[key] = access
+    return access
+
 
 def is_az_function_user(user: User) -> bool:
     """Check of the user is the `AZ_FUNCTION_USER`
@@ -49,21 +280,8 @@ def is_scan_report_author(obj: Any, request: Request) -> bool:
     Returns:
         bool: `True` if the request's user is the author of the scan report, else `False`.
     """
-    try:
-        # If `obj` is a scan report table|field|value, get the scan report
-        # it belongs to and check the user has permission to view it.
-        if sub_scan_report_query := SCAN_REPORT_QUERIES.get(type(obj)):
-            sub_scan_report = sub_scan_report_query(obj)
-        else:
-            sub_scan_report = obj
-
-        # Check if the user is the author
-        if isinstance(sub_scan_report, ScanReport):
-            return sub_scan_report.author.id == request.user.id
-        else:
-            return False
-    except Exception:
-        return False
+    access = get_scan_report_access(obj, request.user, request)
+    return access is not None and access.is_author
 
 
 def has_viewership(obj: Any, request: Request) -> bool:
@@ -86,119 +304,14 @@ def has_viewership(obj: Any, request: Request) -> bool:
             project__members__id=request.user.id,
             id=x.id,
         ).exists(),
-        ScanReport: lambda x: ScanReport.objects.filter(
-            # parent dataset and SR are public checks
-            Q(
-                # parent dataset and SR are public
-                parent_dataset__visibility=VisibilityChoices.PUBLIC,
-                visibility=VisibilityChoices.PUBLIC,
-            )
-            # parent dataset is public but SR restricted checks
-            | Q(
-                # parent dataset is public
-                # SR is restricted and user is in SR viewers
-                parent_dataset__visibility=VisibilityChoices.PUBLIC,
-                viewers=request.user.id,
-                visibility=VisibilityChoices.RESTRICTED,
-            )
-            | Q(
-                # parent dataset is public
-                # SR is restricted and user is in SR editors
-                parent_dataset__visibility=VisibilityChoices.PUBLIC,
-                editors=request.user.id,
-                visibility=VisibilityChoices.RESTRICTED,
-            )
-            | Q(
-                # parent dataset is public
-                # SR is restricted and user is SR author
-                parent_dataset__visibility=VisibilityChoices.PUBLIC,
-                author=request.user.id,
-                visibility=VisibilityChoices.RESTRICTED,
-            )
-            | Q(
-                # parent dataset is public
-                # SR is restricted and user is in parent dataset editors
-                parent_dataset__visibility=VisibilityChoices.PUBLIC,
-                parent_dataset__editors=request.user.id,
-                visibility=VisibilityChoices.RESTRICTED,
-            )
-            | Q(
-                # parent dataset is public
-                # SR is restricted and user is in parent dataset admins
-                parent_dataset__visibility=VisibilityChoices.PUBLIC,
-                parent_dataset__admins=request.user.id,
-                visibility=VisibilityChoices.RESTRICTED,
-            )
-            # parent dataset and SR are restricted checks
-            | Q(
-                # parent dataset and SR are restricted
-                # user is in SR viewers
-                parent_dataset__visibility=VisibilityChoices.RESTRICTED,
-                viewers=request.user.id,
-                visibility=VisibilityChoices.RESTRICTED,
-            )
-            | Q(
-                # parent dataset and SR are restricted
-                # user is in SR editors
-                parent_dataset__visibility=VisibilityChoices.RESTRICTED,
-                editors=request.user.id,
-                visibility=VisibilityChoices.RESTRICTED,
-            )
-            | Q(
-                # parent dataset and SR are restricted
-                # user is SR author
-                parent_dataset__visibility=VisibilityChoices.RESTRICTED,
-                author=request.user.id,
-                visibility=VisibilityChoices.RESTRICTED,
-            )
-            | Q(
-                # parent dataset and SR are restricted
-                # user is in parent dataset admins
-                parent_dataset__visibility=VisibilityChoices.RESTRICTED,
-                parent_dataset__admins=request.user.id,
-                visibility=VisibilityChoices.RESTRICTED,
-            )
-            | Q(
-                # parent dataset and SR are restricted
-                # user is in parent dataset editors
-                parent_dataset__visibility=VisibilityChoices.RESTRICTED,
-                parent_dataset__editors=request.user.id,
-                visibility=VisibilityChoices.RESTRICTED,
-            )
-            # parent dataset is restricted but SR is public checks
-            | Q(
-                # parent dataset is restricted and SR public
-                # user is in parent dataset editors
-                parent_dataset__visibility=VisibilityChoices.RESTRICTED,
-                parent_dataset__editors=request.user.id,
-                visibility=VisibilityChoices.PUBLIC,
-            )
-            | Q(
-                # parent dataset is restricted and SR public
-                # user is in parent dataset admins
-                parent_dataset__visibility=VisibilityChoices.RESTRICTED,
-                parent_dataset__admins=request.user.id,
-                visibility=VisibilityChoices.PUBLIC,
-            )
-            | Q(
-                # parent dataset is restricted and SR public
-                # user is in parent dataset viewers
-                parent_dataset__visibility=VisibilityChoices.RESTRICTED,
-                parent_dataset__viewers=request.user.id,
-                visibility=VisibilityChoices.PUBLIC,
-            ),
-            parent_dataset__project__members=request.user.id,
-            id=x.id,
-        ).exists(),
     }
 
-    # If `obj` is a scan report table|field|value, get the scan report
-    # it belongs to and check the user has permission to view it.
-    if sub_scan_report := SCAN_REPORT_QUERIES.get(type(obj)):
-        sub_scan_report = sub_scan_report(obj)
-        return checks.get(type(sub_scan_report))(sub_scan_report)
+    # If `obj` is a scan report or its table|field|value, check the user's
+    # access to the scan report.
+    if access := get_scan_report_access(obj, request.user, request):
+        return access.can_view
 
-    # If `obj` is a dataset or scan report, check the user can view it.
+    # If `obj` is a dataset, check the user can view it.
     if permission_check := checks.get(type(obj)):
         return permission_check(obj)
 
@@ -220,21 +333,14 @@ def has_editorship(obj: Any, request: Request) -> bool:
         Dataset: lambda x: Dataset.objects.filter(
             project__members__id=request.user.id, editors__id=request.user.id, id=x.id
         ).exists(),
-        ScanReport: lambda x: ScanReport.objects.filter(
-            Q(parent_dataset__editors__id=request.user.id)
-            | Q(editors__id=request.user.id),
-            parent_dataset__project__members__id=request.user.id,
-            id=x.id,
-        ).exists(),
     }
 
-    # If `obj` is a scan report table|field|value, get the scan report
-    # it belongs to and check the user has permission to edit it.
-    if sub_scan_report := SCAN_REPORT_QUERIES.get(type(obj)):
-        sub_scan_report = sub_scan_report(obj)
-        return checks.get(type(sub_scan_report))(sub_scan_report)
+    # If `obj` is a scan report or its table|field|value, check the user's
+    # access to the scan report.
+    if access := get_scan_report_access(obj, request.user, request):
+        return access.is_editor
 
-    # If `obj` is a dataset or scan report, check the user can edit it.
+    # If `obj` is a dataset, check the user can edit it.
     if permission_check := checks.get(type(obj)):
         return permission_check(obj)
 
@@ -251,27 +357,10 @@ def can_edit(obj: Any, user: User) -> bool:
     Returns:
         bool: `True` if the request's user has permission, else `False`.
     """
-    # Permission checks to perform
-    checks = {
-        ScanReport: lambda x: ScanReport.objects.filter(
-            Q(parent_dataset__editors__id=user.id)
-            | Q(parent_dataset__admins__id=user.id)
-            | Q(editors__id=user.id)
-            | Q(author__id=user.id),
-            parent_dataset__project__members__id=user.id,
-            id=x.id,
-        ).exists(),
-    }
-
-    # If `obj` is a scan report table|field|value, get the scan report
-    # it belongs to and check the user has permission to edit it.
-    if sub_scan_report := SCAN_REPORT_QUERIES.get(type(obj)):
-        sub_scan_report = sub_scan_report(obj)
-        return checks.get(type(sub_scan_report))(sub_scan_report)
-
-    # If `obj` is a dataset or scan report, check the user can edit it.
-    if permission_check := checks.get(type(obj)):
-        return permission_check(obj)
+    # If `obj` is a scan report or its table|field|value, check the user's
+    # access to the scan report.
+    if access := get_scan_report_access(obj, user):
+        return access.can_edit
 
     return False
 
@@ -291,21 +380,14 @@ def is_admin(obj: Any, request: Request) -> bool:
         Dataset: lambda x: Dataset.objects.filter(
             project__members__id=request.user.id, admins__id=request.user.id, id=x.id
         ).exists(),
-        ScanReport: lambda x: ScanReport.objects.filter(
-            Q(parent_dataset__admins__id=request.user.id)
-            | Q(author__id=request.user.id),
-            parent_dataset__project__members__id=request.user.id,
-            id=x.id,
-        ).exists(),
     }
 
-    # If `obj` is a scan report table|field|value, get the scan report
-    # it belongs to and check the user has permission to edit it.
-    if sub_scan_report := SCAN_REPORT_QUERIES.get(type(obj)):
-        sub_scan_report = sub_scan_report(obj)
-        return checks.get(type(sub_scan_report))(sub_scan_report)
+    # If `obj` is a scan report or its table|field|value, check the user's
+    # access to the scan report.
+    if access := get_scan_report_access(obj, request.user, request):
+        return access.is_admin
 
-    # If `obj` is a dataset or scan report, check the user can edit it.
+    # If `obj` is a dataset, check the user is an admin.
     if permission_check := checks.get(type(obj)):
         return permission_check(obj)
 
@@ -4,7 +4,7 @@ import os
 import random
 import string
 
-from azure.storage.blob import BlobServiceClient, ContentSettings
+from azure.storage.blob import ContentSettings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import PasswordChangeForm, PasswordResetForm
@@ -41,6 +41,7 @@ from shared.services.rules_export import (
     get_mapping_rules_json,
     make_dag,
 )
+from shared.services.storage import get_blob_service_client
 
 from .forms import ScanReportAssertionForm, ScanReportForm
 from .permissions import has_editorship, has_viewership, is_admin
@@ -234,10 +235,8 @@ class ScanReportFormView(FormView):
         if sr_editors := form.cleaned_data.get("editors"):
             scan_report.editors.add(*sr_editors)
 
-        # Grab Azure storage credentials
-        blob_service_client = BlobServiceClient.from_connection_string(
-            os.getenv("STORAGE_CONN_STRING")
-        )
+        # Grab the pooled Azure storage client
+        blob_service_client = get_blob_service_client()
 
         print("FILE >>> ", str(form.cleaned_data.get("scan_report_file")))
         print("STRING TEST >>>> ", scan_report.name)
@@ -534,7 +533,7 @@ def scanreport_values_list_page(request, sr, tbl, pk):
     try:
         scan_report_field = ScanReportField.objects.select_related(
             "scan_report_table", "scan_report_table__scan_report"
-        ).get(id=pk, scan_report_table=tbl, scan_report_table__scan_report=sr)
+        ).get(id=pk, scan_report_table=tbl, scan_report=sr)
 
         args["pk"] = pk
         args["can_edit"] = has_editorship(scan_report_field, request) or is_admin(
@@ -559,7 +558,7 @@ def update_scanreport_field_page(request, sr, tbl, pk):
     try:
         scan_report_field = ScanReportField.objects.select_related(
             "scan_report_table", "scan_report_table__scan_report"
-        ).get(id=pk, scan_report_table=tbl, scan_report_table__scan_report=sr)
+        ).get(id=pk, scan_report_table=tbl, scan_report=sr)
 
         args["can_edit"] = has_editorship(scan_report_field, request) or is_admin(
             scan_report_field, request
@@ -0,0 +1,208 @@
+from collections import defaultdict
+from typing import Iterable, Optional
+
+from django.apps import apps as global_apps
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Model, Q
+from shared.mapping.models import (
+    Dataset,
+    Project,
+    ScanReport,
+    ScanReportRole,
+)
+from shared.mapping.permissions import ScanReportRoleSet
+
+BATCH_SIZE = 1000
+
+
+def _group(pairs: Iterable[tuple[int, int]]) -> defaultdict[int, set[int]]:
+    grouped = defaultdict(set)
+    for key, value in pairs:
+        grouped[key].add(value)
+    return grouped
+
+
+def _through_pairs(through: type[Model], key: str, ids: set[int]):
+    return through.objects.filter(**{f"{key}__in": ids}).values_list(key, "user_id")
+
+
+def build_scan_report_access(
+    scan_report_ids: Iterable[int], apps=global_apps
+) -> list[tuple[int, int, str]]:
+    """Compute the `(user_id, scan_report_id, role)` rows for some scan reports.
+
+    Memberships are fetched in bulk for the whole batch, then each user's roles are
+    resolved with the same rules as the permission checks.
+
+    Args:
+        scan_report_ids (Iterable[int]): The scan reports to compute access for.
+        apps: The app registry to load models from, so migrations can use this too.
+
+    Returns:
+        list[tuple[int, int, str]]: The access rows.
+    """
+    ScanReport = apps.get_model("mapping", "ScanReport")
+    Dataset = apps.get_model("mapping", "Dataset")
+    Project = apps.get_model("mapping", "Project")
+
+    scan_reports = list(
+        ScanReport.objects.filter(id__in=scan_report_ids).values_list(
+            "id",
+            "author_id",
+            "visibility",
+            "parent_dataset_id",
+            "parent_dataset__visibility",
+        )
+    )
+    scan_report_ids = {row[0] for row in scan_reports}
+    dataset_ids = {row[3] for row in scan_reports if row[3] is not None}
+
+    projects_by_dataset = _group(
+        Project.datasets.through.objects.filter(dataset_id__in=dataset_ids).values_list(
+            "dataset_id", "project_id"
+        )
+    )
+    project_ids = set().union(*projects_by_dataset.values())
+    members_by_project = _group(
+        _through_pairs(Project.members.through, "project_id", project_ids)
+    )
+    dataset_viewers = _group(
+        _through_pairs(Dataset.viewers.through, "dataset_id", dataset_ids)
+    )
+    dataset_editors = _group(
+        _through_pairs(Dataset.editors.through, "dataset_id", dataset_ids)
+    )
+    dataset_admins = _group(
+        _through_pairs(Dataset.admins.through, "dataset_id", dataset_ids)
+    )
+    viewers = _group(
+        _through_pairs(ScanReport.viewers.through, "scanreport_id", scan_report_ids)
+    )
+    editors = _group(
+        _through_pairs(ScanReport.editors.through, "scanreport_id", scan_report_ids)
+    )
+
+    rows = []
+    for id, author_id, visibility, dataset_id, dataset_visibility in scan_reports:
+        members = set().union(
+            *(members_by_project[p] for p in projects_by_dataset[dataset_id])
+        )
+        role_holders = (
+            viewers[id]
+            | editors[id]
+            | dataset_viewers[dataset_id]
+            | dataset_editors[dataset_id]
+            | dataset_admins[dataset_id]
+            | ({author_id} if author_id is not None else set())
+        )
+
+        # Members without any other role all share the same permissions
+        member_permissions = ScanReportRoleSet.from_flags(
+            {ScanReportRole.PROJECT_MEMBER: True}, visibility, dataset_visibility
+        ).permissions()
+        for user_id in members - role_holders:
+            rows.extend((user_id, id, permission) for permission in member_permissions)
+
+        for user_id in role_holders:
+            roles = ScanReportRoleSet.from_flags(
+                {
+                    ScanReportRole.PROJECT_MEMBER: user_id in members,
+                    ScanReportRole.AUTHOR: user_id == author_id,
+                    ScanReportRole.VIEWER: user_id in viewers[id],
+                    ScanReportRole.EDITOR: user_id in editors[id],
+                    ScanReportRole.DATASET_VIEWER: user_id
+                    in dataset_viewers[dataset_id],
+                    ScanReportRole.DATASET_EDITOR: user_id
+                    in dataset_editors[dataset_id],
+                    ScanReportRole.DATASET_ADMIN: user_id in dataset_admins[dataset_id],
+                },
+                visibility=visibility,
+                dataset_visibility=dataset_visibility,
+            )
+            rows.extend((user_id, id, permission) for permission in roles.permissions())
+    return rows
+
+
+def refresh_scan_report_access(
+    scan_report_ids: Optional[Iterable[int]] = None,
+    apps=global_apps,
+    batch_size: int = BATCH_SIZE,
+) -> None:
+    """Rebuild the access rows for some scan reports, or for all of them.
+
+    Args:
+        scan_report_ids (Optional[Iterable[int]]): The scan reports to refresh.
+            Refreshes every scan report if `None`.
+        apps: The app registry to load models from, so migrations can use this too.
+        batch_size (int): How many scan reports to rebuild at a time.
+
+    Returns:
+        None
+    """
+    ScanReport = apps.get_model("mapping", "ScanReport")
+    ScanReportAccess = apps.get_model("mapping", "ScanReportAccess")
+
+    if scan_report_ids is None:
+        ids = list(ScanReport.objects.order_by("id").values_list("id", flat=True))
+    else:
+        ids = sorted(set(scan_report_ids))
+
+    with transaction.atomic():
+        if scan_report_ids is None:
+            ScanReportAccess.objects.all().delete()
+        for start in range(0, len(ids), batch_size):
+            batch = ids[start : start + batch_size]
+            if scan_report_ids is not None:
+                ScanReportAccess.objects.filter(scan_report_id__in=batch).delete()
+            ScanReportAccess.objects.bulk_create(
+                (
+                    ScanReportAccess(user_id=user_id, scan_report_id=id, role=role)
+                    for user_id, id, role in build_scan_report_access(batch, apps)
+                ),
+                batch_size=batch_size,
+                ignore_conflicts=True,
+            )
+
+
+def scan_reports_for(model: type[Model], ids: Optional[Iterable[int]]) -> set[int]:
+    """Get the scan reports whose access depends on some Projects, Datasets,
+    Scan Reports or Users.
+
+    Args:
+        model (type[Model]): The model `ids` belong to.
+        ids (Optional[Iterable[int]]): The IDs of the objects.
+
+    Returns:
+        set[int]: The scan report IDs.
+    """
+    ids = set(ids or [])
+    if not ids:
+        return set()
+    if issubclass(model, ScanReport):
+        return ids
+    if issubclass(model, Dataset):
+        query = Q(parent_dataset__in=ids)
+    elif issubclass(model, Project):
+        query = Q(parent_dataset__project__in=ids)
+    elif issubclass(model, get_user_model()):
+        # Union several narrow queries rather than one wide join
+        lookups = [
+            "author__in",
+            "viewers__in",
+            "editors__in",
+            "parent_dataset__viewers__in",
+            "parent_dataset__editors__in",
+            "parent_dataset__admins__in",
+            "parent_dataset__project__members__in",
+            "access__user__in",
+        ]
+        return set().union(
+            *(
+                ScanReport.objects.filter(**{lookup: ids}).values_list("id", flat=True)
+                for lookup in lookups
+            )
+        )
+    else:
+        return set()
+    return set(ScanReport.objects.filter(query).values_list("id", flat=True))
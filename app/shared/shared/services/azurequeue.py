@@ -1,9 +1,267 @@
 import base64
 import json
+import logging
 import os
-from typing import Any, Dict, Optional
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from azure.storage.queue import QueueClient
+from shared.services.storage import get_queue_client
+
+logger = logging.getLogger(__name__)
+
+
+def encode_message(message: Dict[str, Any]) -> str:
+    """
+    Encode a message as base64 JSON, as the queue triggers of the workers expect.
+
+    Args:
+        - message (Dict[str, Any]): The message to encode.
+
+    Returns:
+        - str: The encoded message.
+    """
+    return base64.b64encode(json.dumps(message).encode("utf-8")).decode("utf-8")
+
+
+class QueueTransport:
+    """
+    Sends encoded messages to a queue. Subclasses implement a kind of queue.
+    """
+
+    def send(self, queue_name: str, message: str) -> None:
+        raise NotImplementedError
+
+
+class AzureQueueTransport(QueueTransport):
+    """
+    Sends messages to Azure Storage Queues, over the process's pooled clients.
+    Failed connections, throttling and server errors are retried by the clients'
+    retry policy.
+
+    Args:
+        - conn_str (str, optional): The connection string for Azure Storage. If not provided, it will be retrieved from environment variables.
+    """
+
+    def __init__(self, conn_str: Optional[str] = None):
+        self.conn_str = conn_str
+
+    def send(self, queue_name: str, message: str) -> None:
+        get_queue_client(queue_name, self.conn_str).send_message(message)
+
+
+@dataclass
+class LocalQueueMessage:
+    """
+    A message received from a `SQLiteQueueTransport`, with the parts of
+    `azure.functions.QueueMessage` the workers use.
+    """
+
+    id: int
+    body: bytes
+    dequeue_count: int = 1
+
+    def get_body(self) -> bytes:
+        return self.body
+
+
+class SQLiteQueueTransport(QueueTransport):
+    """
+    Queues messages in a SQLite database, so the API and workers can be run and
+    measured locally without Azure Storage or Azurite.
+
+    Use `:memory:` for a queue that only lives in the process.
+
+    Args:
+        - path (str): The path of the SQLite database.
+    """
+
+    _instances: Dict[str, "SQLiteQueueTransport"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS queue_message ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "queue_name TEXT NOT NULL, "
+            "message TEXT NOT NULL)"
+        )
+        self._connection.commit()
+
+    @classmethod
+    def get(cls, path: str) -> "SQLiteQueueTransport":
+        """
+        Get the process's transport for a database, so `:memory:` queues are shared.
+        """
+        with cls._instances_lock:
+            if path not in cls._instances:
+                cls._instances[path] = cls(path)
+            return cls._instances[path]
+
+    def send(self, queue_name: str, message: str) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT INTO queue_message (queue_name, message) VALUES (?, ?)",
+                (queue_name, message),
+            )
+
+    def receive(
+        self, queue_name: str, max_messages: int = 32
+    ) -> List[LocalQueueMessage]:
+        """
+        Remove and return the oldest messages on a queue, decoded as a worker's
+        queue trigger would receive them.
+
+        Args:
+            - queue_name (str): The name of the queue.
+            - max_messages (int): The most messages to return.
+
+        Returns:
+            - List[LocalQueueMessage]: The messages, oldest first.
+        """
+        with self._lock, self._connection:
+            rows = self._connection.execute(
+                "SELECT id, message FROM queue_message WHERE queue_name = ? "
+                "ORDER BY id LIMIT ?",
+                (queue_name, max_messages),
+            ).fetchall()
+            self._connection.executemany(
+                "DELETE FROM queue_message WHERE id = ?", [(id,) for id, _ in rows]
+            )
+        return [
+            LocalQueueMessage(id=id, body=base64.b64decode(message))
+            for id, message in rows
+        ]
+
+
+def get_queue_transport(conn_str: Optional[str] = None) -> QueueTransport:
+    """
+    Get the transport to send messages with. This is a `SQLiteQueueTransport` if
+    `LOCAL_QUEUE_PATH` is set, otherwise an `AzureQueueTransport`.
+
+    Args:
+        - conn_str (str, optional): The connection string for Azure Storage. If not provided, it will be retrieved from environment variables.
+
+    Returns:
+        - QueueTransport: The transport.
+    """
+    if local_queue_path := os.environ.get("LOCAL_QUEUE_PATH"):
+        return SQLiteQueueTransport.get(local_queue_path)
+    return AzureQueueTransport(conn_str)
+
+
+class QueuePublisher:
+    """
+    Publishes messages to a queue in batches.
+
+    Messages are buffered and sent a batch at a time, concurrently over the
+    transport's shared client. Retrying is left to the transport, e.g. the retry
+    policy of the Azure clients. Messages that could not be sent stay buffered,
+    so a later flush sends them again. Use as a context manager to send any
+    remaining messages on exit.
+
+    Args:
+        - queue_name (str): The name of the queue.
+        - transport (QueueTransport, optional): The transport to send messages with. Defaults to `get_queue_transport()`.
+        - batch_size (int): How many messages to buffer before sending them.
+        - max_concurrency (int): How many messages to send at once.
+    """
+
+    def __init__(
+        self,
+        queue_name: str,
+        transport: Optional[QueueTransport] = None,
+        batch_size: int = 32,
+        max_concurrency: int = 8,
+    ):
+        self.queue_name = queue_name
+        self.transport = transport or get_queue_transport()
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.sent = 0
+        # Each message with its encoding
+        self._buffer: List[Tuple[Dict[str, Any], str]] = []
+
+    def __enter__(self) -> "QueuePublisher":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.flush()
+
+    @property
+    def pending(self) -> int:
+        """
+        The number of messages buffered but not yet sent.
+        """
+        return len(self._buffer)
+
+    @property
+    def unsent(self) -> List[Dict[str, Any]]:
+        """
+        The messages buffered but not yet sent, in order.
+        """
+        return [message for message, _ in self._buffer]
+
+    def publish(self, message: Dict[str, Any]) -> None:
+        """
+        Add a message to the batch, sending the batch if it is full.
+
+        Args:
+            - message (Dict[str, Any]): The message to publish.
+        """
+        self._buffer.append((message, encode_message(message)))
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def publish_many(self, messages: Iterable[Dict[str, Any]]) -> None:
+        """
+        Add several messages, sending each batch as it fills.
+
+        Args:
+            - messages (Iterable[Dict[str, Any]]): The messages to publish.
+        """
+        for message in messages:
+            self.publish(message)
+
+    def flush(self) -> None:
+        """
+        Send the buffered messages. Those that fail stay buffered, in order.
+
+        Raises:
+            - Exception: The error of the first message that could not be sent.
+        """
+        if not self._buffer:
+            return
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            futures = [
+                executor.submit(self.transport.send, self.queue_name, encoded)
+                for _, encoded in self._buffer
+            ]
+        failed = [
+            (buffered, future.exception())
+            for buffered, future in zip(self._buffer, futures)
+            if future.exception() is not None
+        ]
+        sent = len(self._buffer) - len(failed)
+        self._buffer = [buffered for buffered, _ in failed]
+        self.sent += sent
+        logger.debug(
+            "Sent %d messages to %s in %.3fs",
+            sent,
+            self.queue_name,
+            time.perf_counter() - start,
+        )
+        if failed:
+            raise failed[0][1]
 
 
 def add_message(
@@ -15,11 +273,13 @@ def add_message(
     """
     Add a message to the specified Azure Storage Queue.
 
+    To send many messages, use a `QueuePublisher`.
+
     Args:
         - queue_name (str): The name of the Azure Storage Queue.
         - message (Dict[str, Any]): The message to be added to the queue.
         - conn_str (str, optional): The connection string for Azure Storage. If not provided, it will be retrieved from environment variables.
-        - queue_client (QueueClient, optional): The QueueClient instance. If not provided, it will be created internally.
+        - queue_client (QueueClient, optional): The QueueClient instance. If not provided, the message is sent with `get_queue_transport()`.
 
     Returns:
         - None
@@ -27,20 +287,9 @@ def add_message(
     Raises:
         - ValueError: If no connection string can be found.
     """
-    # Encode the message
-    queue_message = json.dumps(message)
-    message_bytes = queue_message.encode("utf-8")
-    base64_message = base64.b64encode(message_bytes).decode("utf-8")
-
-    # Get the connection string
-    if conn_str is None:
-        conn_str = os.environ.get("STORAGE_CONN_STRING")
-    if not conn_str:
-        raise ValueError("Storage connection string is not provided.")
+    base64_message = encode_message(message)
 
     if queue_client is None:
-        queue_client = QueueClient.from_connection_string(
-            conn_str=conn_str, queue_name=queue_name
-        )
-
-    queue_client.send_message(base64_message)
+        get_queue_transport(conn_str).send(queue_name, base64_message)
+    else:
+        queue_client.send_message(base64_message)
@@ -0,0 +1,106 @@
+from io import StringIO
+from typing import Iterable, List, Optional, Type, TypeVar
+
+from django.db import connections, models, router, transaction
+
+M = TypeVar("M", bound=models.Model)
+
+
+def _escape(value) -> str:
+    """
+    Format a value for the text format of `COPY`.
+    """
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def _copy_insert(model: Type[M], objs: List[M], using: str) -> None:
+    connection = connections[using]
+    meta = model._meta
+    fields = meta.concrete_fields
+
+    with connection.cursor() as cursor:
+        # Reserve primary keys from the table's sequence, so the rows can be
+        # referenced once inserted as they would be after `bulk_create`.
+        missing_pk = [obj for obj in objs if obj.pk is None]
+        if missing_pk:
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, %s)) "
+                "FROM generate_series(1, %s)",
+                [meta.db_table, meta.pk.column, len(missing_pk)],
+            )
+            for obj, (id,) in zip(missing_pk, cursor.fetchall()):
+                obj.pk = id
+
+        buffer = StringIO()
+        for obj in objs:
+            buffer.write(
+                "\t".join(
+                    _escape(
+                        field.get_db_prep_save(
+                            field.pre_save(obj, add=True), connection
+                        )
+                    )
+                    for field in fields
+                )
+            )
+            buffer.write("\n")
+        buffer.seek(0)
+
+        columns = ", ".join(connection.ops.quote_name(f.column) for f in fields)
+        table = connection.ops.quote_name(meta.db_table)
+        # psycopg2's cursor, under Django's wrapper
+        cursor.cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN", buffer)
+
+    for obj in objs:
+        obj._state.adding = False
+        obj._state.db = using
+
+
+def bulk_insert(
+    model: Type[M],
+    objs: Iterable[M],
+    batch_size: Optional[int] = None,
+    using: Optional[str] = None,
+) -> List[M]:
+    """
+    Insert model instances in bulk, with `COPY` on PostgreSQL and `bulk_create`
+    on other databases.
+
+    `COPY` skips building an `INSERT` statement with parameters for every row,
+    which makes it several times faster for large inserts. As with `bulk_create`,
+    the instances have their primary keys set, and `save()` and signals are not
+    called. All the rows are inserted in one transaction.
+
+    Args:
+        model (Type[M]): The model to insert instances of.
+        objs (Iterable[M]): The instances to insert.
+        batch_size (Optional[int]): How many rows to insert at a time. Defaults to
+            all the rows in one `COPY`, or the database's limit for `bulk_create`.
+        using (Optional[str]): The database to insert into. Defaults to the
+            database the router writes the model to.
+
+    Returns:
+        List[M]: The inserted instances.
+    """
+    objs = list(objs)
+    using = using or router.db_for_write(model)
+    if not objs:
+        return objs
+    if connections[using].vendor != "postgresql":
+        return model.objects.using(using).bulk_create(objs, batch_size=batch_size)
+
+    batch_size = batch_size or len(objs)
+    with transaction.atomic(using=using):
+        for start in range(0, len(objs), batch_size):
+            _copy_insert(model, objs[start : start + batch_size], using)
+    return objs
@@ -0,0 +1,74 @@
+import time
+from typing import Optional
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from shared.mapping.models import (
+    ScanReportConcept,
+    ScanReportField,
+    ScanReportValue,
+)
+
+VERSION_KEY = "scan_report:{}:version"
+
+
+def get_scan_report_cache_version(scan_report_id: int) -> int:
+    """Get the cache version of a scan report's fields, values and concepts.
+
+    Cached responses include this version in their key, so bumping it invalidates
+    every response for the scan report at once.
+
+    Args:
+        scan_report_id (int): The ID of the scan report.
+
+    Returns:
+        int: The current version.
+    """
+    # Seed from the clock so a version lost to eviction never reuses an old key
+    return cache.get_or_set(
+        VERSION_KEY.format(scan_report_id), time.time_ns(), timeout=None
+    )
+
+
+def bump_scan_report_cache_version(scan_report_id: Optional[int]) -> None:
+    """Invalidate the cached responses of a scan report.
+
+    Args:
+        scan_report_id (Optional[int]): The ID of the scan report. Does nothing if
+            `None`.
+
+    Returns:
+        None
+    """
+    if scan_report_id is None:
+        return
+    try:
+        cache.incr(VERSION_KEY.format(scan_report_id))
+    except ValueError:
+        cache.set(VERSION_KEY.format(scan_report_id), time.time_ns(), timeout=None)
+
+
+def get_scan_report_id(
+    obj: ScanReportField | ScanReportValue | ScanReportConcept,
+) -> Optional[int]:
+    """Get the ID of the scan report a field, value or concept belongs to.
+
+    Args:
+        obj (ScanReportField | ScanReportValue | ScanReportConcept): The object.
+
+    Returns:
+        Optional[int]: The scan report ID, or `None` if it cannot be found.
+    """
+    # Fields and values carry their scan report, so this still works once `obj`
+    # has been deleted
+    if isinstance(obj, (ScanReportField, ScanReportValue)):
+        return obj.scan_report_id
+    if isinstance(obj, ScanReportConcept):
+        model = ContentType.objects.get_for_id(obj.content_type_id).model_class()
+        if model in (ScanReportField, ScanReportValue):
+            return (
+                model.objects.filter(id=obj.object_id)
+                .values_list("scan_report_id", flat=True)
+                .first()
+            )
+    return None
@@ -0,0 +1,145 @@
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple, TypeVar
+
+from django.db.models import Q
+from shared.data.models import Concept, ConceptRelationship
+
+# Large enough to keep round trips down, small enough to keep each IN list cheap
+LOOKUP_BATCH_SIZE = 1000
+LOOKUP_FIELDS = (
+    "concept_id",
+    "concept_name",
+    "concept_code",
+    "domain_id",
+    "vocabulary_id",
+    "concept_class_id",
+    "standard_concept",
+)
+
+T = TypeVar("T")
+
+
+def _batches(items: Sequence[T], size: int) -> Iterator[Sequence[T]]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def find_standard_concepts(concept_ids: Iterable[int]) -> Dict[int, List[int]]:
+    """
+    Find the standard concepts that each concept maps to via "Maps to"
+    relationships.
+
+    Concepts that map to themselves, and targets that are not standard, are
+    ignored.
+
+    Args:
+        concept_ids (Iterable[int]): The IDs of the concepts to resolve.
+
+    Returns:
+        Dict[int, List[int]]: The standard concept IDs each concept maps to, in the
+            order found and without duplicates. Concepts without any are left out.
+    """
+    relationships = [
+        (source, target)
+        for source, target in ConceptRelationship.objects.filter(
+            relationship_id="Maps to", concept_id_1__in=list(concept_ids)
+        ).values_list("concept_id_1", "concept_id_2")
+        if source != target
+    ]
+    if not relationships:
+        return {}
+
+    standard = set(
+        Concept.objects.filter(
+            concept_id__in={target for _, target in relationships},
+            standard_concept="S",
+        ).values_list("concept_id", flat=True)
+    )
+
+    standard_concepts: Dict[int, List[int]] = defaultdict(list)
+    for source, target in relationships:
+        if target in standard and target not in standard_concepts[source]:
+            standard_concepts[source].append(target)
+    return dict(standard_concepts)
+
+
+def _with_standard_concepts(concepts: List[Dict]) -> List[Dict]:
+    maps_to = find_standard_concepts(
+        concept["concept_id"]
+        for concept in concepts
+        if concept["standard_concept"] != "S"
+    )
+    for concept in concepts:
+        if concept["standard_concept"] == "S":
+            concept["standard_concept_ids"] = [concept["concept_id"]]
+        else:
+            concept["standard_concept_ids"] = maps_to.get(concept["concept_id"], [])
+    return concepts
+
+
+def lookup_concepts(
+    concept_ids: Iterable[int] = (),
+    codes: Iterable[Tuple[str, str]] = (),
+    batch_size: int = LOOKUP_BATCH_SIZE,
+) -> Iterator[Dict]:
+    """
+    Look up concepts by ID and by vocabulary and code, with the standard concepts
+    each resolves to.
+
+    Concepts are fetched a batch at a time, so results can be sent on as each
+    batch is resolved. A standard concept resolves to itself, any other to the
+    standard concepts it "Maps to".
+
+    Args:
+        concept_ids (Iterable[int]): The concept IDs to look up.
+        codes (Iterable[Tuple[str, str]]): The `(vocabulary_id, concept_code)`
+            pairs to look up.
+        batch_size (int): The number of IDs or pairs to look up in each query.
+
+    Returns:
+        Iterator[Dict]: A record for each distinct ID, then each distinct pair, in
+            the order given. Found concepts have `LOOKUP_FIELDS` and
+            `standard_concept_ids`. Those not found only have the keys they were
+            looked up by, and `"missing": True`.
+    """
+    for batch in _batches(list(dict.fromkeys(concept_ids)), batch_size):
+        found = {
+            concept["concept_id"]: concept
+            for concept in _with_standard_concepts(
+                list(
+                    Concept.objects.filter(concept_id__in=batch).values(*LOOKUP_FIELDS)
+                )
+            )
+        }
+        for concept_id in batch:
+            yield found.get(concept_id, {"concept_id": concept_id, "missing": True})
+
+    for batch in _batches(list(dict.fromkeys(codes)), batch_size):
+        by_vocabulary: Dict[str, List[str]] = defaultdict(list)
+        for vocabulary_id, concept_code in batch:
+            by_vocabulary[vocabulary_id].append(concept_code)
+        matches = Q()
+        for vocabulary_id, concept_codes in by_vocabulary.items():
+            matches |= Q(vocabulary_id=vocabulary_id, concept_code__in=concept_codes)
+
+        # A code is only unique within its vocabulary, and is rarely reused there
+        found: Dict[Tuple[str, str], List[Dict]] = defaultdict(list)
+        for concept in _with_standard_concepts(
+            list(
+                Concept.objects.filter(matches)
+                .order_by("concept_id")
+                .values(*LOOKUP_FIELDS)
+            )
+        ):
+            found[(concept["vocabulary_id"], concept["concept_code"])].append(concept)
+        for vocabulary_id, concept_code in batch:
+            yield from found.get(
+                (vocabulary_id, concept_code),
+                [
+                    {
+                        "vocabulary_id": vocabulary_id,
+                        "concept_code": concept_code,
+                        "missing": True,
+                    }
+                ],
+            )
@@ -0,0 +1,171 @@
+import re
+from typing import Dict, Iterable, List, Optional
+
+from django.contrib.postgres.expressions import ArraySubquery
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db.models import BooleanField, Count, F, Func, QuerySet
+from django.db.models.functions import Length
+from shared.data.models import Concept, ConceptSynonym
+
+# Without stemming or stop words, so clinical terms and codes are matched as typed
+SEARCH_CONFIG = "simple"
+FACET_FIELDS = ("domain_id", "vocabulary_id")
+
+CONCEPT_NAME_VECTOR = SearchVector("concept_name", config=SEARCH_CONFIG)
+SYNONYM_NAME_VECTOR = SearchVector("concept_synonym_name", config=SEARCH_CONFIG)
+
+# The OMOP vocabularies are loaded outside of migrations, so these are created
+# with the `concept_search_index` command. The query has to use the same
+# expressions for the indexes to be used.
+CONCEPT_SEARCH_INDEXES = [
+    (Concept, GinIndex(CONCEPT_NAME_VECTOR, name="concept_name_search_idx")),
+    (
+        ConceptSynonym,
+        GinIndex(SYNONYM_NAME_VECTOR, name="concept_synonym_name_search_idx"),
+    ),
+]
+
+
+def search_query(text: str) -> Optional[SearchQuery]:
+    """
+    Build a full-text query that matches every word of `text`, with the last
+    treated as a prefix so results can be shown as the user types.
+
+    Args:
+        text (str): The text to search for.
+
+    Returns:
+        Optional[SearchQuery]: The query, or `None` if `text` has no words.
+    """
+    words = re.findall(r"\w+", text.lower())
+    if not words:
+        return None
+    terms = [f"'{word}'" for word in words[:-1]] + [f"'{words[-1]}':*"]
+    return SearchQuery(" & ".join(terms), config=SEARCH_CONFIG, search_type="raw")
+
+
+def _filter_concepts(
+    queryset: QuerySet[Concept],
+    domains: Optional[Iterable[str]] = None,
+    vocabularies: Optional[Iterable[str]] = None,
+    standard_only: bool = False,
+) -> QuerySet[Concept]:
+    if domains:
+        queryset = queryset.filter(domain_id__in=domains)
+    if vocabularies:
+        queryset = queryset.filter(vocabulary_id__in=vocabularies)
+    if standard_only:
+        queryset = queryset.filter(standard_concept="S")
+    return queryset
+
+
+class _AnyOf(Func):
+    """
+    `expression = ANY(array)`. Postgres builds the array once and looks each
+    element up by index, where `IN (subquery)` is planned as a join that may scan
+    the whole table.
+    """
+
+    arg_joiner = " = ANY("
+    template = "%(expressions)s)"
+    output_field = BooleanField()
+
+
+def _matching_concepts(query: SearchQuery, synonyms: bool) -> QuerySet[Concept]:
+    concepts = Concept.objects.alias(name_vector=CONCEPT_NAME_VECTOR)
+    if not synonyms:
+        return concepts.filter(name_vector=query)
+    # Each is matched through its own index. Postgres cannot use the index on
+    # names for an OR of the two, so would compute the vector of every concept.
+    name_ids = concepts.filter(name_vector=query).values("concept_id")
+    synonym_ids = (
+        ConceptSynonym.objects.alias(name_vector=SYNONYM_NAME_VECTOR)
+        .filter(name_vector=query)
+        .values("concept_id")
+    )
+    return concepts.filter(
+        _AnyOf(F("concept_id"), ArraySubquery(name_ids.union(synonym_ids)))
+    )
+
+
+def search_concepts(
+    text: str,
+    domains: Optional[Iterable[str]] = None,
+    vocabularies: Optional[Iterable[str]] = None,
+    standard_only: bool = False,
+    synonyms: bool = True,
+) -> QuerySet[Concept]:
+    """
+    Search concepts by name, and optionally by their synonyms.
+
+    Concepts are ranked by how well their name matches, then shorter names first,
+    as the shortest match is usually the most general concept. Concepts that only
+    match by a synonym come after those that match by name.
+
+    Args:
+        text (str): The text to search for.
+        domains (Optional[Iterable[str]]): Only return concepts in these domains.
+        vocabularies (Optional[Iterable[str]]): Only return concepts in these
+            vocabularies.
+        standard_only (bool): Only return standard concepts.
+        synonyms (bool): Also match concepts by their synonyms.
+
+    Returns:
+        QuerySet[Concept]: The matching concepts, annotated with their `rank`.
+    """
+    query = search_query(text)
+    if query is None:
+        return Concept.objects.none()
+    queryset = _filter_concepts(
+        _matching_concepts(query, synonyms), domains, vocabularies, standard_only
+    )
+    return queryset.annotate(rank=SearchRank(F("name_vector"), query)).order_by(
+        "-rank", Length("concept_name"), "concept_id"
+    )
+
+
+def concept_facets(
+    text: str,
+    domains: Optional[Iterable[str]] = None,
+    vocabularies: Optional[Iterable[str]] = None,
+    standard_only: bool = False,
+    synonyms: bool = True,
+) -> Dict[str, List[Dict]]:
+    """
+    Count the concepts matching a search in each domain and vocabulary.
+
+    Each facet is counted with the other filters applied but not its own, so the
+    counts show how many results choosing another value would give.
+
+    Args:
+        text (str): The text to search for.
+        domains (Optional[Iterable[str]]): The domains being filtered by.
+        vocabularies (Optional[Iterable[str]]): The vocabularies being filtered by.
+        standard_only (bool): Whether only standard concepts are counted.
+        synonyms (bool): Also match concepts by their synonyms.
+
+    Returns:
+        Dict[str, List[Dict]]: For each facet, the values and their counts, most
+            common first.
+    """
+    query = search_query(text)
+    if query is None:
+        return {field: [] for field in FACET_FIELDS}
+    matches = _matching_concepts(query, synonyms)
+    filters = {
+        "domain_id": {"vocabularies": vocabularies},
+        "vocabulary_id": {"domains": domains},
+    }
+    return {
+        field: [
+            {"value": row[field], "count": row["count"]}
+            for row in _filter_concepts(
+                matches, standard_only=standard_only, **filters[field]
+            )
+            .values(field)
+            .annotate(count=Count("concept_id"))
+            .order_by("-count", field)
+        ]
+        for field in FACET_FIELDS
+    }
@@ -0,0 +1,136 @@
+import logging
+from typing import Callable, Dict, Optional
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+from django.db.models import QuerySet
+from shared.jobs.models import Job
+from shared.mapping.models import (
+    MappingRule,
+    ScanReport,
+    ScanReportConcept,
+    ScanReportField,
+    ScanReportTable,
+    ScanReportValue,
+)
+
+logger = logging.getLogger(__name__)
+
+DELETE_BATCH_SIZE = 10000
+DELETE_JOB_STAGE = "DELETE_SCAN_REPORT"
+
+
+def _delete_in_batches(
+    queryset: QuerySet,
+    batch_size: int,
+    on_batch: Optional[Callable[[int], None]] = None,
+) -> int:
+    """
+    Delete the rows of a queryset with `DELETE ... WHERE id IN (... LIMIT n)`
+    statements, each in its own transaction, until none are left.
+
+    Unlike `QuerySet.delete()`, rows are not loaded, and no signals are sent or
+    cascades followed, so rows that reference these must be deleted first.
+
+    Args:
+        queryset (QuerySet): The rows to delete.
+        batch_size (int): The most rows to delete in one statement.
+        on_batch (Optional[Callable[[int], None]]): Called with the number of
+            rows deleted so far after each batch.
+
+    Returns:
+        int: The number of rows deleted.
+    """
+    model = queryset.model
+    table = connection.ops.quote_name(model._meta.db_table)
+    pk = connection.ops.quote_name(model._meta.pk.column)
+    select, params = (
+        queryset.order_by().values_list("pk", flat=True)[:batch_size].query
+    ).sql_with_params()
+
+    total = 0
+    while True:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {table} WHERE {pk} IN ({select})", params)
+            deleted = cursor.rowcount
+        total += deleted
+        if on_batch is not None and deleted:
+            on_batch(total)
+        if deleted < batch_size:
+            return total
+
+
+def delete_scan_report(
+    scan_report_id: int,
+    batch_size: int = DELETE_BATCH_SIZE,
+    on_progress: Optional[Callable[[str, int], None]] = None,
+) -> Dict[str, int]:
+    """
+    Delete a scan report and everything in it.
+
+    `ScanReport.delete()` loads every table, field, value, concept and rule to
+    follow the cascades and send signals, which for a large scan report takes
+    minutes and a lot of memory. Instead, the rules, concepts, values, fields and
+    tables are deleted in that order with set-based statements in batches, and
+    then the scan report is deleted with the few rows left that reference it.
+
+    Deleting is resumable: if it is stopped, calling this again deletes the rest.
+    Jobs that record the deletion are kept, without their scan report.
+
+    Args:
+        scan_report_id (int): The ID of the scan report.
+        batch_size (int): The most rows to delete in one statement.
+        on_progress (Optional[Callable[[str, int], None]]): Called with what is
+            being deleted and how many have been deleted so far, after each batch.
+
+    Returns:
+        Dict[str, int]: The number of rows deleted of each kind.
+    """
+    field_type = ContentType.objects.get_for_model(ScanReportField)
+    value_type = ContentType.objects.get_for_model(ScanReportValue)
+    tables = ScanReportTable.objects.filter(scan_report_id=scan_report_id)
+    steps = [
+        ("rules", MappingRule.objects.filter(scan_report_id=scan_report_id)),
+        (
+            "value concepts",
+            ScanReportConcept.objects.filter(
+                content_type=value_type,
+                object_id__in=ScanReportValue.objects.filter(
+                    scan_report_id=scan_report_id
+                ).values("id"),
+            ),
+        ),
+        (
+            "field concepts",
+            ScanReportConcept.objects.filter(
+                content_type=field_type,
+                object_id__in=ScanReportField.objects.filter(
+                    scan_report_id=scan_report_id
+                ).values("id"),
+            ),
+        ),
+        ("values", ScanReportValue.objects.filter(scan_report_id=scan_report_id)),
+        ("table jobs", Job.objects.filter(scan_report_table__in=tables)),
+        ("fields", ScanReportField.objects.filter(scan_report_id=scan_report_id)),
+        ("tables", tables),
+    ]
+
+    counts = {}
+    for name, queryset in steps:
+        if name == "fields":
+            # Tables reference their person ID and date event fields
+            tables.update(person_id=None, date_event=None)
+
+        def on_batch(total: int, name: str = name) -> None:
+            if on_progress is not None:
+                on_progress(name, total)
+
+        counts[name] = _delete_in_batches(queryset, batch_size, on_batch)
+        logger.info(f"Deleted {counts[name]} {name} of scan report {scan_report_id}")
+
+    Job.objects.filter(
+        scan_report_id=scan_report_id, stage__value=DELETE_JOB_STAGE
+    ).update(scan_report=None)
+    _, deleted = ScanReport.objects.filter(id=scan_report_id).delete()
+    counts["scan reports"] = deleted.get(ScanReport._meta.label, 0)
+    return counts
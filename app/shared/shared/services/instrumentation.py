@@ -0,0 +1,185 @@
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+# The stages recorded by the innermost `record_stages`, if any
+_recorded_stages: ContextVar[Optional[List["StageMetrics"]]] = ContextVar(
+    "recorded_stages", default=None
+)
+
+
+def stage_metrics_enabled() -> bool:
+    """
+    Whether stages are measured. Set `STAGE_METRICS_ENABLED` to `false` to turn
+    measuring off, leaving `measure_stage` as a no-op.
+    """
+    return os.environ.get("STAGE_METRICS_ENABLED", "true").lower() not in (
+        "0",
+        "false",
+        "no",
+    )
+
+
+@dataclass
+class StageMetrics:
+    """
+    The wall time, database queries and row counts of a stage of a worker.
+
+    Attributes:
+        - name (str): The name of the stage.
+        - context (Dict[str, Any]): What the stage ran on, e.g. the table ID.
+        - seconds (float): The wall time of the stage.
+        - queries (int): How many queries the stage ran.
+        - query_seconds (float): The time spent running those queries.
+        - rows (Dict[str, int]): Counts of the rows the stage handled, by kind.
+    """
+
+    name: str
+    context: Dict[str, Any] = field(default_factory=dict)
+    seconds: float = 0.0
+    queries: int = 0
+    query_seconds: float = 0.0
+    rows: Dict[str, int] = field(default_factory=dict)
+
+    def add_rows(self, kind: str, count: int) -> None:
+        """
+        Count rows the stage handled.
+
+        Args:
+            - kind (str): What the rows are, e.g. "concepts".
+            - count (int): How many rows to add.
+        """
+        self.rows[kind] = self.rows.get(kind, 0) + count
+
+    def __call__(self, execute, sql, params, many, context):
+        # Used as an execute wrapper, to time each query on the connection
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.query_seconds += time.perf_counter() - start
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "stage": self.name,
+            **self.context,
+            "seconds": round(self.seconds, 6),
+            "queries": self.queries,
+            "query_seconds": round(self.query_seconds, 6),
+            "rows": self.rows,
+        }
+
+
+@contextmanager
+def measure_stage(name: str, **context: Any) -> Iterator[StageMetrics]:
+    """
+    Measure a stage of a worker: its wall time, and the number and time of the
+    queries it runs on this thread's database connection. Count the rows the
+    stage handles with `StageMetrics.add_rows`.
+
+    When the stage ends, its metrics are logged as a JSON record, and added to
+    the enclosing `record_stages`, if any.
+
+    Args:
+        - name (str): The name of the stage.
+        - **context: What the stage runs on, added to its log record.
+
+    Yields:
+        - StageMetrics: The metrics of the stage, filled in when it ends.
+    """
+    metrics = StageMetrics(name, context)
+    if not stage_metrics_enabled():
+        yield metrics
+        return
+
+    start = time.perf_counter()
+    try:
+        with connection.execute_wrapper(metrics):
+            yield metrics
+    finally:
+        metrics.seconds = time.perf_counter() - start
+        logger.info(json.dumps({"event": "stage_metrics", **metrics.as_dict()}))
+        recorded = _recorded_stages.get()
+        if recorded is not None:
+            recorded.append(metrics)
+
+
+@contextmanager
+def record_stages() -> Iterator[List[StageMetrics]]:
+    """
+    Collect the metrics of the stages measured within the block.
+
+    Yields:
+        - List[StageMetrics]: The metrics of each stage, in the order they ended.
+    """
+    stages: List[StageMetrics] = []
+    token = _recorded_stages.set(stages)
+    try:
+        yield stages
+    finally:
+        _recorded_stages.reset(token)
+
+
+def summarise_stages(stages: Iterable[Union[StageMetrics, Dict[str, Any]]]) -> str:
+    """
+    Summarise stage metrics in a line, totalling stages with the same name, e.g.
+    from each page of rules.
+
+    Args:
+        - stages (Iterable[StageMetrics | Dict[str, Any]]): The metrics, or their
+            `as_dict()`, e.g. as returned by an activity.
+
+    Returns:
+        - str: The summary.
+    """
+    totals: Dict[str, Dict[str, Any]] = {}
+    for stage in stages:
+        if isinstance(stage, StageMetrics):
+            stage = stage.as_dict()
+        total = totals.setdefault(
+            stage["stage"], {"seconds": 0.0, "queries": 0, "rows": {}}
+        )
+        total["seconds"] += stage["seconds"]
+        total["queries"] += stage["queries"]
+        for kind, count in stage["rows"].items():
+            total["rows"][kind] = total["rows"].get(kind, 0) + count
+
+    return "; ".join(
+        f"{name} {total['seconds']:.2f}s {total['queries']}q"
+        + "".join(f" {count} {kind}" for kind, count in total["rows"].items())
+        for name, total in totals.items()
+    )
+
+
+def details_with_stages(
+    details: str,
+    stages: Iterable[Union[StageMetrics, Dict[str, Any]]],
+    max_length: int = 256,
+) -> str:
+    """
+    Add a summary of stage metrics to the details of a job.
+
+    Args:
+        - details (str): The details of the job.
+        - stages (Iterable[StageMetrics | Dict[str, Any]]): The metrics to add.
+        - max_length (int): The most characters the details can hold.
+
+    Returns:
+        - str: The details, followed by the summary if there is one, cut to fit.
+    """
+    summary = summarise_stages(stages)
+    if summary:
+        details = f"{details} ({summary})"
+    if len(details) > max_length:
+        details = details[: max_length - 3] + "..."
+    return details
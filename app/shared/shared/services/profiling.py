@@ -0,0 +1,210 @@
+import cProfile
+import functools
+import logging
+import marshal
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class CProfileProfiler:
+    """
+    Profiles every call with `cProfile`. The profile is in the format of
+    `cProfile.Profile.dump_stats`, for `pstats` or tools such as snakeviz.
+    """
+
+    extension = ".prof"
+
+    def start(self) -> None:
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def stop(self) -> bytes:
+        self._profile.disable()
+        self._profile.create_stats()
+        return marshal.dumps(self._profile.stats)
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of the thread that starts it from a background thread, which
+    slows the profiled code far less than `cProfile`. The profile is in the
+    collapsed stack format of flamegraph.pl and speedscope, with a line per stack
+    and the number of times it was sampled.
+
+    Args:
+        - interval (float): The seconds between samples.
+    """
+
+    extension = ".folded"
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples: Counter = Counter()
+
+    def start(self) -> None:
+        self._thread_id = threading.get_ident()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._sample, name="sampling-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def _sample(self) -> None:
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                file = os.path.basename(code.co_filename)
+                stack.append(f"{code.co_name} ({file}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def stop(self) -> bytes:
+        self._stopped.set()
+        self._thread.join()
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self.samples.items()
+        ).encode("utf-8")
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, "").lower() in ("1", "true", "yes")
+
+
+def profiling_configured() -> bool:
+    """
+    Whether anything can be profiled: `PROFILING_ENABLED` is set, or
+    `PROFILING_SAMPLE_RATE` is above 0, or `PROFILING_TOKEN` is set, for callers
+    that take it to profile on demand.
+    """
+    return (
+        _env_flag("PROFILING_ENABLED")
+        or float(os.environ.get("PROFILING_SAMPLE_RATE", 0)) > 0
+        or bool(os.environ.get("PROFILING_TOKEN"))
+    )
+
+
+def start_profiler(force: bool = False):
+    """
+    Start a profiler, if this call should be profiled.
+
+    Calls are profiled if forced, if `PROFILING_ENABLED` is set, or otherwise at
+    random with probability `PROFILING_SAMPLE_RATE`. `PROFILING_MODE` chooses
+    the profiler, `cprofile` (the default) or `sampling`, which samples every
+    `PROFILING_INTERVAL` seconds.
+
+    Args:
+        - force (bool): Whether to profile regardless of the settings.
+
+    Returns:
+        - CProfileProfiler | SamplingProfiler | None: The started profiler, or None.
+    """
+    if not (
+        force
+        or _env_flag("PROFILING_ENABLED")
+        or random.random() < float(os.environ.get("PROFILING_SAMPLE_RATE", 0))
+    ):
+        return None
+
+    if os.environ.get("PROFILING_MODE", "cprofile") == "sampling":
+        profiler = SamplingProfiler(float(os.environ.get("PROFILING_INTERVAL", 0.005)))
+    else:
+        profiler = CProfileProfiler()
+    profiler.start()
+    return profiler
+
+
+def _slug(value: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.]+", "-", value).strip("-")[:100]
+
+
+def save_profile(
+    profile: bytes, source: str, identifier: str, extension: str
+) -> Optional[str]:
+    """
+    Save a profile to the blob container `PROFILING_CONTAINER` if it is set,
+    otherwise to the directory `PROFILING_DIR`, which defaults to `profiles` in
+    the temporary directory.
+
+    Profiles are named `<source>/<timestamp>-<identifier><extension>`. Failing to
+    save a profile is logged rather than raised, so it cannot fail the call that
+    was profiled.
+
+    Args:
+        - profile (bytes): The profile.
+        - source (str): What was profiled, e.g. "api" or a function's name.
+        - identifier (str): Identifies the call, e.g. a request or job ID.
+        - extension (str): The extension of the profile's format.
+
+    Returns:
+        - Optional[str]: The name of the saved profile, or None if it failed.
+    """
+    timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    name = f"{_slug(source)}/{timestamp}-{_slug(identifier)}{extension}"
+    try:
+        if container := os.environ.get("PROFILING_CONTAINER"):
+            # Imported here, as the storage SDK slows down starting the workers
+            from shared.services.storage import get_container_client
+
+            get_container_client(container).upload_blob(name, profile, overwrite=True)
+        else:
+            directory = os.environ.get(
+                "PROFILING_DIR", os.path.join(tempfile.gettempdir(), "profiles")
+            )
+            path = os.path.join(directory, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(profile)
+    except Exception as e:
+        logger.warning(f"Failed to save profile {name}: {e}")
+        return None
+    logger.info(f"Saved profile {name}")
+    return name
+
+
+def profiled(source: str, identify: Callable[..., Any]) -> Callable[[F], F]:
+    """
+    Profile calls to a function, such as the entry point of a worker, when
+    `start_profiler` chooses to.
+
+    Args:
+        - source (str): The name to save the function's profiles under.
+        - identify (Callable[..., Any]): Called with the function's arguments to
+            identify the call in the profile's name, e.g. by its message ID.
+
+    Returns:
+        - Callable[[F], F]: The decorator.
+    """
+
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profiler = start_profiler()
+            if profiler is None:
+                return func(*args, **kwargs)
+            try:
+                # Identify the call first, as entry points may consume their message
+                identifier = str(identify(*args, **kwargs))
+            except Exception:
+                identifier = "unknown"
+            try:
+                return func(*args, **kwargs)
+            finally:
+                save_profile(profiler.stop(), source, identifier, profiler.extension)
+
+        return wrapper  # type: ignore
+
+    return decorator
@@ -11,6 +11,7 @@ from shared.mapping.models import (
     ScanReportTable,
     ScanReportValue,
 )
+from shared.services.instrumentation import measure_stage
 
 # allowed tables
 m_allowed_tables = [
@@ -468,13 +469,13 @@ def refresh_mapping_rules(table_id: int, page: int, page_size: int) -> None:
         - None
     """
 
-    concepts = _find_existing_concepts(table_id, page, page_size)
+    with measure_stage("find_concepts", table_id=table_id, page=page) as stage:
+        concepts = _find_existing_concepts(table_id, page, page_size)
+        stage.add_rows("concepts", len(concepts))
 
-    nconcepts = 0
-    nbadconcepts = 0
-
-    for concept in concepts:
-        if _save_mapping_rules(concept):
-            nconcepts += 1
-        else:
-            nbadconcepts += 1
+    with measure_stage("save_mapping_rules", table_id=table_id, page=page) as stage:
+        for concept in concepts:
+            if _save_mapping_rules(concept):
+                stage.add_rows("saved", 1)
+            else:
+                stage.add_rows("skipped", 1)
@@ -6,7 +6,6 @@ from typing import Any
 from django.contrib.contenttypes.models import ContentType
 from django.db.models import Q
 from django.db.models.query import QuerySet
-from graphviz import Digraph
 from shared.data.models import Concept, ConceptAncestor
 from shared.mapping.models import (
     MappingRule,
@@ -199,6 +198,118 @@ def get_mapping_rules_list(
     return rules
 
 
+# Columns fetched by `get_mapping_rules_rows`, in the order they are unpacked.
+MAPPING_RULE_ROW_FIELDS = (
+    "concept_id",
+    "concept__concept__concept_name",
+    "omop_field__table_id",
+    "omop_field__table__table",
+    "concept__concept__domain_id",
+    "omop_field_id",
+    "omop_field__field",
+    "source_field__scan_report_table_id",
+    "source_field__scan_report_table__name",
+    "source_field_id",
+    "source_field__name",
+    "concept__concept_id",
+    "concept__content_type_id",
+    "concept__object_id",
+    "concept__creation_type",
+)
+
+
+def get_mapping_rules_rows(
+    mapping_rules: QuerySet[MappingRule],
+    page_number: int | None = None,
+    page_size: int | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Builds the API representation of a list of mapping rules from plain database rows.
+
+    Produces the same rules as `get_mapping_rules_list`, with the tables, fields and
+    domain already reduced to the `{"id": ..., "name": ...}` form the rules list
+    endpoints return. No model instances are created: the rules are read with a
+    single joined `values_list()` query, plus one query for the mapped values.
+
+    Args:
+        mapping_rules: queryset of the mapping rules to serialise
+        page_number: if present, the 1-based number of the page to be returned
+        page_size: if present, the size of the page to be returned
+
+    Returns:
+        list : a list of rules ready to be rendered as JSON
+    """
+    rows = mapping_rules.values_list(*MAPPING_RULE_ROW_FIELDS)
+    if page_number is not None:
+        first_index = (page_number - 1) * page_size
+        last_index = page_number * page_size
+        rows = rows[first_index:last_index]
+    rows = list(rows)
+
+    # Only rules on a "*_concept_id" field of a value-level concept need the value
+    # itself, so fetch those in one batch. Columns 6, 12 and 13 are the destination
+    # field name, and the concept's content type and object id.
+    scanreportvalue_content_type = ContentType.objects.get_for_model(ScanReportValue)
+    value_ids = {
+        row[13]
+        for row in rows
+        if row[12] == scanreportvalue_content_type.id and "concept_id" in row[6]
+    }
+    scan_report_values_id_to_value_map = dict(
+        ScanReportValue.objects.filter(pk__in=value_ids).values_list("id", "value")
+    )
+
+    rules = []
+    for (
+        rule_id,
+        omop_term,
+        destination_table_id,
+        destination_table_name,
+        domain,
+        destination_field_id,
+        destination_field_name,
+        source_table_id,
+        source_table_name,
+        source_field_id,
+        source_field_name,
+        concept_id,
+        content_type_id,
+        object_id,
+        creation_type,
+    ) in rows:
+        # work out if we need term_mapping or not
+        term_mapping = None
+        if "concept_id" in destination_field_name:
+            if content_type_id == scanreportvalue_content_type.id:
+                term_mapping = {
+                    scan_report_values_id_to_value_map[object_id]: concept_id
+                }
+            else:
+                term_mapping = concept_id
+
+        rules.append(
+            {
+                "rule_id": rule_id,
+                "omop_term": omop_term,
+                "destination_table": {
+                    "id": destination_table_id,
+                    "name": destination_table_name,
+                },
+                "domain": {"name": domain},
+                "destination_field": {
+                    "id": destination_field_id,
+                    "name": destination_field_name,
+                },
+                "source_table": {"id": source_table_id, "name": source_table_name},
+                "source_field": {"id": source_field_id, "name": source_field_name},
+                "term_mapping": term_mapping,
+                "creation_type": creation_type,
+            }
+        )
+
+    return rules
+
+
 def get_mapping_rules_json(
     mapping_rules: QuerySet[MappingRule],
 ) -> dict[str, dict] | dict[str, Any]:
@@ -380,6 +491,9 @@ def make_dag(
     Returns:
         - A DAG (str) representing the data and colorscheme.
     """
+    # Only SVG exports need graphviz, so it is not imported with the module
+    from graphviz import Digraph
+
     dot = Digraph(strict=True, format="svg")
     dot.attr(rankdir="RL")
     with dot.subgraph(name="cluster_0") as dest, dot.subgraph(name="cluster_1") as inp:
@@ -0,0 +1,264 @@
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Optional
+
+from openpyxl.workbook.workbook import Workbook  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+
+class ScanReportCheckError(Exception):
+    """
+    Raised when a scan report fails its consistency checks.
+
+    Args:
+        errors (list[str]): A message for each failed check.
+    """
+
+    def __init__(self, errors: list[str]):
+        super().__init__(errors)
+        self.errors = errors
+
+
+@contextmanager
+def timed(timings: dict, name: str):
+    """
+    Records the time spent in the block under `name` in `timings`.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = time.perf_counter() - start
+
+
+def check_scan_report(wb: Workbook, timings: Optional[dict] = None) -> None:
+    """
+    Performs a series of consistency checks on a scan report workbook. The checks
+    are designed to quickly identify and provide feedback on common data issues,
+    enabling the user to correct them.
+
+    The Field Overview sheet is read in a single pass, and only the header row of
+    each table sheet is read, so the workbook can be opened in read-only mode and
+    checked in bounded memory. The time spent in each check is logged.
+
+    Args:
+        wb (Workbook): The Excel workbook to check.
+        timings (Optional[dict]): If given, filled with the time spent in each check.
+
+    Returns:
+        None
+
+    Raises:
+        ScanReportCheckError: Validation checks have failed.
+    """
+    timings = {} if timings is None else timings
+    try:
+        _check_workbook(wb, timings)
+    finally:
+        logger.info(
+            "Scan report checks took %s",
+            ", ".join(f"{k}: {v:.3f}s" for k, v in timings.items()),
+        )
+
+
+def _check_workbook(wb: Workbook, timings: dict) -> None:
+    errors = []
+    # Get the first sheet 'Field Overview'
+    fo_rows = wb.worksheets[0].iter_rows(values_only=True)
+
+    with timed(timings, "headers"):
+        # Grab the scan report columns from the first worksheet
+        source_headers = list(next(fo_rows, ()))
+
+        # Define what the column headings should be
+        expected_headers = [
+            "Table",
+            "Field",
+            "Description",
+            "Type",
+            "Max length",
+            "N rows",
+            "N rows checked",
+            "Fraction empty",
+            "N unique values",
+            "Fraction unique",
+        ]
+
+        # Check if source headers match the expected headers. Allow unexpected
+        # headers after these. This means old Scan Reports with Flag and Classification
+        # columns will be handled cleanly.
+        if not source_headers[:10] == expected_headers:
+            errors.append(
+                f"Please check the following columns exist "
+                f"in the Scan Report (Field Overview sheet) "
+                f"in this order: "
+                f"Table, Field, Description, Type, "
+                f"Max length, N rows, N rows checked, "
+                f"Fraction empty, N unique values, "
+                f"Fraction unique. "
+                f"You provided \n{source_headers[:10]}"
+            )
+            raise ScanReportCheckError(errors)
+
+    with timed(timings, "field_overview"):
+        # Walk the rest of the Field Overview sheet once, checking the tables are
+        # separated correctly and collecting the fields of each table as we go.
+        table_names = set()
+        tables = []
+        current_table_fields = []
+        current_table_name = None
+        last_value = None
+        collecting = True
+        for row_number, row in enumerate(fo_rows):
+            value = row[0] if row else None
+            if row_number == 0:
+                last_value = value
+
+            # Check tables are correctly separated in FO - a single empty line
+            # between each table
+            if (
+                value != last_value
+                and (value != "" and value is not None)
+                and (last_value != "" and last_value is not None)
+            ) or (value == "" and last_value == ""):
+                errors.append(
+                    f"At the cell with value {value}, tables in Field Overview "
+                    f"table are not correctly separated by "
+                    f"a single line. "
+                    f"Note: There should be no separator "
+                    f"line between the header row and the "
+                    f"first row of the first table."
+                )
+
+            if value == "" or value is None:
+                # We're at the end of the table. If the line above was empty too,
+                # we're beyond the last true table, so stop collecting fields.
+                if row_number == 0 or last_value == "" or last_value is None:
+                    collecting = False
+                if collecting:
+                    tables.append((current_table_name, current_table_fields))
+                    current_table_fields = []
+            else:
+                table_names.add(value)
+                if collecting:
+                    # We can trust the table name not to change within a table due
+                    # to the check for empty lines between tables.
+                    current_table_fields.append(row[1] if len(row) > 1 else None)
+                    current_table_name = value
+
+            last_value = value
+
+        if errors:
+            raise ScanReportCheckError(errors)
+
+    with timed(timings, "sheet_names"):
+        # Check tables in FO match supplied sheets.
+        # Drop "Table Overview" and "_" sheetnames if present, as these are never used.
+        table_names.difference_update(["Table Overview", "_"])
+
+        # "Field Overview" is the only required sheet that is not a table name.
+        expected_sheetnames = list(table_names) + ["Field Overview"]
+
+        # Get names of sheet from workbook
+        actual_sheetnames = set(wb.sheetnames)
+        # Drop "Table Overview" and "_" sheetnames if present, as these are never used.
+        actual_sheetnames.difference_update(["Table Overview", "_"])
+
+        if sorted(actual_sheetnames) != sorted(expected_sheetnames):
+            sheets_only = set(actual_sheetnames).difference(expected_sheetnames)
+            fo_only = set(expected_sheetnames).difference(actual_sheetnames)
+            errors.append(
+                "Tables in Field Overview sheet do not " "match the sheets supplied."
+            )
+            if sheets_only:
+                errors.append(
+                    f"{sheets_only} are sheets that do not "
+                    f"have matching entries in first column "
+                    f"of the Field Overview sheet. "
+                )
+            if fo_only:
+                errors.append(
+                    f"{fo_only} are table names in first "
+                    f"column of Field Overview sheet but do "
+                    f"not have matching sheets supplied."
+                )
+
+        if errors:
+            raise ScanReportCheckError(errors)
+
+    with timed(timings, "table_fields"):
+        # For each table, compare the fields provided in the Field Overview with
+        # the fields in the associated sheet
+        for current_table_name, current_table_fields in tables:
+            # Get all field names from the associated sheet, by grabbing only the
+            # first row, and then grabbing every second column value (because the
+            # alternate columns should be 'Frequency'
+            header_row = next(
+                wb[current_table_name].iter_rows(max_row=1, values_only=True), ()
+            )
+            table_sheet_fields = list(header_row)[::2]
+
+            # Check for multiple columns in a single sheet with the same name
+            count_table_sheet_fields = Counter(table_sheet_fields)
+            for field in count_table_sheet_fields:
+                if count_table_sheet_fields[field] > 1:
+                    errors.append(
+                        f"Sheet '{current_table_name}' "
+                        f"contains more than one field "
+                        f"with the name '{field}'. "
+                        f"Field names must be unique "
+                        f"within a table."
+                    )
+
+            # Check for multiple fields with the same name associated to a single
+            # table in the Field Overview sheet
+            count_current_table_fields = Counter(current_table_fields)
+            for field in count_current_table_fields:
+                if count_current_table_fields[field] > 1:
+                    errors.append(
+                        f"Field Overview sheet contains "
+                        f"more than one field with the "
+                        f"name '{field}' against the "
+                        f"table '{current_table_name}'. "
+                        f"Field names must be unique "
+                        f"within a table."
+                    )
+
+            # Check for any fields that are in only one of the Field Overview and
+            # the associated sheet
+            if sorted(table_sheet_fields) != sorted(current_table_fields):
+                sheet_only = set(table_sheet_fields).difference(current_table_fields)
+                fo_only = set(current_table_fields).difference(table_sheet_fields)
+                errors.append(
+                    f"Fields in Field Overview against "
+                    f"table {current_table_name} do not "
+                    f"match fields in the associated "
+                    f"sheet. "
+                )
+                if sheet_only:
+                    errors.append(
+                        f"{sheet_only} exist in the "
+                        f"'{current_table_name}' sheet "
+                        f"but there are no matching "
+                        f"entries in the second column "
+                        f"of the Field Overview sheet "
+                        f"in the rows associated to the "
+                        f"table '{current_table_name}'. "
+                        f""
+                    )
+                if fo_only:
+                    errors.append(
+                        f"{fo_only} exist in second "
+                        f"column of Field Over"
+                        f"view sheet against the table "
+                        f"'{current_table_name}' but "
+                        f"there are no matching column "
+                        f"names in the associated sheet "
+                        f"'{current_table_name}'."
+                    )
+
+        if errors:
+            raise ScanReportCheckError(errors)
@@ -0,0 +1,296 @@
+import mmap
+import struct
+from collections import defaultdict
+from typing import IO, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+# A compact binary format for the values of a parsed scan report, written by the
+# upload worker alongside each scan report blob so they can be read without
+# parsing the XLSX again. A resumed upload reads the tables already uploaded
+# from the intermediate of the attempt before it.
+#
+# The file starts with MAGIC and a version byte, followed by a section per field:
+#
+#     table: str, field: str, count: u32, then `count` values of
+#     value: str, frequency: i64, description: str or null
+#
+# then an index of where the sections of each table start, so a table can be read
+# without reading the rest of the file:
+#
+#     count: u32, then `count` entries of
+#     table: str, sections: u32, then `sections` offsets: u64
+#
+# and lastly the offset of the index, as a u64. Integers are little-endian.
+# Strings are a u32 byte length followed by UTF-8, with a length of NULL_LENGTH
+# for null.
+MAGIC = b"CRSV"
+VERSION = 2
+NULL_LENGTH = 0xFFFFFFFF
+HEADER_SIZE = len(MAGIC) + 1
+
+_u32 = struct.Struct("<I")
+_u64 = struct.Struct("<Q")
+_i64 = struct.Struct("<q")
+
+
+class IntermediateFormatError(ValueError):
+    """
+    Raised when a file is not a scan report intermediate, or is truncated.
+    """
+
+
+class ValueRecord(NamedTuple):
+    table: str
+    field: str
+    value: str
+    frequency: int
+    description: Optional[str]
+
+
+def intermediate_blob_name(scan_report_blob: str) -> str:
+    """
+    Get the name of the intermediate blob written alongside a scan report blob.
+
+    Args:
+        scan_report_blob (str): The name of the scan report blob.
+
+    Returns:
+        str: The name of the intermediate blob.
+    """
+    return f"{scan_report_blob.rsplit('.', 1)[0]}.values"
+
+
+class IntermediateWriter:
+    """
+    Writes the values of a scan report to a binary stream, a field at a time.
+    Call `finish` once every field is written, to write the index.
+
+    Args:
+        stream (IO[bytes]): The stream to write to.
+    """
+
+    def __init__(self, stream: IO[bytes]):
+        self.stream = stream
+        self.fields = 0
+        self.values = 0
+        self._offset = 0
+        self._sections: Dict[str, List[int]] = defaultdict(list)
+        self._write(MAGIC + bytes([VERSION]))
+
+    def _write(self, data: bytes) -> None:
+        self.stream.write(data)
+        self._offset += len(data)
+
+    def _write_str(self, value: Optional[str]) -> None:
+        if value is None:
+            self._write(_u32.pack(NULL_LENGTH))
+            return
+        encoded = str(value).encode("utf-8")
+        self._write(_u32.pack(len(encoded)))
+        self._write(encoded)
+
+    def write_field(
+        self,
+        table: str,
+        field: str,
+        values: List[Tuple[str, int, Optional[str]]],
+    ) -> None:
+        """
+        Write the values of a field.
+
+        Args:
+            table (str): The name of the table.
+            field (str): The name of the field.
+            values (List[Tuple[str, int, Optional[str]]]): The value, frequency and
+                description of each value of the field.
+        """
+        self._sections[table].append(self._offset)
+        self._write_str(table)
+        self._write_str(field)
+        self._write(_u32.pack(len(values)))
+        for value, frequency, description in values:
+            self._write_str(value)
+            self._write(_i64.pack(frequency))
+            self._write_str(description)
+        self.fields += 1
+        self.values += len(values)
+
+    def finish(self) -> None:
+        """
+        Write the index of the tables. Nothing can be written after it.
+        """
+        index_offset = self._offset
+        self._write(_u32.pack(len(self._sections)))
+        for table, offsets in self._sections.items():
+            self._write_str(table)
+            self._write(_u32.pack(len(offsets)))
+            for offset in offsets:
+                self._write(_u64.pack(offset))
+        self._write(_u64.pack(index_offset))
+
+
+class IntermediateReader:
+    """
+    Reads the values of a scan report from its intermediate.
+
+    Strings are only decoded as they are read, so opening a file with `open`
+    memory-maps it rather than reading it into memory.
+
+    Args:
+        buffer (bytes | mmap.mmap): The contents of the intermediate.
+
+    Raises:
+        IntermediateFormatError: If the buffer is not a scan report intermediate.
+    """
+
+    def __init__(self, buffer):
+        self._buffer = buffer
+        self._view = memoryview(buffer)
+        if bytes(self._view[: len(MAGIC)]) != MAGIC:
+            raise IntermediateFormatError("Not a scan report intermediate.")
+        if self._view[len(MAGIC)] != VERSION:
+            raise IntermediateFormatError(
+                f"Unsupported intermediate version {self._view[len(MAGIC)]}."
+            )
+        self._index_offset, self._index = self._read_index()
+
+    @classmethod
+    def open(cls, path: str) -> "IntermediateReader":
+        """
+        Memory-map an intermediate file.
+
+        Args:
+            path (str): The path of the file.
+
+        Returns:
+            IntermediateReader: The reader. Close it when done.
+        """
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def close(self) -> None:
+        self._view.release()
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+
+    def __enter__(self) -> "IntermediateReader":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def _read_u32(self, offset: int) -> Tuple[int, int]:
+        try:
+            return _u32.unpack_from(self._view, offset)[0], offset + _u32.size
+        except struct.error:
+            raise IntermediateFormatError("The intermediate is truncated.")
+
+    def _read_str(self, offset: int) -> Tuple[Optional[str], int]:
+        length, offset = self._read_u32(offset)
+        if length == NULL_LENGTH:
+            return None, offset
+        if offset + length > len(self._view):
+            raise IntermediateFormatError("The intermediate is truncated.")
+        return str(self._view[offset : offset + length], "utf-8"), offset + length
+
+    def _read_index(self) -> Tuple[int, Dict[str, List[int]]]:
+        end = len(self._view) - _u64.size
+        if end < HEADER_SIZE:
+            raise IntermediateFormatError("The intermediate is truncated.")
+        index_offset = _u64.unpack_from(self._view, end)[0]
+        if not HEADER_SIZE <= index_offset <= end:
+            raise IntermediateFormatError("The intermediate is truncated.")
+
+        index = {}
+        count, offset = self._read_u32(index_offset)
+        for _ in range(count):
+            table, offset = self._read_str(offset)
+            sections, offset = self._read_u32(offset)
+            if offset + sections * _u64.size > end:
+                raise IntermediateFormatError("The intermediate is truncated.")
+            index[table] = [
+                _u64.unpack_from(self._view, offset + i * _u64.size)[0]
+                for i in range(sections)
+            ]
+            offset += sections * _u64.size
+        return index_offset, index
+
+    def _read_section(self, offset: int) -> Tuple[List[ValueRecord], int]:
+        table, offset = self._read_str(offset)
+        field, offset = self._read_str(offset)
+        count, offset = self._read_u32(offset)
+        records = []
+        for _ in range(count):
+            value, offset = self._read_str(offset)
+            try:
+                frequency = _i64.unpack_from(self._view, offset)[0]
+            except struct.error:
+                raise IntermediateFormatError("The intermediate is truncated.")
+            description, offset = self._read_str(offset + _i64.size)
+            records.append(ValueRecord(table, field, value, frequency, description))
+        return records, offset
+
+    @property
+    def tables(self) -> List[str]:
+        """
+        The names of the tables, in the order they were written.
+        """
+        return list(self._index)
+
+    def __iter__(self) -> Iterator[ValueRecord]:
+        offset = HEADER_SIZE
+        while offset < self._index_offset:
+            records, offset = self._read_section(offset)
+            yield from records
+
+    def table_records(self, table: str) -> Iterator[ValueRecord]:
+        """
+        Get the values of a table, in the order they were written. Only the
+        sections of the table are read.
+
+        Args:
+            table (str): The name of the table.
+
+        Returns:
+            Iterator[ValueRecord]: The values of the table.
+        """
+        for offset in self._index.get(table, []):
+            records, _ = self._read_section(offset)
+            yield from records
+
+    def table_values(self, table: str) -> Dict[str, List[Tuple[str, int]]]:
+        """
+        Get the values of a table, in the shape the upload worker parses a table
+        sheet into. Only the sections of the table are read.
+
+        Args:
+            table (str): The name of the table.
+
+        Returns:
+            Dict[str, List[Tuple[str, int]]]: The value and frequency of each value,
+                by field name.
+        """
+        values = defaultdict(list)
+        for record in self.table_records(table):
+            values[record.field].append((record.value, record.frequency))
+        return values
+
+
+def write_intermediate(stream: IO[bytes], records: Iterable[ValueRecord]) -> None:
+    """
+    Write value records to a stream, grouping consecutive records of a field.
+
+    Args:
+        stream (IO[bytes]): The stream to write to.
+        records (Iterable[ValueRecord]): The records to write.
+    """
+    writer = IntermediateWriter(stream)
+    key, values = None, []
+    for record in records:
+        if (record.table, record.field) != key:
+            if key is not None:
+                writer.write_field(*key, values)
+            key, values = (record.table, record.field), []
+        values.append((record.value, record.frequency, record.description))
+    if key is not None:
+        writer.write_field(*key, values)
+    writer.finish()
@@ -0,0 +1,330 @@
+import base64
+import hashlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import IO, Callable, Dict, Optional, Tuple, TypeVar, Union
+
+import requests
+from azure.core.pipeline.transport import RequestsTransport
+from azure.storage.blob import (
+    BlobBlock,
+    BlobServiceClient,
+    ContainerClient,
+    ContentSettings,
+)
+from azure.storage.queue import QueueClient
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Clients are cached per process, keyed by kind, connection string and name.
+_clients: Dict[Tuple[str, str, str], object] = {}
+_lock = threading.RLock()
+_session: Optional[requests.Session] = None
+
+
+def _get_conn_str(conn_str: Optional[str]) -> str:
+    conn_str = conn_str or os.environ.get("STORAGE_CONN_STRING")
+    if not conn_str:
+        raise ValueError("Storage connection string is not provided.")
+    return conn_str
+
+
+def _get_session() -> requests.Session:
+    """
+    Get the HTTP session shared by every storage client in the process, so their
+    connections are pooled and kept alive.
+
+    The pool size is set with `STORAGE_POOL_SIZE`, default 10.
+    """
+    global _session
+    if _session is None:
+        pool_size = int(os.environ.get("STORAGE_POOL_SIZE", 10))
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _session = session
+    return _session
+
+
+def _get_transport() -> RequestsTransport:
+    """
+    Get a transport for a new client, using the shared session.
+
+    Timeouts in seconds are set with `STORAGE_CONNECTION_TIMEOUT`, default 20, and
+    `STORAGE_READ_TIMEOUT`, default 60.
+    """
+    return RequestsTransport(
+        session=_get_session(),
+        session_owner=False,
+        connection_timeout=int(os.environ.get("STORAGE_CONNECTION_TIMEOUT", 20)),
+        read_timeout=int(os.environ.get("STORAGE_READ_TIMEOUT", 60)),
+    )
+
+
+def _get_or_create(key: Tuple[str, str, str], create: Callable[[], T]) -> T:
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = create()
+    return client  # type: ignore
+
+
+def get_blob_service_client(
+    conn_str: Optional[str] = None, chunk_size: Optional[int] = None
+) -> BlobServiceClient:
+    """
+    Get the process's `BlobServiceClient` for a storage account.
+
+    Clients are created once and reused. They are safe to share between threads,
+    so async code can call them with `asyncio.to_thread`.
+
+    Args:
+        conn_str (Optional[str]): The connection string for Azure Storage. If not
+            provided, it will be retrieved from environment variables.
+        chunk_size (Optional[int]): If given, downloads are fetched in chunks of at
+            most this many bytes, including the first.
+
+    Returns:
+        BlobServiceClient: The client.
+
+    Raises:
+        ValueError: If no connection string can be found.
+    """
+    conn_str = _get_conn_str(conn_str)
+    options = {}
+    if chunk_size:
+        options = {"max_single_get_size": chunk_size, "max_chunk_get_size": chunk_size}
+    return _get_or_create(
+        ("blob", conn_str, str(chunk_size or "")),
+        lambda: BlobServiceClient.from_connection_string(
+            conn_str, transport=_get_transport(), **options
+        ),
+    )
+
+
+def get_container_client(
+    container: str, conn_str: Optional[str] = None, chunk_size: Optional[int] = None
+) -> ContainerClient:
+    """
+    Get the process's `ContainerClient` for a blob container.
+
+    Args:
+        container (str): The name of the container.
+        conn_str (Optional[str]): The connection string for Azure Storage. If not
+            provided, it will be retrieved from environment variables.
+        chunk_size (Optional[int]): If given, downloads are fetched in chunks of at
+            most this many bytes, including the first.
+
+    Returns:
+        ContainerClient: The client.
+
+    Raises:
+        ValueError: If no connection string can be found.
+    """
+    conn_str = _get_conn_str(conn_str)
+    return _get_or_create(
+        ("container", conn_str, f"{container}:{chunk_size or ''}"),
+        lambda: get_blob_service_client(conn_str, chunk_size).get_container_client(
+            container
+        ),
+    )
+
+
+def get_queue_client(queue_name: str, conn_str: Optional[str] = None) -> QueueClient:
+    """
+    Get the process's `QueueClient` for a storage queue.
+
+    Args:
+        queue_name (str): The name of the queue.
+        conn_str (Optional[str]): The connection string for Azure Storage. If not
+            provided, it will be retrieved from environment variables.
+
+    Returns:
+        QueueClient: The client.
+
+    Raises:
+        ValueError: If no connection string can be found.
+    """
+    conn_str = _get_conn_str(conn_str)
+    return _get_or_create(
+        ("queue", conn_str, queue_name),
+        lambda: QueueClient.from_connection_string(
+            conn_str=conn_str, queue_name=queue_name, transport=_get_transport()
+        ),
+    )
+
+
+def clear_storage_clients() -> None:
+    """
+    Forget every cached client and close the shared session, e.g. after the
+    connection string changes.
+    """
+    global _session
+    with _lock:
+        _clients.clear()
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+@dataclass
+class UploadMetrics:
+    """
+    Metrics of a blob upload.
+
+    Attributes:
+        blob_name (str): The name of the uploaded blob.
+        size (int): The number of bytes uploaded.
+        blocks (int): The number of blocks the blob was uploaded in.
+        seconds (float): How long the upload took.
+        md5 (str): The hex MD5 digest of the blob.
+    """
+
+    blob_name: str
+    size: int
+    blocks: int
+    seconds: float
+    md5: str
+
+    @property
+    def throughput(self) -> float:
+        """
+        The upload throughput in MiB per second.
+        """
+        return self.size / 1024 / 1024 / self.seconds if self.seconds else 0.0
+
+
+def _read_block(stream: IO, block_size: int) -> Tuple[bytes, bool]:
+    """
+    Read the next block of a stream, encoding text as UTF-8.
+
+    Returns the block, and whether the stream may have more to read. That is
+    decided from the length read, before encoding, as encoded text can be longer
+    than `block_size` bytes.
+    """
+    block = stream.read(block_size)
+    more = len(block) == block_size
+    if isinstance(block, str):
+        block = block.encode("utf-8")
+    return block, more
+
+
+def upload_stream(
+    blob_name: str,
+    container: str,
+    stream: Union[IO[bytes], IO[str]],
+    content_type: str,
+    max_concurrency: Optional[int] = None,
+    block_size: Optional[int] = None,
+    conn_str: Optional[str] = None,
+) -> UploadMetrics:
+    """
+    Upload a stream to a blob, staging its blocks concurrently.
+
+    The stream is read a block at a time, with at most `max_concurrency` blocks
+    in memory, so large files are not read into memory. Each block is checked by
+    the service against its MD5, and the MD5 of the whole blob is stored as its
+    Content-MD5. Streams that fit in a single block are uploaded in one request.
+
+    Args:
+        blob_name (str): The name to give the blob.
+        container (str): The name of the container to upload the blob to.
+        stream (Union[IO[bytes], IO[str]]): The stream to upload, read from its
+            current position. Text is read `block_size` characters at a time
+            and encoded as UTF-8, so its blocks can be larger than `block_size`.
+        content_type (str): The MIME type of the blob.
+        max_concurrency (Optional[int]): How many blocks to stage at once. Defaults
+            to `STORAGE_UPLOAD_MAX_CONCURRENCY`, or 4.
+        block_size (Optional[int]): The size of each block read. Defaults to
+            `STORAGE_UPLOAD_BLOCK_SIZE`, or 4 MiB.
+        conn_str (Optional[str]): The connection string for Azure Storage. If not
+            provided, it will be retrieved from environment variables.
+
+    Returns:
+        UploadMetrics: The size, duration and MD5 of the upload.
+    """
+    max_concurrency = max_concurrency or int(
+        os.environ.get("STORAGE_UPLOAD_MAX_CONCURRENCY", 4)
+    )
+    block_size = block_size or int(
+        os.environ.get("STORAGE_UPLOAD_BLOCK_SIZE", 4 * 1024 * 1024)
+    )
+    blob_client = get_container_client(container, conn_str).get_blob_client(blob_name)
+
+    start = time.perf_counter()
+    md5 = hashlib.md5(usedforsecurity=False)
+    size = 0
+    block, more = _read_block(stream, block_size)
+    next_block = _read_block(stream, block_size)[0] if more else b""
+
+    if not next_block:
+        # Small enough for a single request
+        md5.update(block)
+        size = len(block)
+        blocks = 1
+        blob_client.upload_blob(
+            block,
+            overwrite=True,
+            content_settings=ContentSettings(
+                content_type=content_type, content_md5=md5.digest()
+            ),
+        )
+    else:
+        block_list = []
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            pending: set = set()
+            while block:
+                md5.update(block)
+                size += len(block)
+                block_id = base64.b64encode(f"{len(block_list):08d}".encode()).decode()
+                block_list.append(BlobBlock(block_id=block_id))
+                # Wait for a slot, so at most max_concurrency blocks are in memory
+                if len(pending) >= max_concurrency:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+                pending.add(
+                    executor.submit(
+                        blob_client.stage_block,
+                        block_id,
+                        block,
+                        validate_content=True,
+                    )
+                )
+                block, next_block = next_block, _read_block(stream, block_size)[0]
+            for future in pending:
+                future.result()
+        blocks = len(block_list)
+        blob_client.commit_block_list(
+            block_list,
+            content_settings=ContentSettings(
+                content_type=content_type, content_md5=md5.digest()
+            ),
+        )
+
+    metrics = UploadMetrics(
+        blob_name=blob_name,
+        size=size,
+        blocks=blocks,
+        seconds=time.perf_counter() - start,
+        md5=md5.hexdigest(),
+    )
+    logger.info(
+        "Uploaded %s: %d bytes in %d blocks, %.3fs (%.1f MiB/s)",
+        blob_name,
+        metrics.size,
+        metrics.blocks,
+        metrics.seconds,
+        metrics.throughput,
+    )
+    return metrics
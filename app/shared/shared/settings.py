@@ -0,0 +1,45 @@
+"""
+Settings shared by the API and the workers.
+
+Only plain Python lives here, as it is imported by the settings modules before
+Django is set up.
+"""
+
+import os
+from typing import Optional
+
+REDIS_SCHEMES = ("redis://", "rediss://", "unix://")
+
+
+def cache_settings(location: Optional[str] = None) -> dict:
+    """
+    Build the `CACHES` setting from a cache location.
+
+    The API and the workers both build it here, so they share one cache and
+    workers can invalidate cached responses they make stale.
+
+    Args:
+        location (Optional[str]): A Redis URL (requires the `redis` package), or a directory
+            for a file-based cache. Defaults to the `CACHE_LOCATION` environment
+            variable, and to a per-process in-memory cache if that is not set.
+
+    Returns:
+        dict: The `CACHES` setting.
+    """
+    if location is None:
+        location = os.environ.get("CACHE_LOCATION", "")
+    if location.startswith(REDIS_SCHEMES):
+        backend = "django.core.cache.backends.redis.RedisCache"
+    elif location:
+        backend = "django.core.cache.backends.filebased.FileBasedCache"
+    else:
+        backend = "django.core.cache.backends.locmem.LocMemCache"
+        location = "unique-snowflake"
+
+    return {
+        "default": {
+            "BACKEND": backend,
+            "LOCATION": location,
+            "KEY_PREFIX": "carrot",
+        }
+    }
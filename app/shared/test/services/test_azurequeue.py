@@ -1,8 +1,18 @@
+import base64
+import json
 import os
 from unittest.mock import MagicMock, patch
 
 import pytest
-from shared.services.azurequeue import add_message
+from azure.core.exceptions import ServiceRequestError
+from shared.services.azurequeue import (
+    QueuePublisher,
+    QueueTransport,
+    SQLiteQueueTransport,
+    add_message,
+    get_queue_transport,
+)
+from shared.services.storage import clear_storage_clients
 
 
 @pytest.fixture
@@ -11,8 +21,10 @@ def mock_queue_client():
     mock_instance.send_message.return_value = None
     mock_class = MagicMock(return_value=mock_instance)
     mock_class.from_connection_string.return_value = mock_instance
-    with patch("shared.services.azurequeue.QueueClient", mock_class):
+    with patch("shared.services.storage.QueueClient", mock_class):
+        clear_storage_clients()
         yield mock_class
+    clear_storage_clients()
 
 
 def test_add_message_with_connection_string(mock_queue_client):
@@ -22,9 +34,10 @@ def test_add_message_with_connection_string(mock_queue_client):
 
     add_message(queue_name, message, conn_str=conn_str)
 
-    mock_queue_client.from_connection_string.assert_called_once_with(
-        conn_str=conn_str, queue_name=queue_name
-    )
+    mock_queue_client.from_connection_string.assert_called_once()
+    _, kwargs = mock_queue_client.from_connection_string.call_args
+    assert kwargs["conn_str"] == conn_str
+    assert kwargs["queue_name"] == queue_name
     mock_queue_client.return_value.send_message.assert_called_once()
 
 
@@ -35,15 +48,111 @@ def test_add_message_with_environment_variable(mock_queue_client):
     with patch.dict(os.environ, {"STORAGE_CONN_STRING": "mock_conn_str"}):
         add_message(queue_name, message)
 
-    mock_queue_client.from_connection_string.assert_called_once_with(
-        conn_str="mock_conn_str", queue_name=queue_name
-    )
+    mock_queue_client.from_connection_string.assert_called_once()
+    _, kwargs = mock_queue_client.from_connection_string.call_args
+    assert kwargs["conn_str"] == "mock_conn_str"
+    assert kwargs["queue_name"] == queue_name
     mock_queue_client.return_value.send_message.assert_called_once()
 
 
+def test_add_message_reuses_client(mock_queue_client):
+    conn_str = "mock_connection_string"
+
+    add_message("test_queue", {"key": "value"}, conn_str=conn_str)
+    add_message("test_queue", {"key": "other"}, conn_str=conn_str)
+
+    mock_queue_client.from_connection_string.assert_called_once()
+    assert mock_queue_client.return_value.send_message.call_count == 2
+
+
 def test_add_message_without_connection_string():
     queue_name = "test_queue"
     message = {"key": "value"}
 
     with pytest.raises(ValueError):
         add_message(queue_name, message)
+
+
+class FlakyTransport(QueueTransport):
+    def __init__(self, failures, error):
+        self.failures = failures
+        self.error = error
+        self.sent = []
+
+    def send(self, queue_name, message):
+        if self.failures:
+            self.failures -= 1
+            raise self.error
+        self.sent.append(message)
+
+
+def test_sqlite_transport_round_trip():
+    transport = SQLiteQueueTransport()
+
+    with QueuePublisher("test_queue", transport=transport, batch_size=2) as publisher:
+        publisher.publish_many({"n": n} for n in range(5))
+    transport.send("other_queue", "e30=")
+
+    messages = transport.receive("test_queue", max_messages=10)
+    assert [json.loads(m.get_body()) for m in messages] == [{"n": n} for n in range(5)]
+    assert messages[0].dequeue_count == 1
+    assert transport.receive("test_queue") == []
+    assert len(transport.receive("other_queue")) == 1
+
+
+def test_publisher_sends_in_batches():
+    transport = SQLiteQueueTransport()
+    publisher = QueuePublisher("test_queue", transport=transport, batch_size=3)
+
+    publisher.publish_many({"n": n} for n in range(4))
+    assert publisher.sent == 3
+
+    publisher.flush()
+    assert publisher.sent == 4
+    assert len(transport.receive("test_queue", max_messages=10)) == 4
+
+
+def test_publisher_keeps_unsent_messages():
+    transport = FlakyTransport(2, ServiceRequestError("Connection reset"))
+    publisher = QueuePublisher("test_queue", transport=transport, max_concurrency=1)
+
+    publisher.publish_many({"n": n} for n in range(5))
+    with pytest.raises(ServiceRequestError):
+        publisher.flush()
+    assert publisher.sent == 3
+    assert publisher.pending == 2
+    assert publisher.unsent == [{"n": 0}, {"n": 1}]
+
+    publisher.flush()
+    assert publisher.sent == 5
+    assert publisher.pending == 0
+    assert sorted(json.loads(base64.b64decode(m))["n"] for m in transport.sent) == [
+        0,
+        1,
+        2,
+        3,
+        4,
+    ]
+
+
+def test_publisher_does_not_flush_on_error():
+    transport = FlakyTransport(0, None)
+
+    with pytest.raises(ValueError):
+        with QueuePublisher("test_queue", transport=transport) as publisher:
+            publisher.publish({"key": "value"})
+            raise ValueError("Bad message")
+    assert transport.sent == []
+    assert publisher.pending == 1
+
+
+def test_add_message_with_local_queue(tmp_path):
+    path = str(tmp_path / "queue.db")
+
+    with patch.dict(os.environ, {"LOCAL_QUEUE_PATH": path}):
+        add_message("test_queue", {"key": "value"})
+        transport = get_queue_transport()
+
+    assert isinstance(transport, SQLiteQueueTransport)
+    [message] = transport.receive("test_queue")
+    assert json.loads(message.get_body()) == {"key": "value"}
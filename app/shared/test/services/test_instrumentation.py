@@ -0,0 +1,110 @@
+import json
+import logging
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "settings")
+import django
+
+django.setup()
+
+from django.db import connection
+from shared.services.instrumentation import (
+    StageMetrics,
+    details_with_stages,
+    measure_stage,
+    record_stages,
+    summarise_stages,
+)
+
+
+def test_measure_stage_logs_metrics(caplog):
+    with caplog.at_level(logging.INFO, logger="shared.services.instrumentation"):
+        with record_stages() as stages:
+            with measure_stage("fetch", table_id=1) as stage:
+                stage.add_rows("values", 2)
+                stage.add_rows("values", 3)
+
+    assert stages == [stage]
+    assert stage.seconds > 0
+    record = json.loads(caplog.records[-1].getMessage())
+    assert record["event"] == "stage_metrics"
+    assert record["stage"] == "fetch"
+    assert record["table_id"] == 1
+    assert record["rows"] == {"values": 5}
+
+
+def test_measure_stage_wraps_connection():
+    with measure_stage("fetch") as stage:
+        assert stage in connection.execute_wrappers
+    assert stage not in connection.execute_wrappers
+
+
+def test_measure_stage_records_failed_stage():
+    with record_stages() as stages:
+        with pytest.raises(ValueError):
+            with measure_stage("fetch"):
+                raise ValueError
+    assert [s.name for s in stages] == ["fetch"]
+
+
+def test_measure_stage_disabled(caplog):
+    with patch.dict(os.environ, {"STAGE_METRICS_ENABLED": "false"}):
+        with caplog.at_level(logging.INFO, logger="shared.services.instrumentation"):
+            with record_stages() as stages:
+                with measure_stage("fetch") as stage:
+                    assert stage not in connection.execute_wrappers
+                    stage.add_rows("values", 1)
+
+    assert stages == []
+    assert stage.seconds == 0
+    assert not caplog.records
+
+
+def test_record_stages_nested():
+    with record_stages() as outer:
+        with measure_stage("first"):
+            pass
+        with record_stages() as inner:
+            with measure_stage("second"):
+                pass
+        with measure_stage("third"):
+            pass
+    assert [s.name for s in outer] == ["first", "third"]
+    assert [s.name for s in inner] == ["second"]
+
+
+def test_stage_metrics_counts_queries():
+    metrics = StageMetrics("fetch")
+    execute = MagicMock(return_value="result")
+
+    assert metrics(execute, "SELECT 1", None, False, {}) == "result"
+    execute.side_effect = ValueError
+    with pytest.raises(ValueError):
+        metrics(execute, "SELECT 1", None, False, {})
+
+    assert metrics.queries == 2
+    assert metrics.query_seconds >= 0
+
+
+def test_summarise_stages_totals_by_name():
+    stages = [
+        StageMetrics("find", seconds=0.5, queries=2, rows={"concepts": 10}),
+        StageMetrics("save", seconds=1.0, queries=30, rows={"saved": 8}).as_dict(),
+        StageMetrics("find", seconds=0.25, queries=2, rows={"concepts": 5}),
+    ]
+    assert summarise_stages(stages) == (
+        "find 0.75s 4q 15 concepts; save 1.00s 30q 8 saved"
+    )
+
+
+def test_details_with_stages():
+    stages = [StageMetrics("find", seconds=0.5, queries=2)]
+    assert details_with_stages("Finished", []) == "Finished"
+    assert details_with_stages("Finished", stages) == "Finished (find 0.50s 2q)"
+
+    details = details_with_stages("Finished", stages * 3 + [StageMetrics("x" * 300)])
+    assert len(details) == 256
+    assert details.endswith("...")
@@ -0,0 +1,141 @@
+import os
+import pstats
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from shared.services.profiling import (
+    CProfileProfiler,
+    SamplingProfiler,
+    profiled,
+    profiling_configured,
+    save_profile,
+    start_profiler,
+)
+
+
+def _busy(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_cprofile_profiler(tmp_path):
+    profiler = CProfileProfiler()
+    profiler.start()
+    _busy(0.01)
+    path = tmp_path / "profile.prof"
+    path.write_bytes(profiler.stop())
+
+    stats = pstats.Stats(str(path))
+    assert any(func == "_busy" for _, _, func in stats.stats)
+
+
+def test_sampling_profiler():
+    profiler = SamplingProfiler(interval=0.001)
+    profiler.start()
+    _busy(0.1)
+    lines = profiler.stop().decode("utf-8").splitlines()
+
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert any("_busy (test_profiling.py:" in line for line in lines)
+
+
+@patch.dict(os.environ, {}, clear=True)
+def test_start_profiler_when_not_configured():
+    assert not profiling_configured()
+    assert start_profiler() is None
+
+    profiler = start_profiler(force=True)
+    assert isinstance(profiler, CProfileProfiler)
+    profiler.stop()
+
+
+@pytest.mark.parametrize(
+    "env, expected",
+    [
+        ({"PROFILING_ENABLED": "true"}, True),
+        ({"PROFILING_SAMPLE_RATE": "0.1"}, True),
+        ({"PROFILING_TOKEN": "secret"}, True),
+        ({"PROFILING_ENABLED": "false", "PROFILING_SAMPLE_RATE": "0"}, False),
+    ],
+)
+def test_profiling_configured(env, expected):
+    with patch.dict(os.environ, env, clear=True):
+        assert profiling_configured() is expected
+
+
+def test_start_profiler_samples():
+    with patch.dict(os.environ, {"PROFILING_SAMPLE_RATE": "0.5"}, clear=True):
+        with patch("shared.services.profiling.random.random", return_value=0.7):
+            assert start_profiler() is None
+        with patch("shared.services.profiling.random.random", return_value=0.3):
+            profiler = start_profiler()
+    assert profiler is not None
+    profiler.stop()
+
+
+def test_start_profiler_sampling_mode():
+    env = {"PROFILING_ENABLED": "1", "PROFILING_MODE": "sampling"}
+    with patch.dict(os.environ, env, clear=True):
+        profiler = start_profiler()
+    assert isinstance(profiler, SamplingProfiler)
+    profiler.stop()
+
+
+def test_save_profile_to_directory(tmp_path):
+    with patch.dict(os.environ, {"PROFILING_DIR": str(tmp_path)}, clear=True):
+        name = save_profile(b"profile", "api", "abc-GET-/api/scanreports/", ".prof")
+
+    assert name.startswith("api/")
+    assert name.endswith("-abc-GET-api-scanreports.prof")
+    assert (tmp_path / name).read_bytes() == b"profile"
+
+
+@patch("shared.services.storage.get_container_client")
+def test_save_profile_to_container(mock_get_container_client):
+    with patch.dict(os.environ, {"PROFILING_CONTAINER": "profiles"}, clear=True):
+        name = save_profile(b"profile", "UploadQueue", "42", ".folded")
+
+    mock_get_container_client.assert_called_once_with("profiles")
+    mock_get_container_client.return_value.upload_blob.assert_called_once_with(
+        name, b"profile", overwrite=True
+    )
+
+
+@patch("shared.services.storage.get_container_client")
+def test_save_profile_failure(mock_get_container_client):
+    mock_get_container_client.return_value.upload_blob.side_effect = Exception("Down")
+    with patch.dict(os.environ, {"PROFILING_CONTAINER": "profiles"}, clear=True):
+        assert save_profile(b"profile", "UploadQueue", "42", ".prof") is None
+
+
+@patch("shared.services.profiling.save_profile")
+def test_profiled(mock_save_profile):
+    @profiled("Worker", lambda msg: msg["id"])
+    def main(msg):
+        return msg.pop("id")
+
+    with patch.dict(os.environ, {}, clear=True):
+        assert main({"id": 1}) == 1
+    mock_save_profile.assert_not_called()
+
+    with patch.dict(os.environ, {"PROFILING_ENABLED": "true"}, clear=True):
+        # The message is identified before the entry point consumes it
+        assert main({"id": 2}) == 2
+    args = mock_save_profile.call_args.args
+    assert args[1:] == ("Worker", "2", ".prof")
+
+
+@patch("shared.services.profiling.save_profile")
+def test_profiled_saves_failed_calls(mock_save_profile):
+    main = profiled("Worker", MagicMock(side_effect=KeyError))(
+        MagicMock(side_effect=ValueError)
+    )
+
+    with patch.dict(os.environ, {"PROFILING_ENABLED": "true"}, clear=True):
+        with pytest.raises(ValueError):
+            main({})
+    assert mock_save_profile.call_args.args[1:] == ("Worker", "unknown", ".prof")
@@ -0,0 +1,110 @@
+from io import BytesIO
+
+import pytest
+from shared.services.scan_report_intermediate import (
+    IntermediateFormatError,
+    IntermediateReader,
+    IntermediateWriter,
+    ValueRecord,
+    intermediate_blob_name,
+    write_intermediate,
+)
+
+RECORDS = [
+    ValueRecord("Person", "sex", "M", 120, "Male"),
+    ValueRecord("Person", "sex", "F", 130, None),
+    ValueRecord("Person", "ethnicity", "", 0, None),
+    ValueRecord("Visit", "type", "Κατάσταση", 2**40, "Unicode ✓"),
+]
+
+
+def _write(records) -> bytes:
+    stream = BytesIO()
+    write_intermediate(stream, records)
+    return stream.getvalue()
+
+
+def test_round_trip():
+    reader = IntermediateReader(_write(RECORDS))
+
+    assert list(reader) == RECORDS
+
+
+def test_writer_counts():
+    writer = IntermediateWriter(BytesIO())
+
+    writer.write_field("Person", "sex", [("M", 1, None), ("F", 2, None)])
+    writer.write_field("Person", "age", [])
+
+    assert writer.fields == 2
+    assert writer.values == 2
+
+
+def test_empty():
+    assert list(IntermediateReader(_write([]))) == []
+
+
+def test_table_values():
+    reader = IntermediateReader(_write(RECORDS))
+
+    assert reader.table_values("Person") == {
+        "sex": [("M", 120), ("F", 130)],
+        "ethnicity": [("", 0)],
+    }
+    assert reader.table_values("Missing") == {}
+    assert reader.tables == ["Person", "Visit"]
+
+
+def test_table_records():
+    reader = IntermediateReader(_write(RECORDS))
+
+    assert list(reader.table_records("Person")) == RECORDS[:3]
+    assert list(reader.table_records("Missing")) == []
+
+
+def test_table_values_only_reads_the_table():
+    data = bytearray(_write(RECORDS))
+    # Corrupt the length of the Visit table's name, in its section
+    visit = data.index("Visit".encode()) - 4
+    data[visit : visit + 4] = b"\xff\xff\xff\x7f"
+    reader = IntermediateReader(bytes(data))
+
+    assert reader.table_values("Person")["sex"] == [("M", 120), ("F", 130)]
+    with pytest.raises(IntermediateFormatError):
+        reader.table_values("Visit")
+
+
+def test_interleaved_tables():
+    records = [RECORDS[0], RECORDS[3], RECORDS[2]]
+    reader = IntermediateReader(_write(records))
+
+    assert reader.table_values("Person") == {
+        "sex": [("M", 120)],
+        "ethnicity": [("", 0)],
+    }
+
+
+def test_open_memory_maps_file(tmp_path):
+    path = tmp_path / "scan_report.values"
+    path.write_bytes(_write(RECORDS))
+
+    with IntermediateReader.open(str(path)) as reader:
+        assert list(reader) == RECORDS
+
+
+def test_rejects_other_files():
+    with pytest.raises(IntermediateFormatError):
+        IntermediateReader(b"PK\x03\x04 not an intermediate")
+
+
+def test_rejects_truncated_file():
+    data = _write(RECORDS)
+    with pytest.raises(IntermediateFormatError):
+        IntermediateReader(data[:-3])
+    with pytest.raises(IntermediateFormatError):
+        IntermediateReader(data[: len(data) // 2])
+
+
+def test_intermediate_blob_name():
+    assert intermediate_blob_name("report_1.xlsx") == "report_1.values"
+    assert intermediate_blob_name("report") == "report.values"
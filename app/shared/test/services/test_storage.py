@@ -0,0 +1,144 @@
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO, StringIO
+from unittest.mock import MagicMock, patch
+
+import pytest
+from azure.core.exceptions import HttpResponseError
+from azure.core.pipeline.transport import RequestsTransport
+from shared.services.storage import (
+    clear_storage_clients,
+    get_blob_service_client,
+    get_container_client,
+    get_queue_client,
+    upload_stream,
+)
+
+CONN_STR = (
+    "DefaultEndpointsProtocol=http;AccountName=devstoreaccount1;"
+    "AccountKey=Eby8vdM02xNOcqFlqUwJPLlmEtlCDXJ1OUzFT50uSRZ6IFsuFq2UVErCz4I6tq/K1SZFPTOtr/KBHBeksoGMGw==;"
+    "BlobEndpoint=http://127.0.0.1:10000/devstoreaccount1;"
+    "QueueEndpoint=http://127.0.0.1:10001/devstoreaccount1;"
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_clients():
+    clear_storage_clients()
+    yield
+    clear_storage_clients()
+
+
+def test_clients_are_reused():
+    blob_service_client = get_blob_service_client(CONN_STR)
+    assert get_blob_service_client(CONN_STR) is blob_service_client
+
+    container_client = get_container_client("scan-reports", CONN_STR)
+    assert get_container_client("scan-reports", CONN_STR) is container_client
+    assert get_container_client("data-dictionaries", CONN_STR) is not container_client
+
+    queue_client = get_queue_client("uploadreports", CONN_STR)
+    assert get_queue_client("uploadreports", CONN_STR) is queue_client
+
+
+def test_clients_share_session():
+    blob_transport = get_blob_service_client(CONN_STR)._pipeline._transport
+    queue_transport = get_queue_client("uploadreports", CONN_STR)._pipeline._transport
+    assert isinstance(blob_transport, RequestsTransport)
+    assert blob_transport.session is queue_transport.session
+
+
+def test_clients_from_environment_variable():
+    with patch.dict("os.environ", {"STORAGE_CONN_STRING": CONN_STR}):
+        assert get_container_client("scan-reports") is get_container_client(
+            "scan-reports", CONN_STR
+        )
+
+
+def test_clients_across_threads():
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        clients = set(
+            executor.map(
+                lambda _: id(get_container_client("scan-reports", CONN_STR)),
+                range(32),
+            )
+        )
+    assert len(clients) == 1
+
+
+def test_clients_without_connection_string():
+    with patch.dict("os.environ", {}, clear=True):
+        with pytest.raises(ValueError):
+            get_blob_service_client()
+
+
+@pytest.fixture
+def blob_client():
+    blob_client = MagicMock()
+    with patch("shared.services.storage.get_container_client") as mock_container:
+        mock_container.return_value.get_blob_client.return_value = blob_client
+        yield blob_client
+
+
+def test_upload_stream_in_blocks(blob_client):
+    content = os.urandom(10_000)
+    metrics = upload_stream(
+        "scan_report.xlsx",
+        "scan-reports",
+        BytesIO(content),
+        "application/octet-stream",
+        max_concurrency=3,
+        block_size=1024,
+    )
+
+    staged = {
+        call.args[0]: call.args[1] for call in blob_client.stage_block.call_args_list
+    }
+    (block_list,), kwargs = blob_client.commit_block_list.call_args
+    assert b"".join(staged[block.id] for block in block_list) == content
+    assert kwargs["content_settings"].content_md5 == hashlib.md5(content).digest()
+    assert metrics.size == len(content)
+    assert metrics.blocks == 10
+    assert metrics.md5 == hashlib.md5(content).hexdigest()
+    blob_client.upload_blob.assert_not_called()
+
+
+def test_upload_stream_single_block(blob_client):
+    metrics = upload_stream("rules.csv", "rules-exports", StringIO("a,b\n"), "text/csv")
+
+    blob_client.upload_blob.assert_called_once()
+    assert blob_client.upload_blob.call_args.args[0] == b"a,b\n"
+    blob_client.stage_block.assert_not_called()
+    assert metrics.blocks == 1
+    assert metrics.size == 4
+
+
+def test_upload_stream_multibyte_text(blob_client):
+    # The first block encodes to more than block_size bytes
+    content = "é" * 10 + "a" * 30
+    metrics = upload_stream(
+        "rules.csv", "rules-exports", StringIO(content), "text/csv", block_size=10
+    )
+
+    staged = {
+        call.args[0]: call.args[1] for call in blob_client.stage_block.call_args_list
+    }
+    (block_list,), _ = blob_client.commit_block_list.call_args
+    assert b"".join(staged[block.id] for block in block_list) == content.encode()
+    assert metrics.size == len(content.encode())
+    assert metrics.blocks == 4
+    blob_client.upload_blob.assert_not_called()
+
+
+def test_upload_stream_failed_block(blob_client):
+    blob_client.stage_block.side_effect = HttpResponseError("Block failed")
+    with pytest.raises(HttpResponseError):
+        upload_stream(
+            "scan_report.xlsx",
+            "scan-reports",
+            BytesIO(b"x" * 4096),
+            "application/octet-stream",
+            block_size=1024,
+        )
+    blob_client.commit_block_list.assert_not_called()
@@ -0,0 +1,28 @@
+import pytest
+from shared.settings import cache_settings
+
+
+@pytest.mark.parametrize(
+    "location, backend",
+    [
+        ("redis://cache:6379/0", "django.core.cache.backends.redis.RedisCache"),
+        ("rediss://cache:6380/0", "django.core.cache.backends.redis.RedisCache"),
+        ("/tmp/carrot-cache", "django.core.cache.backends.filebased.FileBasedCache"),
+    ],
+)
+def test_cache_settings(location, backend):
+    assert cache_settings(location)["default"] == {
+        "BACKEND": backend,
+        "LOCATION": location,
+        "KEY_PREFIX": "carrot",
+    }
+
+
+def test_cache_settings_default(monkeypatch):
+    monkeypatch.delenv("CACHE_LOCATION", raising=False)
+    assert cache_settings()["default"]["BACKEND"] == (
+        "django.core.cache.backends.locmem.LocMemCache"
+    )
+
+    monkeypatch.setenv("CACHE_LOCATION", "redis://cache:6379/0")
+    assert cache_settings()["default"]["LOCATION"] == "redis://cache:6379/0"
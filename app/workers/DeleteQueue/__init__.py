@@ -0,0 +1,126 @@
+import json
+import os
+from typing import Optional
+
+import azure.functions as func
+from shared_code.models import ScanReportDeleteMessage
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "shared_code.django_settings")
+import django
+
+django.setup()
+
+from shared.jobs.models import Job, JobStage, StageStatus
+from shared.mapping.models import ScanReport
+from shared.services.deletion import delete_scan_report
+from shared.services.profiling import profiled
+from shared.services.scan_report_intermediate import intermediate_blob_name
+from shared_code.db import JobStageType, StageStatusType
+from shared_code.logger import logger
+
+
+def _get_job(scan_report: ScanReport) -> Job:
+    """
+    Gets the job the API created for deleting the scan report, or creates one.
+
+    Args:
+        scan_report (ScanReport): The scan report being deleted.
+
+    Returns:
+        Job: The deletion job.
+    """
+    stage = JobStage.objects.get(value=JobStageType.DELETE_SCAN_REPORT.name)
+    job = (
+        Job.objects.filter(scan_report=scan_report, stage=stage)
+        .order_by("-created_at")
+        .first()
+    )
+    if job is None:
+        job = Job.objects.create(scan_report=scan_report, stage=stage)
+    return job
+
+
+def _update_job(job: Job, status: StageStatusType, details: str) -> None:
+    """
+    Updates the status and details of the deletion job.
+
+    The job is updated by its ID, as it no longer has a scan report once the scan
+    report is deleted.
+
+    Args:
+        job (Job): The deletion job.
+        status (StageStatusType): The status to set.
+        details (str): The details to set.
+    """
+    Job.objects.filter(pk=job.pk).update(
+        status=StageStatus.objects.get(value=status.name),
+        details=details[: Job._meta.get_field("details").max_length],
+    )
+
+
+def _delete_blobs(scan_report_blob: str, data_dictionary_blob: Optional[str]) -> None:
+    """
+    Deletes the files of a scan report, ignoring any that are already gone.
+
+    Args:
+        scan_report_blob (str): The name of the scan report blob.
+        data_dictionary_blob (Optional[str]): The name of the data dictionary blob.
+    """
+    # The storage SDK is slow to import, so it is only imported when needed
+    from azure.core.exceptions import ResourceNotFoundError
+    from shared.files.service import delete_blob
+
+    blobs = [
+        (scan_report_blob, "scan-reports"),
+        (intermediate_blob_name(scan_report_blob), "scan-reports"),
+    ]
+    if data_dictionary_blob:
+        blobs.append((data_dictionary_blob, "data-dictionaries"))
+
+    for blob, container in blobs:
+        try:
+            delete_blob(blob, container)
+        except ResourceNotFoundError:
+            logger.info(f"{container}/{blob} was already deleted")
+
+
+@profiled("DeleteQueue", lambda msg: msg.id)
+def main(msg: func.QueueMessage) -> None:
+    """
+    Deletes a scan report and its files.
+
+    The rows of the scan report are deleted in batches, and the deletion job is
+    updated as each batch is deleted. Deleting can be retried: if the scan report
+    has already been deleted, only its files are deleted.
+
+    Args:
+        msg (func.QueueMessage): The message received from the queue.
+    """
+    message: ScanReportDeleteMessage = json.loads(msg.get_body().decode("utf-8"))
+    scan_report_id = message["scan_report_id"]
+
+    scan_report = ScanReport.objects.filter(id=scan_report_id).first()
+    if scan_report is not None:
+        job = _get_job(scan_report)
+        _update_job(job, StageStatusType.IN_PROGRESS, "Deleting the Scan Report.")
+        try:
+            counts = delete_scan_report(
+                scan_report_id,
+                on_progress=lambda name, total: _update_job(
+                    job, StageStatusType.IN_PROGRESS, f"Deleted {total} {name}."
+                ),
+            )
+        except Exception as e:
+            _update_job(job, StageStatusType.FAILED, f"Error deleting: {e}")
+            raise
+        _update_job(
+            job,
+            StageStatusType.COMPLETE,
+            f"Deleted Scan Report {scan_report_id} ({scan_report.dataset}): "
+            f"{counts['tables']} tables, {counts['fields']} fields and "
+            f"{counts['values']} values.",
+        )
+    else:
+        logger.info(f"Scan Report {scan_report_id} was already deleted")
+
+    _delete_blobs(message["scan_report_blob"], message.get("data_dictionary_blob"))
@@ -13,6 +13,13 @@ django.setup()
 
 from shared.data.models import Concept
 from shared.mapping.models import ScanReportConcept, ScanReportTable
+from shared.services.cache import bump_scan_report_cache_version
+from shared.services.instrumentation import (
+    details_with_stages,
+    measure_stage,
+    record_stages,
+)
+from shared.services.profiling import profiled
 from shared_code import db
 from shared_code.db import (
     update_job,
@@ -266,20 +273,29 @@ def _handle_table(
     Returns:
         - None
     """
-    table_values = db.get_scan_report_values(table.pk)
-    table_fields = db.get_scan_report_fields(table.pk)
-
-    # Add vocab id to each entry from the vocab dict
-    helpers.add_vocabulary_id_to_entries(table_values, vocab, table.name)
-
-    _transform_concepts(table_values, table)
-    logger.debug("finished standard concepts lookup")
-
-    concepts = _create_concepts(table_values)
-
-    # Bulk create Concepts
-    logger.info(f"Creating {len(concepts)} concepts for table {table.name}")
-    ScanReportConcept.objects.bulk_create(concepts)
+    with record_stages() as build_stages:
+        with measure_stage("fetch_values", table_id=table.pk) as stage:
+            table_values = db.get_scan_report_values(table.pk)
+            table_fields = db.get_scan_report_fields(table.pk)
+            stage.add_rows("values", len(table_values))
+            stage.add_rows("fields", len(table_fields))
+
+        with measure_stage("transform_concepts", table_id=table.pk) as stage:
+            # Add vocab id to each entry from the vocab dict
+            helpers.add_vocabulary_id_to_entries(table_values, vocab, table.name)
+
+            _transform_concepts(table_values, table)
+            logger.debug("finished standard concepts lookup")
+
+            concepts = _create_concepts(table_values)
+            stage.add_rows("concepts", len(concepts))
+
+        with measure_stage("save_concepts", table_id=table.pk) as stage:
+            # Bulk create Concepts
+            logger.info(f"Creating {len(concepts)} concepts for table {table.name}")
+            # A retried activity may create concepts that already exist
+            ScanReportConcept.objects.bulk_create(concepts, ignore_conflicts=True)
+            stage.add_rows("concepts", len(concepts))
 
     logger.info("Create concepts all finished")
     if len(concepts) == 0:
@@ -287,14 +303,17 @@ def _handle_table(
             JobStageType.BUILD_CONCEPTS_FROM_DICT,
             StageStatusType.COMPLETE,
             scan_report_table=table,
-            details=f"Finished",
+            details=details_with_stages("Finished", build_stages),
         )
     else:
         update_job(
             JobStageType.BUILD_CONCEPTS_FROM_DICT,
             StageStatusType.COMPLETE,
             scan_report_table=table,
-            details=f"Created {len(concepts)} concepts based on provided data dictionary.",
+            details=details_with_stages(
+                f"Created {len(concepts)} concepts based on provided data dictionary.",
+                build_stages,
+            ),
         )
 
     # Starting the concepts reusing process
@@ -303,24 +322,32 @@ def _handle_table(
         StageStatusType.IN_PROGRESS,
         scan_report_table=table,
     )
-    # handle reuse of concepts at field level
-    reuse_existing_field_concepts(table_fields, table)
-    update_job(
-        JobStageType.REUSE_CONCEPTS,
-        StageStatusType.IN_PROGRESS,
-        scan_report_table=table,
-        details="Finished at field level. Continuing at value level...",
-    )
-    # handle reuse of concepts at value level
-    reuse_existing_value_concepts(table_values, table)
+    with record_stages() as reuse_stages:
+        # handle reuse of concepts at field level
+        with measure_stage("reuse_field_concepts", table_id=table.pk) as stage:
+            reuse_existing_field_concepts(table_fields, table)
+            stage.add_rows("fields", len(table_fields))
+        update_job(
+            JobStageType.REUSE_CONCEPTS,
+            StageStatusType.IN_PROGRESS,
+            scan_report_table=table,
+            details="Finished at field level. Continuing at value level...",
+        )
+        # handle reuse of concepts at value level
+        with measure_stage("reuse_value_concepts", table_id=table.pk) as stage:
+            reuse_existing_value_concepts(table_values, table)
+            stage.add_rows("values", len(table_values))
     update_job(
         JobStageType.REUSE_CONCEPTS,
         StageStatusType.COMPLETE,
         scan_report_table=table,
-        details="Finished",
+        details=details_with_stages("Finished", reuse_stages),
     )
+    # The new concepts were bulk created, so invalidate cached responses
+    bump_scan_report_cache_version(table.scan_report_id)
 
 
+@profiled("RulesConceptsActivity", lambda msg: msg.get("table_id"))
 def main(msg: Dict[str, str]):
     """
     Processes a queue message.
@@ -176,7 +176,7 @@ def reuse_existing_value_concepts(
         content_type,
         table,
     ):
-        ScanReportConcept.objects.bulk_create(concepts_to_post)
+        ScanReportConcept.objects.bulk_create(concepts_to_post, ignore_conflicts=True)
         logger.info("POST concepts all finished in reuse_existing_value_concepts")
     else:
         logger.info("No concepts to reuse at value level")
@@ -290,7 +290,7 @@ def reuse_existing_field_concepts(
         content_type,
         table,
     ):
-        ScanReportConcept.objects.bulk_create(concepts_to_post)
+        ScanReportConcept.objects.bulk_create(concepts_to_post, ignore_conflicts=True)
         logger.info("POST concepts all finished in reuse_existing_field_concepts")
     else:
         logger.info("No concepts to reuse at field level")
@@ -17,6 +17,7 @@ from django.db.models.query import QuerySet
 from shared.files.models import FileDownload, FileType
 from shared.files.service import upload_blob_read
 from shared.mapping.models import MappingRule, ScanReport
+from shared.services.profiling import profiled
 from shared.services.rules_export import (
     get_mapping_rules_as_csv,
     get_mapping_rules_json,
@@ -76,6 +77,7 @@ def create_svg_rules(rules: QuerySet[MappingRule]) -> BytesIO:
     return BytesIO(svg_bytes)
 
 
+@profiled("RulesFileQueue", lambda msg: msg.id)
 def main(msg: func.QueueMessage) -> None:
     """
     Creates and uploads a file for a set of Scan Report Rules.
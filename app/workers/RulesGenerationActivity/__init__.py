@@ -1,5 +1,5 @@
 import os
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 from shared_code.logger import logger
 
@@ -8,10 +8,16 @@ import django
 
 django.setup()
 
+from shared.services.instrumentation import record_stages
+from shared.services.profiling import profiled
 from shared.services.rules import refresh_mapping_rules
 
 
-def main(msg: Dict[str, Any]):
+@profiled(
+    "RulesGenerationActivity",
+    lambda msg: f"{msg.get('table_id')}-{msg.get('page_num')}",
+)
+def main(msg: Dict[str, Any]) -> List[Dict[str, Any]]:
     """
     Refreshes mapping rules for a ScanReportTable.
 
@@ -19,7 +25,8 @@ def main(msg: Dict[str, Any]):
         - msg (Dict[str, Any]): The message received from the orchestrator.
 
     Return:
-        - None
+        - List[Dict[str, Any]]: The metrics of each stage, for the orchestrator to
+            summarise.
     """
     table_id = msg.pop("table_id")
     page = msg.pop("page_num")
@@ -27,7 +34,8 @@ def main(msg: Dict[str, Any]):
 
     logger.info(f"Generating mapping rules for table: {table_id}, page: {page}")
 
-    refresh_mapping_rules(table_id, page, page_size)
+    with record_stages() as stages:
+        refresh_mapping_rules(table_id, page, page_size)
     logger.info(f"Finished mapping rules for table: {table_id}")
 
-    return
+    return [stage.as_dict() for stage in stages]
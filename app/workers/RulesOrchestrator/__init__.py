@@ -9,6 +9,7 @@ from shared_code.logger import logger
 
 django.setup()
 
+from shared.services.instrumentation import details_with_stages
 from shared.services.rules import find_existing_concepts_count
 from shared_code.db import (
     update_job,
@@ -68,7 +69,9 @@ def orchestrator_function(context: df.DurableOrchestrationContext):
             JobStageType.GENERATE_RULES,
             StageStatusType.COMPLETE,
             scan_report_table=ScanReportTable.objects.get(id=table_id),
-            details="Finished",
+            details=details_with_stages(
+                "Finished", [stage for page in results for stage in page or []]
+            ),
         )
         return [result, results]
     except Exception as e:
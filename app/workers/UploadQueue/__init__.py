@@ -1,12 +1,22 @@
 import asyncio
 import os
+import tempfile
 from collections import defaultdict
-from typing import Any, Dict, List, Tuple
+from itertools import groupby
+from typing import IO, Any, Dict, List, NamedTuple, Optional, Tuple
 
 import azure.functions as func
+from asgiref.sync import sync_to_async
+from django.db import transaction
 from openpyxl import Workbook
 from openpyxl.cell.cell import Cell
 from openpyxl.worksheet.worksheet import Worksheet
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "shared_code.django_settings")
+import django
+
+django.setup()
+
 from shared.mapping.models import (
     ScanReportField,
     ScanReportTable,
@@ -18,14 +28,20 @@ from shared_code.db import (
     JobStageType,
     StageStatusType,
 )
+from shared.jobs.models import Job
 from shared.mapping.models import ScanReport
+from shared.services.cache import bump_scan_report_cache_version
+from shared.services.bulk_insert import bulk_insert
+from shared.services.scan_report_checks import ScanReportCheckError, check_scan_report
+from shared.services.scan_report_intermediate import (
+    IntermediateReader,
+    IntermediateWriter,
+    intermediate_blob_name,
+)
+from shared.services.profiling import profiled
+from shared.services.storage import upload_stream
 from shared_code.logger import logger
 
-os.environ.setdefault("DJANGO_SETTINGS_MODULE", "shared_code.django_settings")
-import django
-
-django.setup()
-
 
 def _get_unique_table_names(worksheet: Worksheet) -> List[str]:
     """
@@ -67,19 +83,23 @@ def _create_table_entry(table_name: str, id: str) -> ScanReportTable:
     return ScanReportTable(name=short_table_name, scan_report_id=id)
 
 
-def _create_field_entry(row: Tuple[Cell], scan_report_table_id: str) -> ScanReportField:
+def _create_field_entry(
+    row: Tuple[Cell], scan_report_table_id: str, scan_report_id: str
+) -> ScanReportField:
     """
     Creates a ScanReportFieldEntry.
 
     Args:
         row (Tuple[Cell]): Row of data.
         scan_report_table_id (str): The ID of the scan report table
+        scan_report_id (str): The ID of the scan report the table is in.
 
     Returns:
         ScanReportField: A dictionary representing the field entry.
     """
     return ScanReportField(
         scan_report_table_id=scan_report_table_id,
+        scan_report_id=scan_report_id,
         name=str(row[1].value),
         description_column=str(row[2].value),
         type_column=str(row[3].value),
@@ -150,111 +170,114 @@ def _transform_scan_report_sheet_table(sheet: Worksheet) -> defaultdict[Any, Lis
     return d
 
 
+class ValueDetail(NamedTuple):
+    """
+    The details of a value in a table sheet.
+    """
+
+    fieldname: str
+    value: str
+    frequency: int
+    description: Optional[str]
+
+
 def _create_value_entries(
-    values_details: List[Dict[str, Any]], fields: list[ScanReportField]
+    values_details: List[ValueDetail], fields: list[ScanReportField]
 ) -> List[ScanReportValue]:
     """
-    Create value entries based on values_details and fieldnames_to_ids_dict.
+    Create value entries based on values_details and the fields they belong to.
 
     Args:
-        values_details (List[Dict[str, Any]]): A list of dictionaries of the value
-            details for each fieldname-value pair.
+        values_details (List[ValueDetail]): The details of each value.
         fields (List[ScanReportField]): A list of SCan Report Fields.
 
     Returns:
         List[ScanReportValue]: A list of ScanReportValues.
     """
+    fields_by_name: Dict[str, ScanReportField] = {}
+    for field in fields:
+        fields_by_name.setdefault(field.name, field)
     return [
         ScanReportValue(
-            value=entry["full_value"][:127],
-            frequency=int(entry["frequency"]),
-            value_description=entry["val_desc"],
-            scan_report_field=next(f for f in fields if f.name == entry["fieldname"]),
+            value=entry.value[:127],
+            frequency=entry.frequency,
+            value_description=entry.description,
+            scan_report_field=fields_by_name[entry.fieldname],
+            scan_report_id=fields_by_name[entry.fieldname].scan_report_id,
         )
         for entry in values_details
     ]
 
 
-def _apply_data_dictionary(
-    values_details: List[Dict[str, Any]], data_dictionary: Dict[Any, Dict]
-) -> None:
-    """
-    Apply data dictionary to update value descriptions in values_details from the data dict.
-
-    Args:
-        values_details (List[Dict[str, Any]]): A list of dictionaries with the value
-            details for each fieldname-value pair.
-        data_dictionary (Dict[Any, Dict]): A dictionary mapping table names to dictionaries
-            containing fieldname-value mappings and their corresponding value descriptions.
-
-    Returns:
-        None
-    """
-    for entry in values_details:
-        table_data = data_dictionary.get(str(entry["table"]))
-        if table_data and table_data.get(str(entry["fieldname"])):
-            entry["val_desc"] = table_data[str(entry["fieldname"])].get(
-                str(entry["full_value"])
-            )
-
-
-def _assign_order(values_details: List[Dict[str, Any]]) -> None:
-    """
-    Add "order" field to each entry to enable correctly-ordered recombination at the end.
-
-    Args:
-        values_details (List[Dict[str, Any]]): List of value details to transform.
-
-    Returns:
-        None
-    """
-    for entry_number, entry in enumerate(values_details):
-        entry["order"] = entry_number
-
-
 def _create_values_details(
     fieldname_value_freq: Dict[str, Tuple[str]],
     table_name: str,
-) -> List[Dict[str, Any]]:
+    data_dictionary: Optional[Dict[Any, Dict]] = None,
+) -> List[ValueDetail]:
     """
-    Create value details for each fieldname-value pair.
+    Create value details for each fieldname-value pair, with the value descriptions
+    from the data dictionary.
 
     Args:
         fieldname_value_freq (Dict[str, Tuple[str]]): A dictionary mapping fieldnames to
             tuples of value-frequency pairs.
         table_name (str): The name of the table.
+        data_dictionary (Optional[Dict[Any, Dict]]): A dictionary mapping table names
+            to dictionaries containing fieldname-value mappings and their
+            corresponding value descriptions.
 
     Returns:
-        List[Dict[str, Any]]: A list of dictionaries containing the value details for each
-            fieldname-value pair.
+        List[ValueDetail]: The details of each value, in the order of the fields.
     """
+    table_dictionary = (data_dictionary or {}).get(str(table_name)) or {}
     values_details = []
     for fieldname, value_freq_tuples in fieldname_value_freq.items():
+        # Look up the descriptions of the field once, rather than for each value
+        descriptions = table_dictionary.get(str(fieldname)) or {}
         for full_value, frequency in value_freq_tuples:
             try:
                 frequency = int(frequency)
             except (ValueError, TypeError):
                 frequency = 0
             values_details.append(
-                {
-                    "full_value": full_value,
-                    "frequency": frequency,
-                    "fieldname": fieldname,
-                    "table": table_name,
-                    "val_desc": None,
-                }
+                ValueDetail(
+                    fieldname, full_value, frequency, descriptions.get(str(full_value))
+                )
             )
     return values_details
 
 
-async def _add_SRValues_and_value_descriptions(
+def _write_values(
+    intermediate: IntermediateWriter,
+    table_name: str,
+    values_details: List[ValueDetail],
+) -> None:
+    """
+    Writes the values of a table to the intermediate, as parsed from the workbook.
+
+    Args:
+        intermediate (IntermediateWriter): The intermediate to write to.
+        table_name (str): The name of the table.
+        values_details (List[ValueDetail]): The details of each value.
+    """
+    # The values of each field are consecutive
+    for fieldname, entries in groupby(values_details, lambda e: e.fieldname):
+        intermediate.write_field(
+            table_name,
+            fieldname,
+            [(e.value, e.frequency, e.description) for e in entries],
+        )
+
+
+def _add_SRValues_and_value_descriptions(
     fieldname_value_freq_dict: Dict[str, Tuple[str]],
     current_table_name: str,
     data_dictionary: Dict[Any, Dict],
     fields: list[ScanReportField],
+    intermediate: Optional[IntermediateWriter] = None,
 ) -> None:
     """
-    Add ScanReportValues and value descriptions to the values_details list.
+    Add ScanReportValues, with their value descriptions from the data dictionary.
 
     Args:
         fieldname_value_freq_dict: A dictionary containing field names as keys and
@@ -262,27 +285,53 @@ async def _add_SRValues_and_value_descriptions(
         current_table_name: The name of the current table.
         data_dictionary: The data dictionary containing field-value descriptions.
         fields: A list of Scan Report Fields.
-
-    Returns:
-        The response content after posting the values.
+        intermediate: If given, the values are also written to it.
     """
     values_details = _create_values_details(
-        fieldname_value_freq_dict, current_table_name
+        fieldname_value_freq_dict, current_table_name, data_dictionary
     )
-    logger.debug("Assign order")
-    _assign_order(values_details)
 
-    # --------------------------------------------------------------------------------
-    # Update val_desc of each SRField entry if it has a value description from the
-    # data dictionary
-    if data_dictionary:
-        logger.debug("apply data dictionary")
-        _apply_data_dictionary(values_details, data_dictionary)
+    if intermediate is not None:
+        _write_values(intermediate, current_table_name, values_details)
 
     # Convert basic information about SRValues into entries
     logger.debug("create value_entries_to_post")
     value_entries = _create_value_entries(values_details, fields)
-    await ScanReportValue.objects.abulk_create(value_entries)
+    bulk_insert(ScanReportValue, value_entries)
+
+
+def _save_table(
+    field_entries: list[ScanReportField],
+    fieldname_value_freq_dict: Dict[str, Tuple[str]],
+    current_table_name: str,
+    data_dictionary: Dict[Any, Dict],
+    intermediate: Optional[IntermediateWriter] = None,
+) -> None:
+    """
+    Creates the fields and values of a table in one transaction, so a table is
+    either fully uploaded or not at all. Rows are inserted with `COPY` on
+    PostgreSQL. A table having fields checkpoints it as
+    uploaded, see `_get_completed_table_ids`.
+
+    Args:
+        field_entries (list[ScanReportField]): The fields of the table to create.
+        fieldname_value_freq_dict (Dict[str, Tuple[str]]): The value-frequency
+            tuples of each field.
+        current_table_name (str): The name of the table.
+        data_dictionary (Dict[Any, Dict]): The data dictionary containing
+            field-value descriptions.
+        intermediate (Optional[IntermediateWriter]): If given, the values are also
+            written to it.
+    """
+    with transaction.atomic():
+        fields = bulk_insert(ScanReportField, field_entries)
+        _add_SRValues_and_value_descriptions(
+            fieldname_value_freq_dict,
+            current_table_name,
+            data_dictionary,
+            fields,
+            intermediate,
+        )
 
 
 async def _handle_single_table(
@@ -291,6 +340,7 @@ async def _handle_single_table(
     scan_report_id: str,
     workbook: Workbook,
     data_dictionary: Dict[Any, Dict],
+    intermediate: Optional[IntermediateWriter] = None,
 ) -> None:
     """
     Handle creating a single table values.
@@ -298,12 +348,12 @@ async def _handle_single_table(
     Args:
         field_entries (List[Dict[str, str]]): List of field entries to create.
         scan_report_id (str): ID of the scan report to attach to.
+        intermediate (Optional[IntermediateWriter]): If given, the values are also
+            written to it.
 
     Raises:
         Exception: ValueError: Trying to access a sheet in the workbook that does not exist.
     """
-    fields = await ScanReportField.objects.abulk_create(field_entries)
-
     if current_table_name not in workbook.sheetnames:
         update_job(
             JobStageType.UPLOAD_SCAN_REPORT,
@@ -319,11 +369,12 @@ async def _handle_single_table(
     sheet = workbook[current_table_name]
 
     fieldname_value_freq_dict = _transform_scan_report_sheet_table(sheet)
-    await _add_SRValues_and_value_descriptions(
+    await sync_to_async(_save_table)(
+        field_entries,
         fieldname_value_freq_dict,
         current_table_name,
         data_dictionary,
-        fields,
+        intermediate,
     )
 
 
@@ -331,19 +382,89 @@ def _create_tables(worksheet: Worksheet, id: str) -> list[ScanReportTable]:
     """
     Creates tables extracted from the Field Overview worksheet.
 
-    For each table name create a ScanReportTable.
+    For each table name create a ScanReportTable, unless an earlier attempt at the
+    upload already created it.
 
     Args:
         worksheet (Worksheet): The worksheet containing table names.
         id (str): The ID of the scan report.
 
     Returns:
-        list[ScanReportTable]: A list of the ScanReportTables created.
+        list[ScanReportTable]: A list of the ScanReportTables of the scan report.
     """
     table_names = _get_unique_table_names(worksheet)
     logger.info(f"TABLES NAMES >>> {table_names}")
-    table_models = [_create_table_entry(name, id) for name in table_names]
-    return ScanReportTable.objects.bulk_create(table_models)
+    existing_tables = list(ScanReportTable.objects.filter(scan_report_id=id))
+    existing_names = {table.name for table in existing_tables}
+    table_models = [
+        _create_table_entry(name, id)
+        for name in table_names
+        if name[:31] not in existing_names
+    ]
+    return existing_tables + ScanReportTable.objects.bulk_create(table_models)
+
+
+def _get_completed_table_ids(id: str) -> set[int]:
+    """
+    Gets the tables of a scan report that an earlier attempt at the upload has
+    already uploaded. Tables are saved in one transaction, so these are the tables
+    with fields.
+
+    Args:
+        id (str): The ID of the scan report.
+
+    Returns:
+        set[int]: The IDs of the uploaded tables.
+    """
+    return set(
+        ScanReportField.objects.filter(scan_report_id=id)
+        .values_list("scan_report_table_id", flat=True)
+        .distinct()
+    )
+
+
+def _write_completed_table(
+    intermediate: IntermediateWriter,
+    table_name: str,
+    workbook: Workbook,
+    data_dictionary: Dict[Any, Dict],
+    previous: Optional[IntermediateReader] = None,
+) -> None:
+    """
+    Writes the values of a table an earlier attempt at the upload uploaded to the
+    intermediate, so a resumed upload writes the same intermediate as one that was
+    not interrupted.
+
+    The values are copied from the intermediate of the earlier attempt, so the
+    sheet need not be parsed again. If that has no values for the table, e.g. as
+    the attempt was stopped before uploading it, the sheet is parsed again.
+
+    Args:
+        intermediate (IntermediateWriter): The intermediate to write to.
+        table_name (str): The name of the table.
+        workbook (Workbook): The scan report workbook.
+        data_dictionary (Dict[Any, Dict]): The data dictionary containing
+            field-value descriptions.
+        previous (Optional[IntermediateReader]): The intermediate of the earlier
+            attempt, if it has one.
+    """
+    if previous is not None and table_name in previous.tables:
+        for fieldname, records in groupby(
+            previous.table_records(table_name), lambda r: r.field
+        ):
+            intermediate.write_field(
+                table_name,
+                fieldname,
+                [(r.value, r.frequency, r.description) for r in records],
+            )
+        return
+
+    values_details = _create_values_details(
+        _transform_scan_report_sheet_table(workbook[table_name]),
+        table_name,
+        data_dictionary,
+    )
+    _write_values(intermediate, table_name, values_details)
 
 
 async def _create_fields(
@@ -352,6 +473,9 @@ async def _create_fields(
     id: str,
     tables: list[ScanReportTable],
     data_dictionary: Dict[Any, Dict],
+    intermediate: Optional[IntermediateWriter] = None,
+    completed_table_ids: Optional[set[int]] = None,
+    previous: Optional[IntermediateReader] = None,
 ) -> None:
     """
     Creates fields extracted from the Field Overview worksheet.
@@ -365,8 +489,16 @@ async def _create_fields(
     Args:
         worksheet (Worksheet): The worksheet containing table names.
         id (str): Scan Report ID to POST to
+        intermediate (Optional[IntermediateWriter]): If given, the values are also
+            written to it.
+        completed_table_ids (Optional[set[int]]): Tables that were already uploaded,
+            which are skipped. Their values are still written to the intermediate.
+        previous (Optional[IntermediateReader]): The intermediate of the attempt
+            that uploaded the completed tables, to copy their values from.
     """
+    completed_table_ids = completed_table_ids or set()
     field_entries_to_post = []
+    completed_table_name = None
 
     previous_row_value = None
     for row in worksheet.iter_rows(min_row=2, max_row=worksheet.max_row + 2):
@@ -383,20 +515,34 @@ async def _create_fields(
             current_table_name = row[0].value
             table = next(t for t in tables if t.name == current_table_name)
             # get the current table in the list of tables by name.
+            if table.pk in completed_table_ids:
+                completed_table_name = current_table_name
+                continue
 
-            field_entry = _create_field_entry(row, table.pk)
+            field_entry = _create_field_entry(row, table.pk, table.scan_report_id)
             field_entries_to_post.append(field_entry)
         else:
             # This is the scenario where the line is empty, so we're at the end of
             # the table. Don't add a field entry, but process all those so far.
-            await _handle_single_table(
-                str(current_table_name),
-                field_entries_to_post,
-                id,
-                workbook,
-                data_dictionary,
-            )
+            if field_entries_to_post:
+                await _handle_single_table(
+                    str(current_table_name),
+                    field_entries_to_post,
+                    id,
+                    workbook,
+                    data_dictionary,
+                    intermediate,
+                )
+            elif completed_table_name is not None and intermediate is not None:
+                _write_completed_table(
+                    intermediate,
+                    str(completed_table_name),
+                    workbook,
+                    data_dictionary,
+                    previous,
+                )
             field_entries_to_post = []
+            completed_table_name = None
 
     # Catch the final table if it wasn't already posted in the loop above -
     # sometimes the iter_rows() seems to now allow you to go beyond the last row.
@@ -407,32 +553,132 @@ async def _create_fields(
             id,
             workbook,
             data_dictionary,
+            intermediate,
+        )
+    elif completed_table_name is not None and intermediate is not None:
+        _write_completed_table(
+            intermediate, str(completed_table_name), workbook, data_dictionary, previous
+        )
+
+
+def _upload_intermediate(stream: IO[bytes], scan_report_blob: str) -> None:
+    """
+    Uploads the values intermediate of a scan report alongside its blob. The upload
+    does not depend on it, so failures are only logged.
+
+    Args:
+        stream (IO[bytes]): The intermediate.
+        scan_report_blob (str): The name of the scan report blob.
+    """
+    stream.seek(0)
+    try:
+        upload_stream(
+            intermediate_blob_name(scan_report_blob),
+            "scan-reports",
+            stream,
+            "application/octet-stream",
+        )
+    except Exception as e:
+        logger.warning(f"Could not upload the intermediate of {scan_report_blob}: {e}")
+
+
+def _get_previous_intermediate(scan_report_blob: str) -> Optional[IntermediateReader]:
+    """
+    Gets the intermediate uploaded by an earlier attempt at the upload. The upload
+    does not depend on it, so failures are only logged.
+
+    Args:
+        scan_report_blob (str): The name of the scan report blob.
+
+    Returns:
+        Optional[IntermediateReader]: The intermediate, or None if there is none
+            that can be read. Close it when done.
+    """
+    try:
+        return blob_parser.get_scan_report_intermediate(scan_report_blob)
+    except Exception as e:
+        logger.warning(
+            f"Could not read the intermediate of {scan_report_blob}, so the "
+            f"uploaded tables are parsed again: {e}"
         )
+        return None
+
+
+def _update_job_details(scan_report: ScanReport, details: str) -> None:
+    """
+    Updates the details of the upload job of a scan report, leaving its status and
+    the upload status of the scan report as they are.
+
+    Args:
+        scan_report (ScanReport): The scan report.
+        details (str): The details to set.
+    """
+    job = (
+        Job.objects.filter(
+            scan_report=scan_report, stage__value=JobStageType.UPLOAD_SCAN_REPORT.name
+        )
+        .order_by("-created_at")
+        .first()
+    )
+    if job:
+        job.details = details
+        job.save(update_fields=["details"])
+
+
+def _run_deferred_checks(workbook: Workbook, scan_report: ScanReport) -> bool:
+    """
+    Runs the consistency checks of a scan report that was accepted before they
+    had run, reporting any errors on its upload job.
+
+    Args:
+        workbook (Workbook): The scan report workbook.
+        scan_report (ScanReport): The scan report.
+
+    Returns:
+        bool: Whether the checks passed.
+    """
+    try:
+        check_scan_report(workbook)
+    except ScanReportCheckError as e:
+        logger.error(f"Scan report {scan_report.id} failed its checks: {e.errors}")
+        update_job(
+            JobStageType.UPLOAD_SCAN_REPORT,
+            StageStatusType.FAILED,
+            scan_report=scan_report,
+            details=" ".join(e.errors)[: Job._meta.get_field("details").max_length],
+        )
+        return False
+    return True
 
 
 def _handle_failure(msg: func.QueueMessage, scan_report_id: str) -> None:
     """
     Handles failure scenarios where the message has been dequeued more than once.
 
+    A redelivered message resumes the upload from the tables that were not
+    uploaded, for up to `UPLOAD_MAX_ATTEMPTS` attempts, default 3. Keep this below
+    the `maxDequeueCount` of the queue in host.json.
+
     Args:
         msg (func.QueueMessage): The message received from the queue.
         scan_report_id (str): The ID of the scan report.
 
     Raises:
-        ValueError: If the dequeue count of the message exceeds 1.
+        ValueError: If the dequeue count of the message exceeds the attempts.
     """
     logger.info(f"dequeue_count {msg.dequeue_count}")
+    max_attempts = int(os.environ.get("UPLOAD_MAX_ATTEMPTS", 3))
 
-    if msg.dequeue_count == 2:
+    if msg.dequeue_count > max_attempts:
         update_job(
             JobStageType.UPLOAD_SCAN_REPORT,
             StageStatusType.FAILED,
             scan_report=ScanReport.objects.get(id=scan_report_id),
         )
-    if msg.dequeue_count > 1:
-        raise ValueError("dequeue_count > 1")
+        raise ValueError(f"dequeue_count > {max_attempts}")
 
 
+@profiled("UploadQueue", lambda msg: msg.id)
 def main(msg: func.QueueMessage) -> None:
     """
     Processes a queue message
@@ -450,13 +696,33 @@ def main(msg: func.QueueMessage) -> None:
     )
     _handle_failure(msg, scan_report_id)
 
-    update_job(
-        JobStageType.UPLOAD_SCAN_REPORT,
-        StageStatusType.IN_PROGRESS,
-        scan_report=ScanReport.objects.get(id=scan_report_id),
+    scan_report = ScanReport.objects.get(id=scan_report_id)
+    # Uploads accepted asynchronously are left PENDING until their checks have
+    # passed, so an attempt that fails before then runs them again when retried
+    checks_deferred = (
+        scan_report.upload_status is not None
+        and scan_report.upload_status.value == "PENDING"
     )
+    if checks_deferred:
+        _update_job_details(scan_report, "Checking the Scan Report.")
+    else:
+        update_job(
+            JobStageType.UPLOAD_SCAN_REPORT,
+            StageStatusType.IN_PROGRESS,
+            scan_report=scan_report,
+        )
 
     wb = blob_parser.get_scan_report(scan_report_blob)
+    if checks_deferred:
+        if not _run_deferred_checks(wb, scan_report):
+            return
+        update_job(
+            JobStageType.UPLOAD_SCAN_REPORT,
+            StageStatusType.IN_PROGRESS,
+            scan_report=scan_report,
+            details="The Scan Report passed its checks and is being uploaded.",
+        )
+
     data_dictionary, _ = blob_parser.get_data_dictionary(data_dictionary_blob)
 
     # Get the first sheet 'Field Overview',
@@ -464,12 +730,58 @@ def main(msg: func.QueueMessage) -> None:
     fo_ws = wb.worksheets[0]
 
     table_name_to_id_map = _create_tables(fo_ws, scan_report_id)
-    asyncio.run(
-        _create_fields(fo_ws, wb, scan_report_id, table_name_to_id_map, data_dictionary)
+    # Tables uploaded by an earlier attempt are skipped
+    completed_table_ids = _get_completed_table_ids(scan_report_id)
+    if completed_table_ids:
+        update_job(
+            JobStageType.UPLOAD_SCAN_REPORT,
+            StageStatusType.IN_PROGRESS,
+            scan_report=scan_report,
+            details=(
+                f"Resuming the upload, {len(completed_table_ids)} of "
+                f"{len(table_name_to_id_map)} tables were already uploaded."
+            ),
+        )
+    # A resumed upload copies the values of the tables already uploaded from the
+    # intermediate of the earlier attempt, rather than parsing their sheets again
+    previous = (
+        _get_previous_intermediate(scan_report_blob) if completed_table_ids else None
     )
+    try:
+        # Write the parsed values as they are created, so a later attempt can skip
+        # the sheets of the tables already uploaded
+        with tempfile.TemporaryFile() as intermediate_file:
+            intermediate = IntermediateWriter(intermediate_file)
+            try:
+                asyncio.run(
+                    _create_fields(
+                        fo_ws,
+                        wb,
+                        scan_report_id,
+                        table_name_to_id_map,
+                        data_dictionary,
+                        intermediate,
+                        completed_table_ids,
+                        previous,
+                    )
+                )
+            finally:
+                # Uploaded even if the upload failed, for the next attempt
+                intermediate.finish()
+                _upload_intermediate(intermediate_file, scan_report_blob)
+    finally:
+        if previous is not None:
+            previous.close()
 
     update_job(
         JobStageType.UPLOAD_SCAN_REPORT,
         StageStatusType.COMPLETE,
         scan_report=ScanReport.objects.get(id=scan_report_id),
+        details=(
+            "The Scan Report has been uploaded."
+            if checks_deferred or completed_table_ids
+            else None
+        ),
     )
+    # The new fields and values were bulk created, so invalidate cached responses
+    bump_scan_report_cache_version(int(scan_report_id))
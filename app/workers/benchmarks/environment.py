@@ -0,0 +1,26 @@
+import platform
+import subprocess
+from typing import Optional
+
+import django
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> dict:
+    """
+    Describe what benchmarks ran on, so results can be compared between runs.
+    """
+    return {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "platform": platform.platform(),
+    }
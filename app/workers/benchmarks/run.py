@@ -0,0 +1,302 @@
+"""
+Benchmarks the scan report pipeline on a synthetic scan report, and writes the
+timings as JSON so they can be compared between releases.
+
+Runs against a throwaway database on the server in the worker's DB_* settings,
+which is dropped afterwards unless --keepdb is given:
+
+    python -m benchmarks.run --tables 10 --values-per-field 500 --output results.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, List, Optional
+
+import django
+import openpyxl
+import psycopg2
+from benchmarks.environment import environment
+from benchmarks.synthetic import (
+    DATE_FIELD,
+    PERSON_ID_FIELD,
+    SyntheticScanReport,
+    vocabulary_concepts,
+    write_data_dictionary,
+    write_scan_report,
+)
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "shared_code.django_settings")
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection, connections
+from RulesConceptsActivity import _handle_table
+from RulesFileQueue import create_csv_rules, create_json_rules, create_svg_rules
+from shared.data.models import Concept, ConceptRelationship
+from shared.jobs.models import Job, JobStage, StageStatus
+from shared.mapping.models import (
+    DataPartner,
+    Dataset,
+    MappingRule,
+    ScanReport,
+    ScanReportConcept,
+    ScanReportField,
+)
+from shared.services.rules import refresh_mapping_rules
+from shared.services.rules_export import get_mapping_rules_rows
+from shared.services.scan_report_checks import check_scan_report
+from shared_code.blob_parser import parse_data_dictionary
+from shared_code.logger import logger
+from UploadQueue import _create_fields, _create_tables
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    seconds: Optional[float] = None
+    count: Optional[int] = None
+    error: Optional[str] = None
+
+    @property
+    def per_second(self) -> Optional[float]:
+        if self.seconds and self.count is not None:
+            return self.count / self.seconds
+        return None
+
+
+@dataclass
+class BenchmarkResults:
+    results: List[BenchmarkResult] = field(default_factory=list)
+
+    def run(
+        self, name: str, func: Callable[[], Any], count: Optional[int] = None
+    ) -> Any:
+        """
+        Time a stage of the pipeline. If it fails, the error is recorded instead, so
+        a stage that cannot run here (e.g. without Graphviz) does not stop the rest.
+        """
+        start = time.perf_counter()
+        try:
+            value = func()
+        except Exception as e:
+            self.results.append(BenchmarkResult(name, error=repr(e)))
+            print(f"{name}: failed with {e!r}", file=sys.stderr)
+            return None
+        result = BenchmarkResult(name, time.perf_counter() - start, count)
+        self.results.append(result)
+        rate = f" ({result.per_second:,.0f}/s)" if result.per_second else ""
+        print(f"{name}: {result.seconds:.3f}s{rate}", file=sys.stderr)
+        return value
+
+    def set_count(self, name: str, count: int) -> None:
+        next(r for r in self.results if r.name == name).count = count
+
+
+def _run_sql(db: str, sql: str) -> None:
+    conn = psycopg2.connect(
+        dbname=db,
+        user=settings.DATABASES["default"]["USER"],
+        password=settings.DATABASES["default"]["PASSWORD"],
+        host=settings.DATABASES["default"]["HOST"],
+        port=settings.DATABASES["default"]["PORT"],
+    )
+    conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+    with conn.cursor() as cursor:
+        cursor.execute(sql)
+    conn.close()
+
+
+def create_database(name: str) -> None:
+    """
+    Create an empty database with the OMOP vocabulary tables, and migrate it.
+    """
+    _run_sql("postgres", f"DROP DATABASE IF EXISTS {name}")
+    _run_sql("postgres", f"CREATE DATABASE {name} TEMPLATE template0")
+    _run_sql(name, "CREATE SCHEMA IF NOT EXISTS omop")
+    settings.DATABASES["default"]["NAME"] = name
+    with connection.schema_editor() as schema_editor:
+        schema_editor.create_model(Concept)
+        schema_editor.create_model(ConceptRelationship)
+    call_command("migrate", "--noinput", verbosity=0)
+
+
+def drop_database(name: str) -> None:
+    # The upload's async stages hold connections in their own thread
+    connections.close_all()
+    _run_sql("postgres", f"DROP DATABASE IF EXISTS {name} WITH (FORCE)")
+
+
+def _seed(report: SyntheticScanReport) -> ScanReport:
+    # The OMOP tables and fields that rules are written to
+    call_command("loaddata", "mapping", verbosity=0)
+    Concept.objects.bulk_create(Concept(**c) for c in vocabulary_concepts(report))
+    user = get_user_model().objects.create(username="benchmark")
+    data_partner = DataPartner.objects.create(name="Benchmark Partner")
+    dataset = Dataset.objects.create(
+        name="Benchmark Dataset", visibility="PUBLIC", data_partner=data_partner
+    )
+    return ScanReport.objects.create(
+        author=user,
+        name="Synthetic Scan Report",
+        dataset="Synthetic",
+        parent_dataset=dataset,
+    )
+
+
+def _create_table_jobs(tables) -> None:
+    # The concepts stages update the latest job of each table
+    in_progress = StageStatus.objects.get(value="IN_PROGRESS")
+    Job.objects.bulk_create(
+        Job(scan_report_table=table, stage=stage, status=in_progress)
+        for table in tables
+        for stage in JobStage.objects.filter(
+            value__in=["BUILD_CONCEPTS_FROM_DICT", "REUSE_CONCEPTS"]
+        )
+    )
+
+
+def run_pipeline(
+    report: SyntheticScanReport,
+    scan_report_path: str,
+    data_dictionary_path: str,
+    results: BenchmarkResults,
+) -> None:
+    """
+    Run each stage of the pipeline on a synthetic scan report, timing each one.
+    """
+    scan_report = _seed(report)
+    scan_report_id = str(scan_report.id)
+
+    # Upload
+    wb = results.run(
+        "upload.load_workbook",
+        lambda: openpyxl.load_workbook(
+            scan_report_path, data_only=True, keep_links=False, read_only=True
+        ),
+    )
+    results.run("upload.checks", lambda: check_scan_report(wb))
+    with open(data_dictionary_path) as f:
+        lines = f.read().splitlines()
+    data_dictionary, vocab_dictionary = results.run(
+        "upload.data_dictionary", lambda: parse_data_dictionary(lines), len(lines) - 1
+    )
+    fo_ws = wb.worksheets[0]
+
+    def upload():
+        tables = _create_tables(fo_ws, scan_report_id)
+        asyncio.run(_create_fields(fo_ws, wb, scan_report_id, tables, data_dictionary))
+        return tables
+
+    tables = results.run("upload.parse_and_insert", upload, report.num_values)
+    wb.close()
+
+    # Concepts
+    _create_table_jobs(tables)
+    results.run(
+        "concepts.handle_table",
+        lambda: [_handle_table(table, vocab_dictionary) for table in tables],
+    )
+    results.set_count(
+        "concepts.handle_table",
+        ScanReportConcept.objects.count(),
+    )
+
+    # Rules
+    for table in tables:
+        fields = ScanReportField.objects.filter(scan_report_table=table)
+        table.person_id = fields.get(name=PERSON_ID_FIELD)
+        table.date_event = fields.get(name=DATE_FIELD)
+        table.save()
+    results.run(
+        "rules.refresh",
+        lambda: [refresh_mapping_rules(table.pk, None, None) for table in tables],
+    )
+    rules = MappingRule.objects.filter(scan_report=scan_report)
+    num_rules = rules.count()
+    results.set_count("rules.refresh", num_rules)
+
+    # Exports
+    results.run("export.json", lambda: create_json_rules(rules.all()), num_rules)
+    results.run("export.csv", lambda: create_csv_rules(rules.all()), num_rules)
+    results.run("export.svg", lambda: create_svg_rules(rules.all()), num_rules)
+    results.run(
+        "export.rules_list", lambda: get_mapping_rules_rows(rules.all()), num_rules
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> dict:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tables", type=int, default=5)
+    parser.add_argument("--fields-per-table", type=int, default=10)
+    parser.add_argument("--values-per-field", type=int, default=200)
+    parser.add_argument("--dictionary-coverage", type=float, default=0.5)
+    parser.add_argument("--vocabulary-size", type=int, default=1_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--database", default="carrot_benchmarks")
+    parser.add_argument("--keepdb", action="store_true")
+    parser.add_argument("--output", help="Write the results here, not to stdout.")
+    args = parser.parse_args(argv)
+
+    # The workers log every table at INFO
+    logger.setLevel(logging.WARNING)
+    report = SyntheticScanReport(
+        tables=args.tables,
+        fields_per_table=args.fields_per_table,
+        values_per_field=args.values_per_field,
+        dictionary_coverage=args.dictionary_coverage,
+        vocabulary_size=args.vocabulary_size,
+        seed=args.seed,
+    )
+    results = BenchmarkResults()
+    started_at = datetime.now(timezone.utc)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        scan_report_path = os.path.join(tmp, "scan_report.xlsx")
+        data_dictionary_path = os.path.join(tmp, "data_dictionary.csv")
+        results.run(
+            "generate.scan_report",
+            lambda: write_scan_report(report, scan_report_path),
+            report.num_values,
+        )
+        results.run(
+            "generate.data_dictionary",
+            lambda: write_data_dictionary(report, data_dictionary_path),
+        )
+        create_database(args.database)
+        try:
+            run_pipeline(report, scan_report_path, data_dictionary_path, results)
+        finally:
+            if not args.keepdb:
+                drop_database(args.database)
+
+    output = {
+        "suite": "pipeline",
+        "started_at": started_at.isoformat(),
+        "config": asdict(report),
+        "environment": environment(),
+        "results": [
+            {**asdict(result), "per_second": result.per_second}
+            for result in results.results
+        ],
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(output, f, indent=2)
+    else:
+        json.dump(output, sys.stdout, indent=2)
+    return output
+
+
+if __name__ == "__main__":
+    main()
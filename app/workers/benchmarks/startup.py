@@ -0,0 +1,126 @@
+"""
+Benchmarks how long each function takes to start: the time from a new Python
+process to its entry point being imported and ready, as in a cold start. Each
+function is started in a fresh interpreter several times, and the timings are
+written as JSON:
+
+    python -m benchmarks.startup --repeat 10 --output startup.json
+"""
+
+import argparse
+import glob
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from benchmarks.environment import environment
+
+WORKERS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Run in the new interpreter: import the function and report how long it took,
+# and how many modules it loaded.
+_IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+module = __import__(sys.argv[1])
+module.main
+print(json.dumps({
+    "seconds": time.perf_counter() - start,
+    "modules": len(sys.modules),
+}))
+"""
+
+
+def function_names() -> List[str]:
+    """
+    The names of the functions in the app, from their function.json.
+    """
+    return sorted(
+        os.path.basename(os.path.dirname(path))
+        for path in glob.glob(os.path.join(WORKERS_DIR, "*", "function.json"))
+    )
+
+
+def measure_startup(function: str, repeat: int) -> dict:
+    """
+    Start a function in a fresh interpreter `repeat` times.
+
+    Args:
+        function (str): The name of the function.
+        repeat (int): How many times to start it.
+
+    Returns:
+        dict: The median, min and max import time in seconds, the median time
+            for the whole process including the interpreter, and the number of
+            modules loaded.
+    """
+    imports, processes, modules = [], [], 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-c", _IMPORT_SCRIPT, function],
+            cwd=WORKERS_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        processes.append(time.perf_counter() - start)
+        measured = json.loads(result.stdout.strip().splitlines()[-1])
+        imports.append(measured["seconds"])
+        modules = measured["modules"]
+    return {
+        "name": function,
+        "seconds": statistics.median(imports),
+        "min_seconds": min(imports),
+        "max_seconds": max(imports),
+        "process_seconds": statistics.median(processes),
+        "modules": modules,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> dict:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "functions", nargs="*", help="The functions to start. Defaults to all."
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Write the results here, not to stdout.")
+    args = parser.parse_args(argv)
+
+    started_at = datetime.now(timezone.utc)
+    results = []
+    for function in args.functions or function_names():
+        try:
+            result = measure_startup(function, args.repeat)
+        except subprocess.CalledProcessError as e:
+            result = {"name": function, "error": e.stderr.strip().splitlines()[-1]}
+            print(f"{function}: failed with {result['error']}", file=sys.stderr)
+        else:
+            print(
+                f"{function}: {result['seconds']:.3f}s, {result['modules']} modules",
+                file=sys.stderr,
+            )
+        results.append(result)
+
+    output = {
+        "suite": "startup",
+        "started_at": started_at.isoformat(),
+        "config": {"repeat": args.repeat},
+        "environment": environment(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(output, f, indent=2)
+    else:
+        json.dump(output, sys.stdout, indent=2)
+    return output
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+import csv
+import random
+from dataclasses import dataclass
+from datetime import date
+from typing import Iterator, List, Tuple
+
+from openpyxl import Workbook
+
+FIELD_OVERVIEW_HEADERS = [
+    "Table",
+    "Field",
+    "Description",
+    "Type",
+    "Max length",
+    "N rows",
+    "N rows checked",
+    "Fraction empty",
+    "N unique values",
+    "Fraction unique",
+]
+
+VOCABULARY_ID = "SYNTHETIC"
+
+# Domains whose concepts map to an allowed OMOP table
+DOMAINS = ["Condition", "Observation", "Measurement", "Drug", "Procedure"]
+
+PERSON_ID_FIELD = "person_id"
+DATE_FIELD = "event_date"
+
+
+@dataclass
+class SyntheticScanReport:
+    """
+    The shape of a synthetic scan report.
+
+    Every table has a person ID field and a date field, followed by
+    `fields_per_table` value fields. A `dictionary_coverage` fraction of the value
+    fields are coded with the synthetic vocabulary, and the same fraction of values
+    have a description in the data dictionary.
+
+    Attributes:
+        tables (int): The number of tables.
+        fields_per_table (int): The number of value fields in each table.
+        values_per_field (int): The number of distinct values of each field.
+        dictionary_coverage (float): The fraction of fields and values the data
+            dictionary describes, from 0 to 1.
+        vocabulary_size (int): The number of concepts in the synthetic vocabulary.
+        seed (int): The seed for the random choices, so reports can be reproduced.
+    """
+
+    tables: int = 5
+    fields_per_table: int = 10
+    values_per_field: int = 200
+    dictionary_coverage: float = 0.5
+    vocabulary_size: int = 1_000
+    seed: int = 0
+
+    def table_names(self) -> List[str]:
+        return [f"table_{t}" for t in range(self.tables)]
+
+    def field_names(self) -> List[str]:
+        return [PERSON_ID_FIELD, DATE_FIELD] + [
+            f"field_{f}" for f in range(self.fields_per_table)
+        ]
+
+    def coded_fields(self) -> List[Tuple[str, str]]:
+        """
+        The (table, field) pairs whose values are codes of the synthetic vocabulary.
+        """
+        rng = random.Random(self.seed)
+        return [
+            (table, field)
+            for table in self.table_names()
+            for field in self.field_names()[2:]
+            if rng.random() < self.dictionary_coverage
+        ]
+
+    def concept_code(self, index: int) -> str:
+        return f"SYN{index % self.vocabulary_size:06d}"
+
+    def values(self, table: str, field: str) -> Iterator[Tuple[str, int]]:
+        """
+        The values of a field and their frequencies.
+        """
+        rng = random.Random(f"{self.seed}:{table}:{field}")
+        coded = (table, field) in self.coded_fields()
+        # Coded fields take consecutive codes from a random start, so their values
+        # are distinct as long as the vocabulary is large enough
+        offset = rng.randrange(self.vocabulary_size)
+        for v in range(self.values_per_field):
+            if field == PERSON_ID_FIELD:
+                value = str(100_000 + v)
+            elif field == DATE_FIELD:
+                value = date.fromordinal(738_000 + v).isoformat()
+            elif coded:
+                value = self.concept_code(offset + v)
+            else:
+                value = f"{field}_value_{v}"
+            yield value, rng.randint(1, 1_000)
+
+    @property
+    def num_values(self) -> int:
+        return self.tables * len(self.field_names()) * self.values_per_field
+
+
+def write_scan_report(report: SyntheticScanReport, path: str) -> None:
+    """
+    Write a scan report workbook in the format produced by WhiteRabbit.
+
+    Args:
+        report (SyntheticScanReport): The shape of the scan report.
+        path (str): The path to write the XLSX to.
+    """
+    wb = Workbook(write_only=True)
+    fo_ws = wb.create_sheet("Field Overview")
+    fo_ws.append(FIELD_OVERVIEW_HEADERS)
+    fields = report.field_names()
+    n = report.values_per_field
+    for table in report.table_names():
+        for field in fields:
+            fo_ws.append(
+                [table, field, f"{field} of {table}", "VARCHAR", 20, n, n, 0, n, 1]
+            )
+        fo_ws.append([""])
+
+    for table in report.table_names():
+        ws = wb.create_sheet(table)
+        ws.append([col for field in fields for col in [field, "Frequency"]])
+        columns = [list(report.values(table, field)) for field in fields]
+        for row in zip(*columns):
+            ws.append([col for value_frequency in row for col in value_frequency])
+    wb.save(path)
+
+
+def write_data_dictionary(report: SyntheticScanReport, path: str) -> None:
+    """
+    Write the data dictionary of a scan report as CSV, with a vocabulary row for
+    each coded field and a description for a fraction of the values.
+
+    Args:
+        report (SyntheticScanReport): The shape of the scan report.
+        path (str): The path to write the CSV to.
+    """
+    rng = random.Random(f"{report.seed}:dictionary")
+    coded_fields = report.coded_fields()
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(
+            f, fieldnames=["csv_file_name", "field_name", "code", "value"]
+        )
+        writer.writeheader()
+        for table, field in coded_fields:
+            writer.writerow(
+                {
+                    "csv_file_name": table,
+                    "field_name": field,
+                    "code": VOCABULARY_ID,
+                    "value": "",
+                }
+            )
+        for table in report.table_names():
+            for field in report.field_names()[2:]:
+                for value, _ in report.values(table, field):
+                    if rng.random() < report.dictionary_coverage:
+                        writer.writerow(
+                            {
+                                "csv_file_name": table,
+                                "field_name": field,
+                                "code": value,
+                                "value": f"Description of {value}",
+                            }
+                        )
+
+
+def vocabulary_concepts(report: SyntheticScanReport) -> List[dict]:
+    """
+    The concepts of the synthetic vocabulary, as the fields of `Concept`. They are
+    all standard, across the domains that map to OMOP tables.
+
+    Args:
+        report (SyntheticScanReport): The shape of the scan report.
+
+    Returns:
+        List[dict]: The fields of each concept.
+    """
+    return [
+        {
+            "concept_id": 900_000_000 + i,
+            "concept_name": f"Synthetic concept {i}",
+            "domain_id": DOMAINS[i % len(DOMAINS)],
+            "vocabulary_id": VOCABULARY_ID,
+            "concept_class_id": "Synthetic",
+            "standard_concept": "S",
+            "concept_code": report.concept_code(i),
+            "valid_start_date": date(1970, 1, 1),
+            "valid_end_date": date(2099, 12, 31),
+        }
+        for i in range(report.vocabulary_size)
+    ]
@@ -1,11 +1,19 @@
 import csv
 import logging
-import os
+import mmap
+import tempfile
 from io import BytesIO
-from typing import Any, Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
-import openpyxl
-from azure.storage.blob import BlobServiceClient  # type: ignore
+from shared.services.scan_report_intermediate import (
+    IntermediateReader,
+    intermediate_blob_name,
+)
+
+# openpyxl and the storage SDK are slow to import, and only some functions read
+# blobs, so they are imported where they are used to keep cold starts short.
+if TYPE_CHECKING:
+    import openpyxl
 
 logger = logging.getLogger("test_logger")
 
@@ -94,7 +102,7 @@ def process_four_item_dict(four_item_data):
     return new_data_dictionary
 
 
-def get_scan_report(blob: str) -> openpyxl.Workbook:
+def get_scan_report(blob: str) -> "openpyxl.Workbook":
     """
     Retrieves a scan report from a blob storage and returns it as a Workbook.
 
@@ -104,16 +112,12 @@ def get_scan_report(blob: str) -> openpyxl.Workbook:
     Returns:
         Workbook: The scan report as an openpyxl Workbook object.
     """
-    # Set Storage Account connection string
-    blob_service_client = BlobServiceClient.from_connection_string(
-        os.environ.get("STORAGE_CONN_STRING")
-    )
+    import openpyxl
+    from shared.services.storage import get_container_client
 
     # Grab scan report data from blob
     streamdownloader = (
-        blob_service_client.get_container_client("scan-reports")
-        .get_blob_client(blob)
-        .download_blob()
+        get_container_client("scan-reports").get_blob_client(blob).download_blob()
     )
     scanreport_bytes = BytesIO(streamdownloader.readall())
     return openpyxl.load_workbook(
@@ -121,38 +125,51 @@ def get_scan_report(blob: str) -> openpyxl.Workbook:
     )
 
 
-def get_data_dictionary(
-    blob: str,
-) -> Tuple[Optional[Dict[str, Dict[str, Any]]], Optional[Dict[str, Dict[str, Any]]]]:
+def get_scan_report_intermediate(blob: str) -> Optional[IntermediateReader]:
     """
-    Retrieves the data dictionary and vocabulary dictionary from a blob storage.
+    Retrieves the values intermediate written alongside a scan report, so its values
+    can be read without parsing the workbook.
 
     Args:
-        blob (str): The name of the blob containing the data dictionary.
+        blob (str): The name of the scan report blob.
 
     Returns:
-        Tuple[Optional[Dict[str, Dict[str, Any]]], Optional[Dict[str, Dict[str, Any]]]]: A tuple containing the data dictionary and vocabulary dictionary.
+        Optional[IntermediateReader]: A reader over the memory-mapped intermediate,
+            or None if the scan report has none. Close it when done.
     """
-    if blob is None or blob == "None":
-        return None, None
+    from azure.core.exceptions import ResourceNotFoundError
+    from shared.services.storage import get_container_client
 
-    # Set Storage Account connection string
-    blob_service_client = BlobServiceClient.from_connection_string(
-        os.environ.get("STORAGE_CONN_STRING")
+    blob_client = get_container_client("scan-reports").get_blob_client(
+        intermediate_blob_name(blob)
     )
-    # Access data as StorageStreamerDownloader class
-    # Decode and split the stream using csv.reader()
-    dict_client = blob_service_client.get_container_client("data-dictionaries")
-    blob_dict_client = dict_client.get_blob_client(blob)
+    with tempfile.TemporaryFile() as f:
+        try:
+            blob_client.download_blob().readinto(f)
+        except ResourceNotFoundError:
+            return None
+        f.flush()
+        # The mapping stays valid after the file is closed
+        return IntermediateReader(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+def parse_data_dictionary(
+    lines: List[str],
+) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+    """
+    Parses the lines of a data dictionary CSV into the data dictionary and
+    vocabulary dictionary.
+
+    Args:
+        lines (List[str]): The lines of the CSV.
+
+    Returns:
+        Tuple[Dict[str, Dict[str, Any]], Dict[str, Dict[str, Any]]]: A tuple containing the data dictionary and vocabulary dictionary.
+    """
+    rows = list(csv.DictReader(lines))
 
     # Grab all rows with 4 elements for use as value descriptions
-    data_dictionary_intermediate = [
-        row
-        for row in csv.DictReader(
-            blob_dict_client.download_blob().readall().decode("utf-8").splitlines()
-        )
-        if row["value"] != ""
-    ]
+    data_dictionary_intermediate = [row for row in rows if row["value"] != ""]
     # Remove BOM from start of file if it's supplied.
     dictionary_data = remove_BOM(data_dictionary_intermediate)
 
@@ -161,16 +178,37 @@ def get_data_dictionary(
     data_dictionary = process_four_item_dict(dictionary_data)
 
     # Grab all rows with 3 elements for use as possible vocabs
-    vocab_dictionary_intermediate = [
-        row
-        for row in csv.DictReader(
-            blob_dict_client.download_blob().readall().decode("utf-8").splitlines()
-        )
-        if row["value"] == ""
-    ]
+    vocab_dictionary_intermediate = [row for row in rows if row["value"] == ""]
     vocab_data = remove_BOM(vocab_dictionary_intermediate)
 
     # Convert to nested dictionaries, with structure
     # {tables: {fields: vocab}}
     vocab_dictionary = process_three_item_dict(vocab_data)
     return data_dictionary, vocab_dictionary
+
+
+def get_data_dictionary(
+    blob: str,
+) -> Tuple[Optional[Dict[str, Dict[str, Any]]], Optional[Dict[str, Dict[str, Any]]]]:
+    """
+    Retrieves the data dictionary and vocabulary dictionary from a blob storage.
+
+    Args:
+        blob (str): The name of the blob containing the data dictionary.
+
+    Returns:
+        Tuple[Optional[Dict[str, Dict[str, Any]]], Optional[Dict[str, Dict[str, Any]]]]: A tuple containing the data dictionary and vocabulary dictionary.
+    """
+    if blob is None or blob == "None":
+        return None, None
+
+    from shared.services.storage import get_container_client
+
+    # Access data as StorageStreamerDownloader class
+    # Decode and split the stream using csv.reader()
+    dict_client = get_container_client("data-dictionaries")
+    blob_dict_client = dict_client.get_blob_client(blob)
+
+    return parse_data_dictionary(
+        blob_dict_client.download_blob().readall().decode("utf-8").splitlines()
+    )
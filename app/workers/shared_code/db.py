@@ -1,10 +1,8 @@
-from collections import OrderedDict, defaultdict
-from typing import Any, Dict, List, Literal, Optional, Union
+from typing import Dict, List, Literal, Optional, Union
 from enum import Enum
 
 from django.contrib.contenttypes.models import ContentType
 from django.db.models.query import QuerySet
-from shared.data.models import Concept, ConceptRelationship
 from shared.mapping.models import (
     ScanReport,
     ScanReportConcept,
@@ -13,6 +11,7 @@ from shared.mapping.models import (
     ScanReportTable,
     UploadStatus,
 )
+from shared.services.concept_lookup import find_standard_concepts
 from shared_code.logger import logger
 from shared_code.models import (
     ScanReportConceptContentType,
@@ -34,6 +33,7 @@ class JobStageType(Enum):
     REUSE_CONCEPTS = "Reuse concepts from other scan reports"
     GENERATE_RULES = "Generate mapping rules from available concepts"
     DOWNLOAD_RULES = "Generate and download mapping rules JSON"
+    DELETE_SCAN_REPORT = "Delete Scan Report"
 
 
 def update_job(
@@ -61,6 +61,13 @@ def update_job(
     if scan_report and stage.name == "UPLOAD_SCAN_REPORT":
         scan_report.upload_status = upload_status_entity
         scan_report.save()
+        # Uploads accepted before their checks have run also have a job, which
+        # carries the details of the checks
+        job = (
+            Job.objects.filter(scan_report=scan_report, stage=job_stage_entity)
+            .order_by("-created_at")
+            .first()
+        )
     else:
         # Get the latest job record to update based on scan_report or scan_report_table
         job = None
@@ -73,12 +80,12 @@ def update_job(
                 scan_report_table=scan_report_table, stage=job_stage_entity
             ).order_by("-created_at")[0]
 
-        if job:
-            # Update status and details
-            job.status = stage_status_entity
-            if details:
-                job.details = details
-            job.save()
+    if job:
+        # Update status and details
+        job.status = stage_status_entity
+        if details:
+            job.details = details
+        job.save()
 
 
 def create_concept(
@@ -212,14 +219,14 @@ def get_scan_report_active_concepts(
 
     if content_type == ScanReportConceptContentType.FIELD:
         object_ids = ScanReportField.objects.filter(
-            scan_report_table__scan_report__hidden=False,
-            scan_report_table__scan_report__parent_dataset__hidden=False,
-            scan_report_table__scan_report__mapping_status__value="COMPLETE",
+            scan_report__hidden=False,
+            scan_report__parent_dataset__hidden=False,
+            scan_report__mapping_status__value="COMPLETE",
         ).values_list("id", flat=True)
     elif content_type == ScanReportConceptContentType.VALUE:
         object_ids = ScanReportValue.objects.filter(
-            scan_report_field__scan_report_table__scan_report__hidden=False,
-            scan_report_field__scan_report_table__scan_report__mapping_status__value="COMPLETE",
+            scan_report__hidden=False,
+            scan_report__mapping_status__value="COMPLETE",
         ).values_list("id", flat=True)
     else:
         raise ValueError(f"Unsupported content type: {content_type}")
@@ -231,12 +238,15 @@ def get_scan_report_active_concepts(
 
 def find_standard_concept_batch(
     source_concepts: List[ScanReportValueDict],
-) -> Union[defaultdict[Any, List], Dict]:
+) -> Dict[int, List[int]]:
     """
     Given a list of ScanReportValueDict, each of which contains a 'concept_id' entry,
     return a dictionary mapping from the original concept_ids to all standard
     concepts it maps to via ConceptRelationship.
 
+    The lookup is shared with the API's bulk concept lookup, see
+    `shared.services.concept_lookup.find_standard_concepts`.
+
     example:
     - input
       [{'id': 2575531, 'value': 'V68.0', ..., 'frequency': 2000,
@@ -248,49 +258,11 @@ def find_standard_concept_batch(
        ]
 
     - output
-      defaultdict(<class 'list'>, {44829331: [380844, 4302223, 4307254, 42872561],
-                                   45890989: [4148832]}
-                  )
+      {44829331: [380844, 4302223, 4307254, 42872561], 45890989: [4148832]}
     """
     logger.debug("find_standard_concept_batch()")
     # Exit early rather than having to handle this case in later code.
     if not source_concepts:
         return {}
 
-    # Get "Maps to" relations of all source concepts supplied
-    concept_ids = [concept["concept_id"] for concept in source_concepts]
-    concept_relationships = ConceptRelationship.objects.filter(
-        relationship_id="Maps to", concept_id_1__in=concept_ids
-    ).all()
-
-    # Find those concepts with a "trail" to follow, that is, those which have
-    # differing concept_id_1/2.
-    filtered_concept_relations = list(
-        filter(
-            lambda concept_relation: concept_relation.concept_id_2
-            != concept_relation.concept_id_1,
-            concept_relationships,
-        )
-    )
-
-    # Send all of those to conceptfilter again to check they are standard.
-    concept_id_2s = [relation.concept_id_2 for relation in filtered_concept_relations]
-    concepts = Concept.objects.filter(concept_id__in=concept_id_2s).all()
-    concept_details = {a.concept_id: a.standard_concept for a in concepts}
-
-    logger.debug("concepts got")
-
-    # Filter by those concepts relationships where the second concept_id is standard
-    # Now combine the pairs so that each pair is of type tuple(str, list(str))
-    combined_pairs = defaultdict(list)
-    for relationship in filtered_concept_relations:
-        if concept_details[relationship.concept_id_2] == "S":
-            combined_pairs[relationship.concept_id_1].append(relationship.concept_id_2)
-
-    # Remove duplicates from within each entry, by converting each to an Ordered Dict
-    # (the keys of which must be unique, and will preserve the order if that's
-    # important) and then back to a list.
-    for pair in combined_pairs:
-        combined_pairs[pair] = list(OrderedDict.fromkeys(combined_pairs[pair]))
-
-    return combined_pairs
+    return find_standard_concepts(concept["concept_id"] for concept in source_concepts)
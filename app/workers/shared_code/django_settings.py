@@ -1,13 +1,15 @@
 import os
 
 from dotenv import load_dotenv
+from shared.settings import cache_settings
 
 load_dotenv()
 
 SECRET_KEY = os.environ.get("SECRET_KEY")
 
+# Only the apps whose models the workers use, as loading each app slows down
+# starting the workers. The admin is left out.
 INSTALLED_APPS = [
-    "django.contrib.admin",
     "django.contrib.auth",
     "django.contrib.contenttypes",
     "shared.data",
@@ -30,3 +32,6 @@ DATABASES = {
         },
     }
 }
+
+# Share the API's cache, so workers can invalidate cached responses they make stale
+CACHES = cache_settings()
@@ -97,6 +97,28 @@ def handle_max_chars(max_chars: Optional[int] = None) -> int:
     return max_chars
 
 
+class _Page:
+    """
+    A page of entries, with the length of the page's JSON kept as entries are
+    added, so each entry is only serialised once.
+    """
+
+    __slots__ = ("entries", "length")
+
+    def __init__(self):
+        self.entries: List[Any] = []
+        # The length of json.dumps([])
+        self.length = 2
+
+    def fits(self, entry_length: int, max_chars: int) -> bool:
+        return self.length + entry_length < max_chars
+
+    def add(self, entry: Any, entry_length: int) -> None:
+        # json.dumps separates list items with ", "
+        self.length += entry_length + (2 if self.entries else 0)
+        self.entries.append(entry)
+
+
 def perform_chunking(entries_to_post: List[Dict]) -> List[List[List[Dict]]]:
     """
     Splits a list of dictionaries into chunks.
@@ -124,30 +146,14 @@ def perform_chunking(entries_to_post: List[Dict]) -> List[List[List[Dict]]]:
     chunk_size = int(chunk_size_str) if chunk_size_str else 6
 
     chunked_entries_to_post = []
-    this_page: List[Dict] = []
     this_chunk = []
-    page_no = 0
-    for entry in entries_to_post:
-        # If the current page won't be overfull, add the entry to the current page
-        if len(json.dumps(this_page)) + len(json.dumps(entry)) < max_chars:
-            this_page.append(entry)
-        # Otherwise, this page should be added to the current chunk.
-        else:
-            this_chunk.append(this_page)
-            page_no += 1
-            # Now check for a full chunk. If full, then add this chunk to the list
-            # of chunks.
-            if page_no % chunk_size == 0:
-                # append the chunk to the list of chunks, then reset the chunk to empty
-                chunked_entries_to_post.append(this_chunk)
-                this_chunk = []
-            # Now add the entry that would have over-filled the page.
-            this_page = [entry]
-    # After all entries are added, check for a half-filled page, and if present add
-    # it to the list of pages
-    if this_page:
-        this_chunk.append(this_page)
-    # Similarly, if a chunk ends up half-filled, add it to thelist of chunks
+    for page in paginate(entries_to_post, max_chars):
+        this_chunk.append(page)
+        # Once a chunk is full, add it to the list of chunks
+        if len(this_chunk) == chunk_size:
+            chunked_entries_to_post.append(this_chunk)
+            this_chunk = []
+    # If a chunk ends up half-filled, add it to the list of chunks
     if this_chunk:
         chunked_entries_to_post.append(this_chunk)
 
@@ -170,21 +176,20 @@ def paginate(entries: List[str], max_chars: Optional[int] = None) -> List[List[s
     max_chars = handle_max_chars(max_chars)
 
     paginated_entries = []
-    this_page: List[str] = []
+    this_page = _Page()
     for entry in entries:
-        # If the current page won't be overfull, add the entry to the current page
-        if len(json.dumps(this_page)) + len(json.dumps(entry)) < max_chars:
-            this_page.append(entry)
-        else:
-            # Otherwise, this page should be added to the list of pages.
-            paginated_entries.append(this_page)
-            # Now add the entry that would have over-filled the page.
-            this_page = [entry]
+        entry_length = len(json.dumps(entry))
+        # If the current page would be overfull, add it to the list of pages, and
+        # start a new page with the entry that would have over-filled it.
+        if not this_page.fits(entry_length, max_chars):
+            paginated_entries.append(this_page.entries)
+            this_page = _Page()
+        this_page.add(entry, entry_length)
 
     # After all entries are added, check for a half-filled page, and if present add
     # it to the list of pages
-    if this_page:
-        paginated_entries.append(this_page)
+    if this_page.entries:
+        paginated_entries.append(this_page.entries)
 
     return paginated_entries
 
@@ -30,6 +30,12 @@ class RulesFileMessage(TypedDict):
     file_type: Literal["text/csv", "application/json", "image/svg+xml"]
 
 
+class ScanReportDeleteMessage(TypedDict):
+    scan_report_id: int
+    scan_report_blob: str
+    data_dictionary_blob: Optional[str]
+
+
 @dataclass
 class FileHandlerConfig:
     handler: Callable[[Any], Any]
@@ -0,0 +1,85 @@
+import json
+from unittest.mock import MagicMock, call, patch
+
+import pytest
+from azure.core.exceptions import ResourceNotFoundError
+from DeleteQueue import _delete_blobs, main
+from shared_code.db import StageStatusType
+
+
+def _message(**kwargs):
+    body = {
+        "scan_report_id": 1,
+        "scan_report_blob": "red-book.xlsx",
+        "data_dictionary_blob": "red-book.csv",
+        **kwargs,
+    }
+    return MagicMock(get_body=MagicMock(return_value=json.dumps(body).encode()))
+
+
+def test__delete_blobs():
+    with patch(
+        "shared.files.service.delete_blob",
+        side_effect=[True, ResourceNotFoundError(), True],
+    ) as mock_delete_blob:
+        _delete_blobs("red-book.xlsx", "red-book.csv")
+
+    assert mock_delete_blob.call_args_list == [
+        call("red-book.xlsx", "scan-reports"),
+        call("red-book.values", "scan-reports"),
+        call("red-book.csv", "data-dictionaries"),
+    ]
+
+
+def test_main():
+    counts = {"tables": 2, "fields": 10, "values": 100}
+    with patch("DeleteQueue.ScanReport") as mock_scan_report, patch(
+        "DeleteQueue._get_job"
+    ) as mock_get_job, patch("DeleteQueue._update_job") as mock_update_job, patch(
+        "DeleteQueue.delete_scan_report", return_value=counts
+    ) as mock_delete, patch(
+        "DeleteQueue._delete_blobs"
+    ) as mock_delete_blobs:
+        mock_scan_report.objects.filter.return_value.first.return_value = MagicMock(
+            dataset="Red Book"
+        )
+        main(_message())
+
+    assert mock_delete.call_args.args == (1,)
+    job = mock_get_job.return_value
+    status, details = mock_update_job.call_args.args[1:]
+    assert mock_update_job.call_args.args[0] is job
+    assert status == StageStatusType.COMPLETE
+    assert details == (
+        "Deleted Scan Report 1 (Red Book): 2 tables, 10 fields and 100 values."
+    )
+    mock_delete_blobs.assert_called_once_with("red-book.xlsx", "red-book.csv")
+
+
+def test_main_already_deleted():
+    with patch("DeleteQueue.ScanReport") as mock_scan_report, patch(
+        "DeleteQueue.delete_scan_report"
+    ) as mock_delete, patch("DeleteQueue._delete_blobs") as mock_delete_blobs:
+        mock_scan_report.objects.filter.return_value.first.return_value = None
+        main(_message(data_dictionary_blob=None))
+
+    mock_delete.assert_not_called()
+    mock_delete_blobs.assert_called_once_with("red-book.xlsx", None)
+
+
+def test_main_failed():
+    with patch("DeleteQueue.ScanReport"), patch("DeleteQueue._get_job"), patch(
+        "DeleteQueue._update_job"
+    ) as mock_update_job, patch(
+        "DeleteQueue.delete_scan_report", side_effect=RuntimeError("boom")
+    ), patch(
+        "DeleteQueue._delete_blobs"
+    ) as mock_delete_blobs:
+        with pytest.raises(RuntimeError):
+            main(_message())
+
+    assert mock_update_job.call_args.args[1:] == (
+        StageStatusType.FAILED,
+        "Error deleting: boom",
+    )
+    mock_delete_blobs.assert_not_called()
@@ -0,0 +1,85 @@
+import os
+import time
+import tracemalloc
+
+import pytest
+from UploadQueue import _create_values_details
+
+# Benchmarks build large fixtures, so only run them when asked to.
+pytestmark = pytest.mark.skipif(
+    not os.getenv("RUN_BENCHMARKS"), reason="Set RUN_BENCHMARKS=1 to run benchmarks."
+)
+
+NUM_FIELDS = 50
+NUM_VALUES = 4_000
+
+
+def _legacy_values_details(fieldname_value_freq, table_name, data_dictionary):
+    # The value details as they were built before, as a dict per value, with an
+    # order and a data dictionary lookup per value.
+    values_details = []
+    for fieldname, value_freq_tuples in fieldname_value_freq.items():
+        for full_value, frequency in value_freq_tuples:
+            try:
+                frequency = int(frequency)
+            except (ValueError, TypeError):
+                frequency = 0
+            values_details.append(
+                {
+                    "full_value": full_value,
+                    "frequency": frequency,
+                    "fieldname": fieldname,
+                    "table": table_name,
+                    "val_desc": None,
+                }
+            )
+    for entry_number, entry in enumerate(values_details):
+        entry["order"] = entry_number
+    for entry in values_details:
+        table_data = data_dictionary.get(str(entry["table"]))
+        if table_data and table_data.get(str(entry["fieldname"])):
+            entry["val_desc"] = table_data[str(entry["fieldname"])].get(
+                str(entry["full_value"])
+            )
+    return values_details
+
+
+def _measure(name, func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"\n{name}: {len(result)} values in {seconds:.3f}s, "
+        f"retained {current / 1024 / 1024:,.1f} MB, peak {peak / 1024 / 1024:,.1f} MB"
+    )
+    return result, peak
+
+
+def test_values_details_allocations():
+    fieldname_value_freq = {
+        f"field_{f}": [(f"value_{v}", str(v)) for v in range(NUM_VALUES)]
+        for f in range(NUM_FIELDS)
+    }
+    data_dictionary = {
+        "table": {
+            f"field_{f}": {f"value_{v}": f"Value {v}" for v in range(0, NUM_VALUES, 2)}
+            for f in range(NUM_FIELDS)
+        }
+    }
+
+    legacy, legacy_peak = _measure(
+        "Dict per value",
+        lambda: _legacy_values_details(fieldname_value_freq, "table", data_dictionary),
+    )
+    details, peak = _measure(
+        "Tuple per value",
+        lambda: _create_values_details(fieldname_value_freq, "table", data_dictionary),
+    )
+
+    assert [(e.value, e.frequency, e.description) for e in details] == [
+        (e["full_value"], e["frequency"], e["val_desc"]) for e in legacy
+    ]
+    assert peak < legacy_peak
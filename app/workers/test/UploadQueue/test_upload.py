@@ -1,17 +1,37 @@
+import asyncio
 from datetime import datetime, timezone
-from unittest.mock import MagicMock, patch
+from io import BytesIO
+from unittest.mock import AsyncMock, MagicMock, call, patch
 
+import openpyxl
+import pytest
 from openpyxl.cell.cell import Cell
 from UploadQueue import (
-    _apply_data_dictionary,
-    _assign_order,
+    ValueDetail,
     _create_field_entry,
+    _create_fields,
     _create_table_entry,
     _create_value_entries,
     _create_values_details,
+    _get_previous_intermediate,
     _get_unique_table_names,
+    _handle_failure,
+    _run_deferred_checks,
+    _transform_scan_report_sheet_table,
+    _upload_intermediate,
+    main,
 )
 
+# isort: split
+from shared.mapping.models import ScanReportField, ScanReportValue
+from shared.services.scan_report_checks import ScanReportCheckError
+from shared.services.scan_report_intermediate import (
+    IntermediateFormatError,
+    IntermediateReader,
+    IntermediateWriter,
+)
+from shared_code.db import JobStageType, StageStatusType
+
 
 def test__get_unique_table_names():
     # Arrange
@@ -92,7 +112,7 @@ def test__create_field_entry():
         mock_datetime.now.return_value = datetime(2024, 2, 29, tzinfo=timezone.utc)
 
         # Act
-        result = _create_field_entry(row, scan_report_table_id)
+        result = _create_field_entry(row, scan_report_table_id, "2")
 
     # Assert
     expected_result = {
@@ -119,7 +139,7 @@ def test__create_values_details():
 
     fieldname_value_freq = {
         "field1": [("value1", "10"), ("value2", "20")],
-        "field2": [("value3", "30"), ("value4", "40")],
+        "field2": [("value3", "30"), ("value4", None)],
     }
 
     # Act
@@ -127,98 +147,22 @@ def test__create_values_details():
 
     # Assert
     expected = [
-        {
-            "full_value": "value1",
-            "frequency": 10,
-            "fieldname": "field1",
-            "table": "test_table",
-            "val_desc": None,
-        },
-        {
-            "full_value": "value2",
-            "frequency": 20,
-            "fieldname": "field1",
-            "table": "test_table",
-            "val_desc": None,
-        },
-        {
-            "full_value": "value3",
-            "frequency": 30,
-            "fieldname": "field2",
-            "table": "test_table",
-            "val_desc": None,
-        },
-        {
-            "full_value": "value4",
-            "frequency": 40,
-            "fieldname": "field2",
-            "table": "test_table",
-            "val_desc": None,
-        },
+        ValueDetail("field1", "value1", 10, None),
+        ValueDetail("field1", "value2", 20, None),
+        ValueDetail("field2", "value3", 30, None),
+        ValueDetail("field2", "value4", 0, None),
     ]
 
     assert result == expected
 
 
-def test__assign_order():
-    # Arrange
-    values_details = [
-        {
-            "full_value": "value1",
-            "frequency": 10,
-            "fieldname": "field1",
-            "table": "test_table",
-            "val_desc": None,
-        },
-        {
-            "full_value": "value2",
-            "frequency": 20,
-            "fieldname": "field1",
-            "table": "test_table",
-            "val_desc": None,
-        },
-        {
-            "full_value": "value3",
-            "frequency": 30,
-            "fieldname": "field2",
-            "table": "test_table",
-            "val_desc": None,
-        },
-    ]
-
-    # Act
-    _assign_order(values_details)
-
-    # Assert
-    for i, entry in enumerate(values_details):
-        assert entry["order"] == i
-
-
-def test__apply_data_dictionary():
+def test__create_values_details_with_data_dictionary():
     # Arrange
-    values_details = [
-        {
-            "full_value": "value1",
-            "frequency": 10,
-            "fieldname": "field1",
-            "table": "test_table",
-            "val_desc": None,
-        },
-        {
-            "full_value": "value2",
-            "frequency": 20,
-            "fieldname": "field1",
-            "table": "test_table",
-            "val_desc": None,
-        },
-        {
-            "full_value": "value3",
-            "frequency": 30,
-            "fieldname": "field2",
-            "table": "test_table",
-            "val_desc": None,
-        },
-    ]
+    fieldname_value_freq = {
+        "field1": [("value1", 10), ("value2", 20), ("value5", 50)],
+        "field2": [("value3", 30)],
+        "field3": [("value4", 40)],
+    }
 
     data_dictionary = {
         "test_table": {
@@ -229,56 +173,378 @@ def test__apply_data_dictionary():
             "field2": {
                 "value3": "description3",
             },
-        }
+        },
+        "other_table": {"field3": {"value4": "description4"}},
     }
 
     # Act
-    _apply_data_dictionary(values_details, data_dictionary)
+    result = _create_values_details(fieldname_value_freq, "test_table", data_dictionary)
 
     # Assert
-    assert values_details[0]["val_desc"] == "description1"
-    assert values_details[1]["val_desc"] == "description2"
-    assert values_details[2]["val_desc"] == "description3"
+    assert [entry.description for entry in result] == [
+        "description1",
+        "description2",
+        None,
+        "description3",
+        None,
+    ]
 
 
 def test__create_value_entries():
     # Arrange
     values_details = [
-        {
-            "full_value": "value1",
-            "frequency": 10,
-            "fieldname": "field1",
-            "val_desc": "description1",
-        },
-        {
-            "full_value": "value2",
-            "frequency": 20,
-            "fieldname": "field1",
-            "val_desc": "description2",
-        },
+        ValueDetail("field1", "value1", 10, "description1"),
+        ValueDetail("field2", "value2" * 30, 20, None),
     ]
+    fields = [MagicMock(spec=ScanReportField), MagicMock(spec=ScanReportField)]
+    fields[0].name = "field1"
+    fields[1].name = "field2"
 
-    fieldnames_to_ids_dict = {
-        "field1": "field_id_1",
-        "field2": "field_id_2",
-    }
+    # Act
+    with patch("UploadQueue.ScanReportValue") as mock_scan_report_value:
+        _create_value_entries(values_details, fields)
 
-    # Mock datetime
-    expected_datetime = "2024-02-29T00:00:00.000000Z"
-    with patch("UploadQueue.datetime") as mock_datetime:
-        mock_datetime.now.return_value = datetime(2024, 2, 29, tzinfo=timezone.utc)
+    # Assert
+    assert mock_scan_report_value.call_args_list == [
+        call(
+            value="value1",
+            frequency=10,
+            value_description="description1",
+            scan_report_field=fields[0],
+            scan_report_id=fields[0].scan_report_id,
+        ),
+        call(
+            value=("value2" * 30)[:127],
+            frequency=20,
+            value_description=None,
+            scan_report_field=fields[1],
+            scan_report_id=fields[1].scan_report_id,
+        ),
+    ]
 
-        # Act
-        result = _create_value_entries(values_details, fieldnames_to_ids_dict)
+
+def test__run_deferred_checks():
+    # Arrange
+    workbook = MagicMock()
+    scan_report = MagicMock(id=1)
+
+    # Act
+    with patch("UploadQueue.check_scan_report") as mock_check, patch(
+        "UploadQueue.update_job"
+    ) as mock_update_job:
+        passed = _run_deferred_checks(workbook, scan_report)
+
+    # Assert
+    assert passed
+    mock_check.assert_called_once_with(workbook)
+    mock_update_job.assert_not_called()
+
+
+def test__run_deferred_checks_failed():
+    # Arrange
+    workbook = MagicMock()
+    scan_report = MagicMock(id=1)
+    errors = ["Tables in Field Overview sheet do not match the sheets supplied."]
+
+    # Act
+    with patch(
+        "UploadQueue.check_scan_report", side_effect=ScanReportCheckError(errors)
+    ), patch("UploadQueue.update_job") as mock_update_job:
+        passed = _run_deferred_checks(workbook, scan_report)
 
     # Assert
-    for i, entry in enumerate(result):
-        assert entry["created_at"] == expected_datetime
-        assert entry["updated_at"] == expected_datetime
-        assert entry["value"] == values_details[i]["full_value"]
-        assert entry["frequency"] == values_details[i]["frequency"]
-        assert entry["value_description"] == values_details[i]["val_desc"]
-        assert (
-            entry["scan_report_field"]
-            == fieldnames_to_ids_dict[values_details[i]["fieldname"]]
+    assert not passed
+    mock_update_job.assert_called_once_with(
+        JobStageType.UPLOAD_SCAN_REPORT,
+        StageStatusType.FAILED,
+        scan_report=scan_report,
+        details=errors[0],
+    )
+
+
+def test__upload_intermediate():
+    stream = BytesIO(b"intermediate")
+    stream.seek(5)
+
+    with patch("UploadQueue.upload_stream") as mock_upload_stream:
+        _upload_intermediate(stream, "report.xlsx")
+
+    mock_upload_stream.assert_called_once_with(
+        "report.values", "scan-reports", stream, "application/octet-stream"
+    )
+    assert stream.tell() == 0
+
+
+def test__upload_intermediate_failed():
+    with patch("UploadQueue.upload_stream", side_effect=ValueError("No storage")):
+        # The scan report is uploaded without its intermediate
+        _upload_intermediate(BytesIO(b"intermediate"), "report.xlsx")
+
+
+TABLES = {
+    "Person": {
+        "sex": [("M", 120), ("F", 130)],
+        # Longer than the values stored in the database
+        "notes": [("x" * 200, 1)],
+    },
+    "Visit": {"type": [("ER", 5), ("IP", 2)]},
+    "Drug": {"name": [("Aspirin", 3)]},
+}
+DATA_DICTIONARY = {"Person": {"sex": {"M": "Male"}}}
+
+
+def _scan_report_workbook():
+    workbook = openpyxl.Workbook()
+    overview = workbook.active
+    overview.title = "Field Overview"
+    overview.append(["Table", "Field", "Description", "Type"] + [None] * 6)
+    for table, fields in TABLES.items():
+        for field in fields:
+            overview.append([table, field, "", "VARCHAR", 10, 3, 3, 0, 3, 1])
+        overview.append([None])
+    for table, fields in TABLES.items():
+        sheet = workbook.create_sheet(table)
+        sheet.append([h for field in fields for h in (field, "Frequency")])
+        for i in range(max(len(values) for values in fields.values())):
+            row = []
+            for values in fields.values():
+                row.extend(values[i] if i < len(values) else (None, None))
+            sheet.append(row)
+    stream = BytesIO()
+    workbook.save(stream)
+    stream.seek(0)
+    return openpyxl.load_workbook(stream, read_only=True)
+
+
+def _upload_tables(stream, completed_table_ids=None, previous=None, failing_table=None):
+    """
+    Runs `_create_fields` against a workbook of `TABLES` without a database,
+    writing the intermediate to `stream` even if it fails.
+
+    Returns:
+        int: The number of table sheets parsed.
+    """
+
+    def bulk_insert(model, entries):
+        # Fails as the values of the table are inserted, after they are written
+        if (
+            model is ScanReportValue
+            and entries[0].scan_report_field.scan_report_table_id == failing_table
+        ):
+            raise ConnectionError("Database went away")
+        return entries
+
+    workbook = _scan_report_workbook()
+    tables = []
+    for pk, name in enumerate(TABLES, start=1):
+        table = MagicMock(pk=pk, scan_report_id=1)
+        table.name = name
+        tables.append(table)
+    intermediate = IntermediateWriter(stream)
+    with patch("UploadQueue.transaction"), patch(
+        "UploadQueue.bulk_insert", side_effect=bulk_insert
+    ), patch(
+        "UploadQueue._transform_scan_report_sheet_table",
+        wraps=_transform_scan_report_sheet_table,
+    ) as mock_transform:
+        try:
+            asyncio.run(
+                _create_fields(
+                    workbook.worksheets[0],
+                    workbook,
+                    "1",
+                    tables,
+                    DATA_DICTIONARY,
+                    intermediate,
+                    completed_table_ids,
+                    previous,
+                )
+            )
+        finally:
+            intermediate.finish()
+    return mock_transform.call_count
+
+
+def test_resumed_upload_writes_the_same_intermediate():
+    clean = BytesIO()
+    _upload_tables(clean)
+    assert IntermediateReader(clean.getvalue()).tables == ["Person", "Visit", "Drug"]
+    assert ("notes", "x" * 200) in [
+        (r.field, r.value)
+        for r in IntermediateReader(clean.getvalue()).table_records("Person")
+    ]
+
+    failed = BytesIO()
+    with pytest.raises(ConnectionError):
+        _upload_tables(failed, failing_table=2)
+
+    resumed = BytesIO()
+    parsed = _upload_tables(
+        resumed, {1}, previous=IntermediateReader(failed.getvalue())
+    )
+    # The sheet of the uploaded table is not parsed again
+    assert parsed == 2
+    assert resumed.getvalue() == clean.getvalue()
+
+
+def test_resumed_upload_without_earlier_intermediate():
+    clean = BytesIO()
+    _upload_tables(clean)
+
+    resumed = BytesIO()
+    # The sheet of the uploaded table is parsed again
+    assert _upload_tables(resumed, {1}) == 3
+    assert resumed.getvalue() == clean.getvalue()
+
+
+def test__get_previous_intermediate_failed():
+    with patch(
+        "UploadQueue.blob_parser.get_scan_report_intermediate",
+        side_effect=IntermediateFormatError("Not a scan report intermediate."),
+    ):
+        # The uploaded tables are parsed again
+        assert _get_previous_intermediate("report.xlsx") is None
+
+
+def test__handle_failure_resumes_retries():
+    msg = MagicMock(dequeue_count=2)
+
+    with patch("UploadQueue.update_job") as mock_update_job:
+        # A redelivered message is processed again, to resume the upload
+        _handle_failure(msg, "1")
+
+    mock_update_job.assert_not_called()
+
+
+def test__handle_failure_after_max_attempts():
+    msg = MagicMock(dequeue_count=4)
+
+    with patch("UploadQueue.update_job") as mock_update_job, patch(
+        "UploadQueue.ScanReport"
+    ) as mock_scan_report, patch.dict("os.environ", {"UPLOAD_MAX_ATTEMPTS": "3"}):
+        with pytest.raises(ValueError):
+            _handle_failure(msg, "1")
+
+    mock_update_job.assert_called_once_with(
+        JobStageType.UPLOAD_SCAN_REPORT,
+        StageStatusType.FAILED,
+        scan_report=mock_scan_report.objects.get.return_value,
+    )
+
+
+def test__create_fields_skips_completed_tables():
+    def field_row(table, field):
+        return [MagicMock(value=value) for value in (table, field)] + [
+            MagicMock(value=None) for _ in range(8)
+        ]
+
+    rows = [
+        field_row("Person", "sex"),
+        field_row("Person", "age"),
+        field_row(None, None),
+        field_row("Visit", "type"),
+        field_row(None, None),
+        field_row("Drug", "name"),
+    ]
+    worksheet = MagicMock(max_row=len(rows))
+    worksheet.iter_rows.return_value = iter(rows)
+    tables = [MagicMock(pk=1), MagicMock(pk=2), MagicMock(pk=3)]
+    for table, name in zip(tables, ["Person", "Visit", "Drug"]):
+        table.name = name
+
+    with patch(
+        "UploadQueue._handle_single_table", new_callable=AsyncMock
+    ) as mock_handle_single_table, patch(
+        "UploadQueue._create_field_entry",
+        side_effect=lambda row, id, scan_report_id: id,
+    ):
+        asyncio.run(
+            _create_fields(worksheet, MagicMock(), "1", tables, None, None, {2})
         )
+
+    assert [call.args[:2] for call in mock_handle_single_table.call_args_list] == [
+        ("Person", [1, 1]),
+        ("Drug", [3]),
+    ]
+
+
+class _UploadAttempts:
+    """
+    Runs `main` against a mocked scan report whose upload status is kept as the
+    workers' `update_job` would keep it, so a message can be redelivered.
+    """
+
+    def __init__(self, status="PENDING"):
+        self.scan_report = MagicMock()
+        self.scan_report.upload_status.value = status
+        self.workbook = MagicMock()
+
+    def update_job(self, stage, status, scan_report=None, **kwargs):
+        scan_report.upload_status.value = status.name
+
+    def run(self, get_scan_report=None, create_fields=None):
+        with patch(
+            "UploadQueue.helpers.unwrap_message",
+            return_value=("report.xlsx", "None", "1", None),
+        ), patch("UploadQueue._handle_failure"), patch(
+            "UploadQueue.ScanReport"
+        ) as mock_scan_report, patch(
+            "UploadQueue.update_job", side_effect=self.update_job
+        ), patch(
+            "UploadQueue._update_job_details"
+        ), patch(
+            "UploadQueue.blob_parser"
+        ) as mock_blob_parser, patch(
+            "UploadQueue._run_deferred_checks", return_value=True
+        ) as mock_checks, patch(
+            "UploadQueue._create_tables"
+        ), patch(
+            "UploadQueue._get_completed_table_ids", return_value=set()
+        ), patch(
+            "UploadQueue._get_previous_intermediate", return_value=None
+        ), patch(
+            "UploadQueue._create_fields", new=AsyncMock(side_effect=create_fields)
+        ), patch(
+            "UploadQueue._upload_intermediate"
+        ) as mock_upload_intermediate, patch(
+            "UploadQueue.bump_scan_report_cache_version"
+        ):
+            mock_scan_report.objects.get.return_value = self.scan_report
+            mock_blob_parser.get_scan_report.side_effect = get_scan_report
+            mock_blob_parser.get_scan_report.return_value = self.workbook
+            mock_blob_parser.get_data_dictionary.return_value = (None, None)
+            try:
+                main(MagicMock())
+            finally:
+                self.checked = mock_checks.call_count
+                self.uploaded = mock_upload_intermediate.call_count
+
+
+def test_main_retries_checks_after_failing_before_them():
+    attempts = _UploadAttempts()
+
+    with pytest.raises(ConnectionError):
+        attempts.run(get_scan_report=ConnectionError("Download failed"))
+    # The upload is left to be checked by the next attempt
+    assert attempts.checked == 0
+    assert attempts.scan_report.upload_status.value == "PENDING"
+
+    attempts.run()
+    assert attempts.checked == 1
+    assert attempts.scan_report.upload_status.value == "COMPLETE"
+
+
+def test_main_does_not_check_again_after_checks_passed():
+    attempts = _UploadAttempts()
+
+    with pytest.raises(ConnectionError):
+        attempts.run(create_fields=ConnectionError("Database went away"))
+    assert attempts.checked == 1
+    assert attempts.scan_report.upload_status.value == "IN_PROGRESS"
+
+    # The intermediate of the tables it got to is kept for the next attempt
+    assert attempts.uploaded == 1
+
+    attempts.run()
+    assert attempts.checked == 0
+    assert attempts.scan_report.upload_status.value == "COMPLETE"
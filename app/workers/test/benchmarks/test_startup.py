@@ -0,0 +1,51 @@
+import subprocess
+import sys
+
+import pytest
+from benchmarks.startup import WORKERS_DIR, function_names, measure_startup
+
+
+def _imported_modules(function: str) -> set:
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            f"import sys, {function}; print('\\n'.join(sys.modules))",
+        ],
+        cwd=WORKERS_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return set(result.stdout.split())
+
+
+def test_function_names():
+    names = function_names()
+    assert "UploadQueue" in names
+    assert "RulesConceptsActivity" in names
+    assert "shared_code" not in names
+
+
+def test_measure_startup():
+    result = measure_startup("RulesTrigger", repeat=2)
+    assert result["name"] == "RulesTrigger"
+    assert 0 < result["min_seconds"] <= result["seconds"] <= result["max_seconds"]
+    assert result["process_seconds"] > result["seconds"]
+    assert result["modules"] > 0
+
+
+@pytest.mark.parametrize(
+    "function",
+    ["RulesConceptsActivity", "RulesGenerationActivity", "RulesOrchestrator"],
+)
+def test_functions_defer_heavy_imports(function):
+    modules = _imported_modules(function)
+    assert "openpyxl" not in modules
+    assert "graphviz" not in modules
+    assert "azure.storage.blob" not in modules
+    assert "django.contrib.admin" not in modules
+
+
+def test_upload_queue_imports_alone():
+    assert "UploadQueue" in _imported_modules("UploadQueue")
@@ -0,0 +1,88 @@
+import csv
+
+import openpyxl
+import pytest
+from benchmarks.synthetic import (
+    DATE_FIELD,
+    PERSON_ID_FIELD,
+    VOCABULARY_ID,
+    SyntheticScanReport,
+    vocabulary_concepts,
+    write_data_dictionary,
+    write_scan_report,
+)
+from shared.services.scan_report_checks import check_scan_report
+from shared_code.blob_parser import parse_data_dictionary
+from UploadQueue import _transform_scan_report_sheet_table
+
+REPORT = SyntheticScanReport(
+    tables=2, fields_per_table=4, values_per_field=20, vocabulary_size=50, seed=1
+)
+
+
+@pytest.fixture
+def scan_report_path(tmp_path):
+    path = tmp_path / "scan_report.xlsx"
+    write_scan_report(REPORT, str(path))
+    return path
+
+
+@pytest.fixture
+def data_dictionary_path(tmp_path):
+    path = tmp_path / "data_dictionary.csv"
+    write_data_dictionary(REPORT, str(path))
+    return path
+
+
+def test_scan_report_passes_checks(scan_report_path):
+    wb = openpyxl.load_workbook(scan_report_path, read_only=True)
+    check_scan_report(wb)
+    assert wb.sheetnames == ["Field Overview", *REPORT.table_names()]
+
+
+def test_scan_report_values(scan_report_path):
+    wb = openpyxl.load_workbook(scan_report_path, read_only=True)
+    for table in REPORT.table_names():
+        values = _transform_scan_report_sheet_table(wb[table])
+        assert list(values) == REPORT.field_names()
+        for field in REPORT.field_names():
+            assert [(str(v), f) for v, f in values[field]] == list(
+                REPORT.values(table, field)
+            )
+    assert len(set(dict(REPORT.values("table_0", DATE_FIELD)))) == 20
+    assert len(set(dict(REPORT.values("table_0", PERSON_ID_FIELD)))) == 20
+
+
+def test_scan_report_is_reproducible(tmp_path):
+    other = SyntheticScanReport(**{**vars(REPORT), "seed": 2})
+    assert REPORT.coded_fields() == SyntheticScanReport(**vars(REPORT)).coded_fields()
+    assert list(REPORT.values("table_0", "field_0")) != list(
+        other.values("table_0", "field_0")
+    )
+
+
+def test_data_dictionary(data_dictionary_path):
+    with open(data_dictionary_path) as f:
+        lines = f.read().splitlines()
+    data_dictionary, vocab_dictionary = parse_data_dictionary(lines)
+
+    coded_fields = REPORT.coded_fields()
+    assert coded_fields
+    for table, field in coded_fields:
+        assert vocab_dictionary[table][field] == VOCABULARY_ID
+
+    with open(data_dictionary_path) as f:
+        described = [row for row in csv.DictReader(f) if row["value"]]
+    assert 0 < len(described) < REPORT.tables * REPORT.fields_per_table * 20
+    for row in described:
+        assert (
+            data_dictionary[row["csv_file_name"]][row["field_name"]][row["code"]]
+            == f"Description of {row['code']}"
+        )
+
+
+def test_vocabulary_covers_codes():
+    codes = {concept["concept_code"] for concept in vocabulary_concepts(REPORT)}
+    assert len(codes) == REPORT.vocabulary_size
+    for table, field in REPORT.coded_fields():
+        assert {value for value, _ in REPORT.values(table, field)} <= codes
@@ -1,4 +1,6 @@
+import json
 import os
+import random
 from unittest.mock import patch
 
 import pytest
@@ -83,6 +85,91 @@ def test_paginate():
     assert result == expected
 
 
+def _legacy_paginate(entries, max_chars):
+    # paginate as it was, serialising the whole page for every entry
+    paginated_entries = []
+    this_page = []
+    for entry in entries:
+        if len(json.dumps(this_page)) + len(json.dumps(entry)) < max_chars:
+            this_page.append(entry)
+        else:
+            paginated_entries.append(this_page)
+            this_page = [entry]
+    if this_page:
+        paginated_entries.append(this_page)
+    return paginated_entries
+
+
+def _legacy_perform_chunking(entries_to_post, max_chars, chunk_size):
+    # perform_chunking as it was, serialising the whole page for every entry
+    chunked_entries_to_post = []
+    this_page = []
+    this_chunk = []
+    page_no = 0
+    for entry in entries_to_post:
+        if len(json.dumps(this_page)) + len(json.dumps(entry)) < max_chars:
+            this_page.append(entry)
+        else:
+            this_chunk.append(this_page)
+            page_no += 1
+            if page_no % chunk_size == 0:
+                chunked_entries_to_post.append(this_chunk)
+                this_chunk = []
+            this_page = [entry]
+    if this_page:
+        this_chunk.append(this_page)
+    if this_chunk:
+        chunked_entries_to_post.append(this_chunk)
+    return chunked_entries_to_post
+
+
+def _random_entry(rng: random.Random):
+    text = "".join(
+        rng.choice('abcXYZ 019"\\\n\té€😀') for _ in range(rng.randint(0, 12))
+    )
+    return rng.choice(
+        [
+            text,
+            rng.randint(-(10**6), 10**6),
+            {"id": rng.randint(0, 1000), "value": text, "frequency": None},
+            [text, rng.random()],
+        ]
+    )
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_paginate_matches_legacy(seed):
+    # Arrange
+    rng = random.Random(seed)
+    entries = [_random_entry(rng) for _ in range(rng.randint(0, 60))]
+    max_chars = rng.randint(1, 300)
+
+    # Act
+    result = helpers.paginate(entries, max_chars)
+
+    # Assert
+    assert result == _legacy_paginate(entries, max_chars)
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_perform_chunking_matches_legacy(seed):
+    # Arrange
+    rng = random.Random(seed)
+    entries = [_random_entry(rng) for _ in range(rng.randint(0, 60))]
+    max_chars = rng.randint(1, 300)
+    chunk_size = rng.randint(1, 8)
+
+    # Act
+    with patch.dict(
+        os.environ,
+        {"PAGE_MAX_CHARS": str(max_chars), "CHUNK_SIZE": str(chunk_size)},
+    ):
+        result = helpers.perform_chunking(entries)
+
+    # Assert
+    assert result == _legacy_perform_chunking(entries, max_chars, chunk_size)
+
+
 def test_get_by_concept_id():
     # Arrange
     concept_id = 1
@@ -0,0 +1,49 @@
+import json
+import os
+import time
+
+import pytest
+from shared_code import helpers
+
+# Benchmarks build large fixtures, so only run them when asked to.
+pytestmark = pytest.mark.skipif(
+    not os.getenv("RUN_BENCHMARKS"), reason="Set RUN_BENCHMARKS=1 to run benchmarks."
+)
+
+NUM_ENTRIES = 100_000
+MAX_CHARS = 10_000
+
+
+def _legacy_paginate(entries, max_chars):
+    # paginate as it was, serialising the whole page for every entry
+    paginated_entries = []
+    this_page = []
+    for entry in entries:
+        if len(json.dumps(this_page)) + len(json.dumps(entry)) < max_chars:
+            this_page.append(entry)
+        else:
+            paginated_entries.append(this_page)
+            this_page = [entry]
+    if this_page:
+        paginated_entries.append(this_page)
+    return paginated_entries
+
+
+def test_paginate():
+    entries = [
+        {"id": i, "value": f"value_{i}", "frequency": i % 100}
+        for i in range(NUM_ENTRIES)
+    ]
+
+    start = time.perf_counter()
+    legacy = _legacy_paginate(entries, MAX_CHARS)
+    legacy_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    pages = helpers.paginate(entries, MAX_CHARS)
+    seconds = time.perf_counter() - start
+
+    print(
+        f"\nWhole page serialised per entry: {len(legacy)} pages in {legacy_seconds:.3f}s"
+    )
+    print(f"Running length: {len(pages)} pages in {seconds:.3f}s")
+    assert pages == legacy